@@ -0,0 +1,131 @@
+"""Single-pass content analysis for one file.
+
+Chunking, excerpting and risk detection used to each decode a file's bytes
+on their own, and chunking then split the text into lines and re-encoded
+every chunk to measure and hash it. analyze_content() does the work once:
+
+- one sniff of the first block for NULs and binary magic numbers;
+- one strict UTF-8 decode through a shared TextView, skipped when nothing
+  would use the text and for bytes that sniff as binary;
+- chunking straight from the bytes (chunk_bytes()), without splitting or
+  re-encoding lines, and only a short prefix split for the excerpt;
+- risk patterns searched over the shared text, flag-free ones merged into
+  one alternation per flag.
+
+The SHA-256 is taken by the scanner from the same buffer as it is read.
+Output is identical to chunk_text(), detect_risk_flags() and the excerpt
+rules below applied separately to the view's text.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from zip_meta_map.chunker import ChunkInfo, StreamChunker, chunk_bytes, is_chunkable
+from zip_meta_map.safety import needs_text, risk_flags_for
+from zip_meta_map.textview import TextView, has_nul
+
+# Max lines to use for an excerpt
+EXCERPT_MAX_LINES = 8
+EXCERPT_MAX_BYTES = 1024
+
+# An excerpt depends only on this much leading text: past it, the first
+# EXCERPT_MAX_LINES lines are already longer than EXCERPT_MAX_BYTES characters
+# (line breaks are at most two characters), so truncation decides the result.
+_EXCERPT_SCAN_CHARS = 4 * EXCERPT_MAX_BYTES
+
+
+def excerpt_from_text(text: str) -> str | None:
+    """The first EXCERPT_MAX_LINES lines, truncated at a line break to EXCERPT_MAX_BYTES."""
+    lines = text[:_EXCERPT_SCAN_CHARS].splitlines()
+    if not lines:
+        return None
+
+    excerpt = "\n".join(lines[:EXCERPT_MAX_LINES])
+
+    # Truncate if too long
+    if len(excerpt.encode("utf-8")) > EXCERPT_MAX_BYTES:
+        excerpt = excerpt[:EXCERPT_MAX_BYTES]
+        # Don't cut in the middle of a line
+        last_nl = excerpt.rfind("\n")
+        if last_nl > 0:
+            excerpt = excerpt[:last_nl]
+
+    return excerpt if excerpt.strip() else None
+
+
+@dataclass
+class ContentAnalysis:
+    """Everything the index derives from one file's bytes."""
+
+    looks_binary: bool
+    # Strict UTF-8 decode; None if binary, not UTF-8 or not needed
+    text: str | None
+    chunks: list[ChunkInfo] = field(default_factory=list)
+    excerpt: str | None = None
+    risk_flags: list[str] = field(default_factory=list)
+
+    def fields(self) -> dict:
+        """The index entry fields, in entry order, omitting empty ones."""
+        out: dict = {}
+        if self.chunks:
+            out["chunks"] = [c.to_dict() for c in self.chunks]
+        if self.excerpt:
+            out["excerpt"] = self.excerpt
+        if self.risk_flags:
+            out["risk_flags"] = self.risk_flags
+        return out
+
+
+def analyze_content(
+    path: str, content: bytes | None, size_bytes: int, wants_excerpt: bool, chunk_strategy: str = "auto"
+) -> ContentAnalysis:
+    """Analyze a file's bytes once for chunks, excerpt and risk flags.
+
+    content is None for files that were not read (over the content cap, or
+    hash-only); only path-based risk flags apply then. chunk_strategy is
+    passed to chunk_bytes().
+    """
+    if content is None:
+        return ContentAnalysis(looks_binary=False, text=None, risk_flags=risk_flags_for(path, False, None))
+
+    view = TextView(content)
+    chunkable = is_chunkable(path, size_bytes)
+    text = view.text if chunkable or wants_excerpt or needs_text(path) else None
+
+    result = ContentAnalysis(looks_binary=has_nul(content), text=text)
+    if text is not None:
+        if chunkable:
+            result.chunks = chunk_bytes(content, chunk_strategy)
+        if wants_excerpt:
+            result.excerpt = excerpt_from_text(text)
+    result.risk_flags = risk_flags_for(path, result.looks_binary, text)
+    return result
+
+
+def analyze_stream(
+    path: str, blocks: Iterable[bytes], size_bytes: int, chunk_strategy: str = "auto"
+) -> ContentAnalysis:
+    """Chunks and risk flags for a file read block by block instead of held whole.
+
+    Chunks come from a StreamChunker and are kept only if the whole stream
+    turned out to be UTF-8 text. As for other files over the content cap,
+    there is no excerpt, and content-based risk flags (which would need the
+    whole text) do not apply: only path-based flags and binary_masquerade.
+    """
+    if not is_chunkable(path, size_bytes):
+        # Only binary_masquerade looks at the bytes, and only at the first block
+        binary = has_nul(next(iter(blocks), b""))
+        return ContentAnalysis(looks_binary=binary, text=None, risk_flags=risk_flags_for(path, binary, None))
+
+    chunker = StreamChunker(chunk_strategy)
+    chunks: list[ChunkInfo] = []
+    for block in blocks:
+        chunks += chunker.feed(block)
+        if not chunker.ok:
+            break
+    chunks += chunker.finish()
+    result = ContentAnalysis(looks_binary=chunker.looks_binary, text=None, chunks=chunks if chunker.ok else [])
+    result.risk_flags = risk_flags_for(path, result.looks_binary, None)
+    return result
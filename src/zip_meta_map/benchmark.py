@@ -12,9 +12,9 @@ import sys
 import time
 from pathlib import Path
 
-from zip_meta_map.builder import build, build_front, build_index, detect_profile, validate_index
-from zip_meta_map.roles import assign_role
-from zip_meta_map.scanner import scan_directory, scan_directory_incremental
+from zip_meta_map.builder import build, build_front, build_index, detect_profile_from_paths, validate_index
+from zip_meta_map.roles import RoleStats, assign_roles, format_role_stats
+from zip_meta_map.scanner import filter_paths, list_directory, scan_directory_incremental, scan_paths
 
 
 def _fmt_time(seconds: float) -> str:
@@ -50,9 +50,9 @@ def benchmark(input_path: Path, runs: int = 3, use_cache: bool = False) -> dict:
     files = []
     for _ in range(runs):
         t0 = time.perf_counter()
-        preliminary = scan_directory(input_path, [".git/**"])
-        profile = detect_profile(preliminary)
-        files = scan_directory(input_path, profile.ignore_globs, retain_content=True)
+        listing = list_directory(input_path, [".git/**"])
+        profile = detect_profile_from_paths(listing)
+        files = scan_paths(input_path, filter_paths(listing, profile.ignore_globs), retain_content=True)
         scan_times.append(time.perf_counter() - t0)
 
     results["file_count"] = len(files)
@@ -83,10 +83,10 @@ def benchmark(input_path: Path, runs: int = 3, use_cache: bool = False) -> dict:
 
     # Phase 2: Role assignment
     role_times: list[float] = []
+    paths = [f.path for f in files]
     for _ in range(runs):
         t0 = time.perf_counter()
-        for f in files:
-            assign_role(f.path, profile)
+        assign_roles(paths, profile)
         role_times.append(time.perf_counter() - t0)
 
     results["phases"]["roles"] = {
@@ -96,6 +96,11 @@ def benchmark(input_path: Path, runs: int = 3, use_cache: bool = False) -> dict:
         "per_file_us": (sum(role_times) / len(role_times)) / max(len(files), 1) * 1_000_000,
     }
 
+    # Phase 2b: Per-tier role counters (one instrumented pass, not part of the timings)
+    role_stats = RoleStats()
+    assign_roles(paths, profile, role_stats)
+    results["role_tiers"] = role_stats.to_dict()
+
     # Phase 3: Index build
     build_times: list[float] = []
     index = {}
@@ -185,6 +190,10 @@ def format_results(results: dict) -> str:
             fps = results["file_count"] / avg_e2e
             lines.append(f"End-to-end throughput:     {fps:.0f} files/sec")
 
+    if "role_tiers" in results:
+        lines.append("")
+        lines.extend(format_role_stats(results["role_tiers"]))
+
     return "\n".join(lines)
 
 
@@ -2,24 +2,49 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+from collections.abc import Callable, Iterable, Iterator
 from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
 
 import jsonschema
 
 from zip_meta_map import __version__
-from zip_meta_map.chunker import chunk_text, is_chunkable
+from zip_meta_map.analyzer import analyze_content, analyze_stream
+from zip_meta_map.cache import HashCache, open_hash_cache
+from zip_meta_map.chunker import CHUNK_THRESHOLD_BYTES, is_chunkable
+from zip_meta_map.detect import Detection, detect_directory, detect_paths
+from zip_meta_map.gitindex import read_git_index
 from zip_meta_map.modules import build_modules
-from zip_meta_map.profiles import ALL_PROFILES, DEFAULT_PROFILE, Profile
-from zip_meta_map.roles import RoleAssignment, assign_role
-from zip_meta_map.safety import detect_risk_flags, detect_warnings
-from zip_meta_map.scanner import ScannedFile, scan_directory, scan_zip
+from zip_meta_map.profiles import ALL_PROFILES, Profile
+from zip_meta_map.roles import RoleAssignment, RoleStats, assign_role, assign_roles
+from zip_meta_map.safety import detect_warnings
+from zip_meta_map.scanner import (
+    CONTENT_FULL,
+    DEFAULT_MAX_CONTENT_BYTES,
+    Analyzer,
+    ContentPlan,
+    ScannedFile,
+    StreamAnalyzer,
+    default_workers,
+    filter_paths,
+    list_directory,
+    list_zip,
+    scan_paths,
+    scan_paths_cached,
+    scan_zip_cached,
+    scan_zip_metadata,
+    scan_zip_parallel,
+)
 from zip_meta_map.schema import load_index_schema, load_policy_schema
 
-# Max lines to use for an excerpt
-_EXCERPT_MAX_LINES = 8
-_EXCERPT_MAX_BYTES = 1024
+# Content work per role unless a policy's role_content says otherwise. Every
+# role is analyzed by default: hash-only files get no content-based risk flags
+# (secrets_like, exec_shell, network_io), so dropping them is the policy's call.
+DEFAULT_ROLE_CONTENT: dict[str, str] = {}
 
 # Roles considered high-value for start_here ranking (order = priority)
 _START_HERE_ROLE_PRIORITY: dict[str, int] = {
@@ -45,31 +70,30 @@ def detect_profile(files: list[ScannedFile]) -> Profile:
     Detection order: monorepo first (most specific workspace markers),
     then language-specific profiles by specificity.
     """
-    paths = {f.path for f in files}
-    names = {f.path.rsplit("/", 1)[-1] if "/" in f.path else f.path for f in files}
+    return detect_profile_from_paths(f.path for f in files)
 
-    # Check monorepo indicators first (highest priority)
-    monorepo = ALL_PROFILES["monorepo"]
-    for detect_file in monorepo.detect_files:
-        if detect_file in paths:
-            return monorepo
 
-    # Detection order: Rust > Go > .NET > Java > Node/TS > Python
-    # (more specific markers first)
-    detection_order = ["rust_cli", "go_cli", "dotnet_cli", "java_cli", "node_ts_tool", "python_cli"]
-    for profile_name in detection_order:
-        profile = ALL_PROFILES[profile_name]
-        for detect_file in profile.detect_files:
-            # Support glob-style detect files (e.g., "*.csproj")
-            if "*" in detect_file:
-                from fnmatch import fnmatch
+def detect_profile_from_paths(rel_paths: Iterable[str]) -> Profile:
+    """Auto-detect a profile from relative paths alone (no file content needed)."""
+    return detect_paths(rel_paths).profile
 
-                if any(fnmatch(n, detect_file) for n in names):
-                    return profile
-            elif detect_file in paths:
-                return profile
 
-    return DEFAULT_PROFILE
+def detect_input(input_path: Path, git_index: bool = False, gitignore: bool = False) -> Detection:
+    """Detect the profile build() would pick for a directory or ZIP, with its markers and scores.
+
+    Directories are walked breadth-first to DETECT_MAX_DEPTH levels, or read
+    from the git index when git_index is set and there is one.
+    """
+    if input_path.is_dir():
+        tracked = read_git_index(input_path) if git_index else None
+        return _detect_directory(input_path, tracked.paths() if tracked is not None else None, gitignore)
+    return detect_paths(list_zip(input_path, [".git/**"]))
+
+
+def _detect_directory(input_path: Path, listing: list[str] | None, gitignore: bool) -> Detection:
+    if listing is not None:
+        return detect_paths(listing)
+    return detect_directory(input_path, gitignore)
 
 
 def _rank_start_here(path: str, assignment: RoleAssignment, profile: Profile) -> tuple[int, str]:
@@ -128,6 +152,39 @@ def _find_start_here(
     return [path for _, path in candidates]
 
 
+def _wants_excerpt(path: str, assignment: RoleAssignment, profile: Profile) -> bool:
+    """True for start_here files and high-value roles.
+
+    Same answer as membership in _find_start_here()'s result for a file that
+    exists, but needs only the path.
+    """
+    if assignment.role in ("entrypoint", "doc", "doc_architecture"):
+        return True
+    name = path.rsplit("/", 1)[-1] if "/" in path else path
+    return name in _START_HERE_NAMES or path in profile.start_here_extras
+
+
+def _entry_signature(path: str, profile: Profile) -> tuple:
+    """Everything path-derived in a file's index entry, except the path itself.
+
+    Two paths with equal signatures give equal entries for the same bytes,
+    so a renamed file can keep its cached entry.
+    """
+    a = assign_role(path, profile)
+    name = path.rsplit("/", 1)[-1] if "/" in path else path
+    dot = name.rfind(".")
+    ext = name[dot:].lower() if dot >= 0 else ""
+    return (
+        a.role,
+        round(a.confidence, 2),
+        a.reason,
+        _wants_excerpt(path, a, profile),
+        is_chunkable(path, CHUNK_THRESHOLD_BYTES),
+        ext,
+        ".." in path.split("/"),
+    )
+
+
 def load_policy(policy_path: Path) -> dict:
     """Load and validate a META_ZIP_POLICY.json file."""
     data = json.loads(policy_path.read_text(encoding="utf-8"))
@@ -148,6 +205,16 @@ def _apply_policy_to_ignores(profile_ignores: list[str], policy: dict) -> list[s
     return combined
 
 
+def _role_content(policy: dict | None) -> dict[str, str]:
+    """Content level per role: DEFAULT_ROLE_CONTENT overlaid with the policy's role_content."""
+    return {**DEFAULT_ROLE_CONTENT, **(policy or {}).get("role_content", {})}
+
+
+def _chunk_strategy(policy: dict | None) -> str:
+    """The policy's chunking strategy: "auto" (the default) or "content"."""
+    return (policy or {}).get("chunking", "auto")
+
+
 def _apply_policy_to_plans(plans: dict, policy: dict) -> dict:
     """Apply policy budget overrides to plan dicts."""
     budgets = policy.get("plan_budgets", {})
@@ -162,36 +229,33 @@ def _apply_policy_to_plans(plans: dict, policy: dict) -> dict:
     return updated
 
 
-def _extract_excerpt(content: bytes | None, path: str) -> str | None:
-    """Extract a safe excerpt from file content.
+# Bumped whenever the entry fields derived from a file change shape (e.g.
+# chunks gaining start_byte/end_byte), so cached entries are rebuilt
+_ENTRY_FORMAT = 2
 
-    Returns the first N lines of text, truncated to _EXCERPT_MAX_BYTES.
-    Only works on text files that can be decoded as UTF-8.
-    """
-    if content is None:
-        return None
 
-    try:
-        text = content.decode("utf-8", errors="strict")
-    except UnicodeDecodeError:
-        return None
+def _analysis_key(profile: Profile, policy: dict | None, max_content_bytes: int | None) -> str:
+    """Fingerprint everything besides a file's own path and bytes that shapes its index entry.
 
-    lines = text.splitlines()
-    if not lines:
-        return None
+    Cached entries are only reused under the same key: same tool version,
+    entry format, profile, policy and content cap.
+    """
+    blob = json.dumps([__version__, _ENTRY_FORMAT, profile.name, policy, max_content_bytes], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
 
-    excerpt_lines = lines[:_EXCERPT_MAX_LINES]
-    excerpt = "\n".join(excerpt_lines)
 
-    # Truncate if too long
-    if len(excerpt.encode("utf-8")) > _EXCERPT_MAX_BYTES:
-        excerpt = excerpt[:_EXCERPT_MAX_BYTES]
-        # Don't cut in the middle of a line
-        last_nl = excerpt.rfind("\n")
-        if last_nl > 0:
-            excerpt = excerpt[:last_nl]
+def _content_fields(f: ScannedFile, assignment: RoleAssignment, profile: Profile, chunk_strategy: str = "auto") -> dict:
+    """The entry fields derived from a file's bytes: chunks, excerpt and risk flags.
 
-    return excerpt if excerpt.strip() else None
+    One analyze_content() pass over the bytes, loaded through the file's
+    source if they are not retained and released afterwards.
+    """
+    try:
+        wants_excerpt = _wants_excerpt(f.path, assignment, profile)
+        analysis = analyze_content(f.path, f.load_content(), f.size_bytes, wants_excerpt, chunk_strategy)
+    finally:
+        f.release_content()
+    return analysis.fields()
 
 
 def build_index(
@@ -199,51 +263,60 @@ def build_index(
     profile: Profile,
     project_name: str,
     policy: dict | None = None,
+    metadata_only: bool = False,
+    role_stats: RoleStats | None = None,
+    roles: dict[str, RoleAssignment] | None = None,
 ) -> dict:
-    """Build the META_ZIP_INDEX.json content."""
+    """Build the META_ZIP_INDEX.json content.
+
+    With metadata_only, files come from a ZIP central directory: entries carry
+    crc32 instead of sha256 and have no content-derived fields. Files with a
+    cached_entry reuse it as-is; an entry depends only on the file's path and
+    bytes once the profile and policy are fixed. Content-derived fields come
+    from ScannedFile.analysis when the scan already computed them, else the
+    bytes are loaded one file at a time. roles holds assignments the scan
+    already made, by path; only files without one (or a cached entry) are
+    classified here. role_stats, if given, collects per-tier counters for
+    those.
+    """
     # Assign roles to all files
     assignments: dict[str, RoleAssignment] = {}
+    fresh: list[str] = []
     for f in files:
-        assignments[f.path] = assign_role(f.path, profile)
+        if f.cached_entry is not None:
+            e = f.cached_entry
+            assignments[f.path] = RoleAssignment(e["role"], e["confidence"], e.get("reason", ""))
+        elif roles is not None and f.path in roles:
+            assignments[f.path] = roles[f.path]
+        else:
+            fresh.append(f.path)
+    assignments.update(zip(fresh, assign_roles(fresh, profile, role_stats)))
 
-    # Determine start_here for excerpt generation
     start_here = _find_start_here(files, assignments, profile)
-    start_here_set = set(start_here)
 
+    chunk_strategy = _chunk_strategy(policy)
     file_entries = []
     for f in files:
+        if f.cached_entry is not None:
+            file_entries.append(dict(f.cached_entry))
+            continue
+
         a = assignments[f.path]
-        entry: dict = {
-            "path": f.path,
-            "size_bytes": f.size_bytes,
-            "sha256": f.sha256,
-            "role": a.role,
-            "confidence": round(a.confidence, 2),
-        }
+        entry: dict = {"path": f.path, "size_bytes": f.size_bytes}
+        if f.sha256 is not None:
+            entry["sha256"] = f.sha256
+        if f.crc32 is not None:
+            entry["crc32"] = f.crc32
+        if f.compression is not None:
+            entry["compression"] = f.compression
+        entry["role"] = a.role
+        entry["confidence"] = round(a.confidence, 2)
         if a.reason:
             entry["reason"] = a.reason
+        if f.content_work != CONTENT_FULL:
+            entry["content"] = f.content_work
 
-        # Chunk large text files
-        if is_chunkable(f.path, f.size_bytes) and f.content is not None:
-            try:
-                text = f.content.decode("utf-8", errors="strict")
-                chunks = chunk_text(text)
-                if chunks:
-                    entry["chunks"] = [c.to_dict() for c in chunks]
-            except UnicodeDecodeError:
-                pass
-
-        # Excerpt for start_here files and high-value files
-        if f.path in start_here_set or a.role in ("entrypoint", "doc", "doc_architecture"):
-            excerpt = _extract_excerpt(f.content, f.path)
-            if excerpt:
-                entry["excerpt"] = excerpt
-
-        # Risk flags
-        risk_flags = detect_risk_flags(f.path, f.content, f.size_bytes)
-        if risk_flags:
-            entry["risk_flags"] = risk_flags
-
+        entry.update(f.analysis if f.analysis is not None else _content_fields(f, a, profile, chunk_strategy))
         file_entries.append(entry)
 
     plans = {name: plan.to_dict() for name, plan in profile.plans.items()}
@@ -278,10 +351,21 @@ def build_index(
     if policy is not None:
         index["policy_applied"] = True
 
+    if metadata_only:
+        index["metadata_only"] = True
+
     # Capabilities: advertise which optional features are populated
     caps: list[str] = []
+    if any(f.get("crc32") for f in file_entries):
+        caps.append("crc32")
+    if any(f.get("content") for f in file_entries):
+        caps.append("content_policy")
     if any(f.get("chunks") for f in file_entries):
         caps.append("chunks")
+    if any("start_byte" in c for f in file_entries for c in f.get("chunks", ())):
+        caps.append("chunk_offsets")
+    if chunk_strategy == "content" and "chunks" in caps:
+        caps.append("content_chunk_ids")
     if any(f.get("excerpt") for f in file_entries):
         caps.append("excerpts")
     if modules:
@@ -438,6 +522,14 @@ def build(
     output_dir: Path | None = None,
     profile_name: str | None = None,
     policy_path: Path | None = None,
+    max_workers: int | None = None,
+    cache_path: Path | None = None,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    metadata_only: bool = False,
+    git_index: bool = False,
+    gitignore: bool = False,
+    role_stats: RoleStats | None = None,
+    on_detect: Callable[[Detection], None] | None = None,
 ) -> tuple[str, dict]:
     """
     Main build entry point.
@@ -447,49 +539,247 @@ def build(
         output_dir: If set, write output files here. Otherwise just return them.
         profile_name: Force a specific profile. Auto-detect if None.
         policy_path: Optional path to a META_ZIP_POLICY.json file.
+        max_workers: Threads for reading/inflating and hashing (1 = sequential).
+            Chosen from the file count if None.
+        cache_path: Cache file for incremental builds (.json, or SQLite for
+            other suffixes). Unchanged files reuse their cached hash, and their
+            cached index entry when the tool version, profile, policy and
+            content cap match. Directories compare size, ns mtime/ctime, inode
+            and device, and find renamed files by inode. ZIPs compare the
+            CRC32 and sizes from the central directory.
+        max_content_bytes: Files larger than this are hashed by streaming and get
+            no chunks, excerpt or content-based risk flags. None = no cap.
+        metadata_only: ZIP inputs only. Index the central directory without
+            decompressing anything (CRC32 instead of SHA-256, no content fields).
+        git_index: Directory inputs only. If the directory is a git work tree
+            root, list tracked files from .git/index instead of walking, and
+            with a cache, reuse hashes by blob ID for files git considers
+            clean. Falls back to the walk if the index can't be read.
+        gitignore: Directory inputs only. Also skip paths ignored by the
+            tree's .gitignore files (and .git/info/exclude) while walking.
+            Has no effect on files listed from the git index, which are
+            tracked and so never ignored.
+        role_stats: If set, filled with per-tier hit counts and timings for
+            role classification (see RoleStats). Every listed file is
+            classified once, before the scan, including files that then
+            reuse a cached entry.
+        on_detect: Called with the Detection that picked the profile, so
+            callers can explain it without detecting again. Not called
+            when profile_name is given.
 
     Returns:
         Tuple of (front_md, index_dict).
     """
     input_path = input_path.resolve()
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got: {max_workers}")
+    if max_content_bytes is not None and max_content_bytes < 0:
+        raise ValueError(f"max_content_bytes must be at least 0, got: {max_content_bytes}")
 
     # Load policy if provided
     policy = None
     if policy_path:
         policy = load_policy(policy_path.resolve())
 
+    cache = open_hash_cache(cache_path) if cache_path is not None and not metadata_only else None
+    try:
+        files, profile, project_name, roles = _scan_input(
+            input_path,
+            profile_name,
+            policy,
+            cache,
+            max_workers,
+            max_content_bytes,
+            metadata_only,
+            git_index,
+            gitignore,
+            role_stats,
+            on_detect,
+        )
+        index = build_index(
+            files,
+            profile,
+            project_name,
+            policy=policy,
+            metadata_only=metadata_only,
+            role_stats=role_stats,
+            roles=roles,
+        )
+        validate_index(index)
+        if cache is not None:
+            key = _analysis_key(profile, policy, max_content_bytes)
+            cache.save(
+                {
+                    f.path: {"sha256": f.sha256, **(f.stamp or {}), "analysis": key, "entry": entry}
+                    for f, entry in zip(files, index["files"])
+                }
+            )
+    finally:
+        if cache is not None:
+            cache.close()
+
+    front = build_front(index, project_name)
+
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / "META_ZIP_FRONT.md").write_text(front, encoding="utf-8")
+        (output_dir / "META_ZIP_INDEX.json").write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+
+    return front, index
+
+
+def _scan_hooks(
+    profile: Profile, policy: dict | None, roles: dict[str, RoleAssignment]
+) -> tuple[ContentPlan, Analyzer, StreamAnalyzer]:
+    """Role-first scan hooks: (plan, analyze, stream).
+
+    Each path's role is assigned once, from the path alone, before the file
+    is touched: roles holds the listing's assignments from one
+    assign_roles() batch, and build_index() reuses them. plan() maps the role to its content level (_role_content()),
+    so hash-only and skipped files are never read whole. analyze() computes
+    content-derived entry fields on the worker that just hashed the file,
+    after which its bytes are released, so a build holds at most one file's
+    content per scan worker. stream() does the same for files over the
+    content cap from their blocks as they are hashed (analyze_stream()).
+    """
+    levels = _role_content(policy)
+    chunk_strategy = _chunk_strategy(policy)
+
+    @lru_cache(maxsize=None)
+    def role_of(path: str) -> RoleAssignment:
+        return roles.get(path) or assign_role(path, profile)
+
+    def plan(path: str) -> str:
+        return levels.get(role_of(path).role, CONTENT_FULL)
+
+    def analyze(f: ScannedFile) -> dict:
+        return _content_fields(f, role_of(f.path), profile, chunk_strategy)
+
+    def stream(path: str, size_bytes: int, blocks: Iterator[bytes]) -> dict:
+        return analyze_stream(path, blocks, size_bytes, chunk_strategy).fields()
+
+    return plan, analyze, stream
+
+
+def _scan_input(
+    input_path: Path,
+    profile_name: str | None,
+    policy: dict | None,
+    cache: HashCache | None,
+    max_workers: int | None,
+    max_content_bytes: int | None,
+    metadata_only: bool,
+    git_index: bool,
+    gitignore: bool,
+    role_stats: RoleStats | None = None,
+    on_detect: Callable[[Detection], None] | None = None,
+) -> tuple[list[ScannedFile], Profile, str, dict[str, RoleAssignment]]:
+    """Choose the profile and scan a directory or ZIP.
+
+    Returns (files, profile, project_name, roles), where roles are the
+    assignments made for the listing before the scan.
+    """
+    # Detection only needs paths: list first (no reads), then make a single
+    # content pass over the listing filtered by the chosen profile's ignores.
     if input_path.is_dir():
+        if metadata_only:
+            raise ValueError(f"metadata_only requires a .zip input, got directory: {input_path}")
         project_name = input_path.name
+        tracked = read_git_index(input_path) if git_index else None
+        listing = tracked.paths() if tracked is not None else None
         if profile_name:
             profile = ALL_PROFILES[profile_name]
         else:
-            preliminary = scan_directory(input_path, [".git/**"])
-            profile = detect_profile(preliminary)
+            detection = _detect_directory(input_path, listing, gitignore)
+            profile = detection.profile
+            if on_detect is not None:
+                on_detect(detection)
         ignore_globs = profile.ignore_globs
         if policy:
             ignore_globs = _apply_policy_to_ignores(ignore_globs, policy)
-        files = scan_directory(input_path, ignore_globs, retain_content=True)
+        stats: dict[str, os.stat_result] = {}
+        if listing is None:
+            listing = list_directory(input_path, ignore_globs, gitignore, stats)
+        else:
+            listing = filter_paths(listing, ignore_globs)
+        if tracked is not None:
+            # Tracked files deleted from the work tree (or symlinks to directories)
+            listing = [p for p in listing if os.path.isfile(input_path / p)]
+        workers = max_workers if max_workers is not None else default_workers(len(listing))
+        roles = dict(zip(listing, assign_roles(listing, profile, role_stats)))
+        plan, analyze, stream = _scan_hooks(profile, policy, roles)
+        if cache is not None:
+            files = scan_paths_cached(
+                input_path,
+                listing,
+                cache,
+                max_workers=workers,
+                max_content_bytes=max_content_bytes,
+                analysis_key=_analysis_key(profile, policy, max_content_bytes),
+                rename_keeps_entry=lambda old, new: _entry_signature(old, profile) == _entry_signature(new, profile),
+                clean_blob=tracked.clean_blob if tracked is not None else None,
+                analyze=analyze,
+                plan=plan,
+                stream=stream,
+                stats=stats,
+            )
+        else:
+            files = scan_paths(
+                input_path,
+                listing,
+                max_workers=workers,
+                max_content_bytes=max_content_bytes,
+                analyze=analyze,
+                plan=plan,
+                stream=stream,
+                stats=stats,
+            )
     elif input_path.suffix == ".zip":
+        if git_index:
+            raise ValueError(f"git_index requires a directory input, got: {input_path}")
+        if gitignore:
+            raise ValueError(f"gitignore requires a directory input, got: {input_path}")
         project_name = input_path.stem
+        names = None
         if profile_name:
             profile = ALL_PROFILES[profile_name]
         else:
-            preliminary = scan_zip(input_path, [".git/**"])
-            profile = detect_profile(preliminary)
+            names = list_zip(input_path, [".git/**"])
+            detection = detect_paths(names)
+            profile = detection.profile
+            if on_detect is not None:
+                on_detect(detection)
         ignore_globs = profile.ignore_globs
         if policy:
             ignore_globs = _apply_policy_to_ignores(ignore_globs, policy)
-        files = scan_zip(input_path, ignore_globs, retain_content=True)
+        listing = filter_paths(names, ignore_globs) if names is not None else list_zip(input_path, ignore_globs)
+        roles = dict(zip(listing, assign_roles(listing, profile, role_stats)))
+        plan, analyze, stream = _scan_hooks(profile, policy, roles)
+        if metadata_only:
+            files = scan_zip_metadata(input_path, ignore_globs)
+        elif cache is not None:
+            files = scan_zip_cached(
+                input_path,
+                ignore_globs,
+                cache,
+                max_workers=max_workers,
+                max_content_bytes=max_content_bytes,
+                analysis_key=_analysis_key(profile, policy, max_content_bytes),
+                analyze=analyze,
+                plan=plan,
+                stream=stream,
+            )
+        else:
+            files = scan_zip_parallel(
+                input_path,
+                ignore_globs,
+                max_workers=max_workers,
+                max_content_bytes=max_content_bytes,
+                analyze=analyze,
+                plan=plan,
+                stream=stream,
+            )
     else:
         raise ValueError(f"Input must be a directory or .zip file, got: {input_path}")
 
-    index = build_index(files, profile, project_name, policy=policy)
-    validate_index(index)
-    front = build_front(index, project_name)
-
-    if output_dir:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        (output_dir / "META_ZIP_FRONT.md").write_text(front, encoding="utf-8")
-        (output_dir / "META_ZIP_INDEX.json").write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
-
-    return front, index
+    return files, profile, project_name, roles
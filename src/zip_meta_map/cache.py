@@ -0,0 +1,232 @@
+"""Hash/analysis cache backends for incremental scanning.
+
+A cache maps relative paths to records: {sha256, **stamp} plus, for caches
+written by build(), the file's index entry and the analysis key it was made
+under. Directory records carry st_dev/st_ino, so a renamed file can be found
+by inode, and files scanned with a git index carry their blob ID. Two
+backends share one interface (get / find_inode / find_blob / save / close):
+
+- JsonHashCache: one JSON document, loaded whole and rewritten on save.
+- SqliteHashCache: a stdlib sqlite3 database in WAL mode. Records are looked
+  up by path on demand and save() only upserts rows that changed.
+
+open_hash_cache() picks the backend from the file suffix: ".json" keeps the
+JSON format, anything else (".sqlite", ".db", ...) uses SQLite. The SQLite
+backend only replaces or drops what it can tell is a cache of its own (an
+old JSON cache, or a database holding just the files table); any other
+existing file raises ValueError and is left untouched.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Protocol
+
+_CACHE_VERSION = 3
+
+
+class HashCache(Protocol):
+    def get(self, path: str) -> dict | None: ...
+
+    def find_inode(self, dev: int, ino: int) -> tuple[str, dict] | None: ...
+
+    def find_blob(self, blob: str) -> tuple[str, dict] | None: ...
+
+    def save(self, records: dict[str, dict]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+# ── JSON backend ──
+
+
+def load_hash_cache(cache_path: Path) -> dict[str, dict]:
+    """Load cached file records from a JSON cache.
+
+    Returns {path: {sha256, **stamp}}; records written by build() also carry
+    the file's index entry and the analysis key it was made under.
+    """
+    if not cache_path.exists():
+        return {}
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+        if data.get("version") != _CACHE_VERSION:
+            return {}
+        return data.get("entries", {})
+    except (json.JSONDecodeError, KeyError):
+        return {}
+
+
+def save_hash_cache(cache_path: Path, entries: dict[str, dict]) -> None:
+    """Save file hash cache as JSON."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": _CACHE_VERSION, "entries": entries}
+    cache_path.write_text(json.dumps(data), encoding="utf-8")
+
+
+class JsonHashCache:
+    """The original single-document cache: loaded whole, rewritten on save."""
+
+    def __init__(self, cache_path: Path) -> None:
+        self.path = cache_path
+        self._index(load_hash_cache(cache_path))
+
+    def _index(self, records: dict[str, dict]) -> None:
+        self._records = records
+        self._by_inode = {(r["dev"], r["ino"]): (p, r) for p, r in records.items() if "ino" in r}
+        self._by_blob = {r["blob"]: (p, r) for p, r in records.items() if "blob" in r}
+
+    def get(self, path: str) -> dict | None:
+        return self._records.get(path)
+
+    def find_inode(self, dev: int, ino: int) -> tuple[str, dict] | None:
+        return self._by_inode.get((dev, ino))
+
+    def find_blob(self, blob: str) -> tuple[str, dict] | None:
+        return self._by_blob.get(blob)
+
+    def save(self, records: dict[str, dict]) -> None:
+        save_hash_cache(self.path, records)
+        self._index(records)
+
+    def close(self) -> None:
+        pass
+
+
+# ── SQLite backend ──
+
+_UPSERT = (
+    "INSERT INTO files (path, inode, blob, record) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(path) DO UPDATE SET inode = excluded.inode, blob = excluded.blob, record = excluded.record"
+)
+
+
+def _inode_key(record: dict) -> str | None:
+    return f"{record['dev']}:{record['ino']}" if "ino" in record else None
+
+
+def _is_json_cache(cache_path: Path) -> bool:
+    """True if cache_path holds a JSON cache document (any version)."""
+    try:
+        with cache_path.open("rb") as fh:
+            if fh.read(1) != b"{":
+                return False
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return isinstance(data, dict) and "version" in data and "entries" in data
+
+
+def _is_own_database(conn: sqlite3.Connection) -> bool:
+    """True if the database is empty or holds only a cache files table (from any cache version)."""
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not tables:
+        return True
+    if tables != {"files"}:
+        return False
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    return {"path", "record"} <= columns
+
+
+class SqliteHashCache:
+    """Cache rows in SQLite, one JSON record per path.
+
+    Lookups are by primary key (or by the indexed "dev:ino" and blob columns),
+    so a run only loads the records it asks for.
+    save() only writes rows whose record changed: it compares against what
+    get() returned, and reads the stored rows of paths get() never saw
+    (skipped files) in one query. Paths no longer present are deleted
+    against a temp table of the current paths, without reading the whole
+    table. Safe to call get() from scanner worker threads.
+    """
+
+    def __init__(self, cache_path: Path) -> None:
+        self.path = cache_path
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Serialized record text as last read or written, to skip unchanged rows on save
+        self._seen: dict[str, str] = {}
+        if _is_json_cache(cache_path):
+            # An old JSON cache under this name: start over
+            cache_path.unlink()
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"{cache_path} exists and is not a zip-meta-map cache; choose another cache path") from e
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            # Checked before anything is written, so a foreign database is left as it was
+            if not _is_own_database(conn):
+                raise sqlite3.DatabaseError("database has tables that are not a cache's")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != _CACHE_VERSION:
+                conn.execute("DROP TABLE IF EXISTS files")
+                conn.execute(f"PRAGMA user_version = {_CACHE_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, inode TEXT, blob TEXT, record TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS files_inode ON files (inode)")
+            conn.execute("CREATE INDEX IF NOT EXISTS files_blob ON files (blob)")
+            conn.commit()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def get(self, path: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM files WHERE path = ?", (path,)).fetchone()
+            if row is None:
+                return None
+            self._seen[path] = row[0]
+        return json.loads(row[0])
+
+    def find_inode(self, dev: int, ino: int) -> tuple[str, dict] | None:
+        return self._find("inode", f"{dev}:{ino}")
+
+    def find_blob(self, blob: str) -> tuple[str, dict] | None:
+        return self._find("blob", blob)
+
+    def _find(self, column: str, value: str) -> tuple[str, dict] | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT path, record FROM files WHERE {column} = ? LIMIT 1", (value,)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def save(self, records: dict[str, dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS current (path TEXT PRIMARY KEY, unseen INTEGER)")
+            self._conn.execute("DELETE FROM current")
+            self._conn.executemany(
+                "INSERT INTO current (path, unseen) VALUES (?, ?)", ((p, p not in self._seen) for p in records)
+            )
+            self._conn.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM current)")
+            self._seen.update(
+                self._conn.execute(
+                    "SELECT files.path, files.record FROM current JOIN files ON files.path = current.path "
+                    "WHERE current.unseen"
+                )
+            )
+            changed = []
+            for path, record in records.items():
+                text = json.dumps(record)
+                if self._seen.get(path) != text:
+                    changed.append((path, _inode_key(record), record.get("blob"), text))
+                    self._seen[path] = text
+            self._conn.executemany(_UPSERT, changed)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_hash_cache(cache_path: Path) -> JsonHashCache | SqliteHashCache:
+    """Open a cache file with the backend chosen by its suffix (".json" = JSON, else SQLite)."""
+    if cache_path.suffix == ".json":
+        return JsonHashCache(cache_path)
+    return SqliteHashCache(cache_path)
@@ -2,13 +2,29 @@
 
 from __future__ import annotations
 
+import codecs
 import hashlib
+import re
+import zlib
 from dataclasses import dataclass
 
+from zip_meta_map.textview import SNIFF_BYTES, has_nul, sniff_binary
+
 # Files above this size get chunked
 CHUNK_THRESHOLD_BYTES = 32 * 1024  # 32 KB
 CHUNK_TARGET_LINES = 100  # Target lines per chunk
 
+# Content-defined chunking: chunks end at a line break picked by a rolling
+# hash over the preceding lines, no earlier than CDC_MIN_BYTES into the chunk
+# and no later than the first line break at or past CDC_MAX_BYTES
+CDC_MIN_BYTES = 1024
+CDC_MAX_BYTES = 16 * 1024
+# A line ends a chunk when the hash's low bits are all zero: 1 in 64 lines,
+# decided by the last 6 lines alone (bit k of the gear hash sees k + 1 lines)
+_CDC_MASK = (1 << 6) - 1
+_CDC_HASH_MASK = 0xFFFFFFFF
+_CDC_SLAB_BYTES = 1 << 20
+
 # Text extensions that are safe to chunk
 _TEXT_EXTS = {
     ".py",
@@ -69,6 +85,13 @@ class ChunkInfo:
     end_line: int
     byte_len: int
     heading: str | None = None
+    # Offset of the chunk's first byte in the file (UTF-8 bytes of the chunked text)
+    start_byte: int = 0
+
+    @property
+    def end_byte(self) -> int:
+        """Offset just past the chunk's last byte."""
+        return self.start_byte + self.byte_len
 
     def to_dict(self) -> dict:
         d: dict = {
@@ -76,6 +99,8 @@ class ChunkInfo:
             "start_line": self.start_line,
             "end_line": self.end_line,
             "byte_len": self.byte_len,
+            "start_byte": self.start_byte,
+            "end_byte": self.end_byte,
         }
         if self.heading:
             d["heading"] = self.heading
@@ -84,9 +109,23 @@ class ChunkInfo:
 
 def _stable_chunk_id(text: str, start_line: int) -> str:
     """Generate a stable chunk ID from normalized text content."""
+    return f"chunk_{start_line}_{_text_hash(text)}"
+
+
+def _text_hash(text: str) -> str:
     normalized = text.strip()
-    h = hashlib.sha256(normalized.encode("utf-8", errors="replace")).hexdigest()[:12]
-    return f"chunk_{start_line}_{h}"
+    return hashlib.sha256(normalized.encode("utf-8", errors="replace")).hexdigest()[:12]
+
+
+def _content_chunk_id(h: str, seen: dict[str, int]) -> str:
+    """ID of a content-defined chunk: its hash, numbered if an identical chunk came earlier in the file."""
+    n = seen[h] = seen.get(h, 0) + 1
+    return f"chunk_{h}" if n == 1 else f"chunk_{h}_{n}"
+
+
+def _cdc_roll(h: int, line: bytes | memoryview) -> int:
+    """Gear hash step over one line's fingerprint."""
+    return ((h << 1) + zlib.crc32(line)) & _CDC_HASH_MASK
 
 
 def is_chunkable(path: str, size_bytes: int) -> bool:
@@ -106,9 +145,15 @@ def chunk_text(content: str, strategy: str = "auto") -> list[ChunkInfo]:
     Strategies:
       - "headings": split on markdown headings (for .md files)
       - "lines": split every CHUNK_TARGET_LINES lines
+      - "content": content-defined line ranges (see _chunk_by_content()),
+        with IDs that do not include the start line
       - "auto": use headings if markdown-like, else lines
     """
-    lines = content.splitlines(keepends=True)
+    return chunk_lines(content.splitlines(keepends=True), strategy)
+
+
+def chunk_lines(lines: list[str], strategy: str = "auto") -> list[ChunkInfo]:
+    """chunk_text() over text already split with splitlines(keepends=True)."""
     if not lines:
         return []
 
@@ -119,31 +164,32 @@ def chunk_text(content: str, strategy: str = "auto") -> list[ChunkInfo]:
 
     if strategy == "headings":
         return _chunk_by_headings(lines)
+    if strategy == "content":
+        return _chunk_by_content(lines)
     return _chunk_by_lines(lines)
 
 
+def _chunk(lines: list[str], start: int, end: int, start_byte: int, heading: str | None = None) -> ChunkInfo:
+    """ChunkInfo for lines[start:end] (0-based, end exclusive), which begin at start_byte."""
+    text = "".join(lines[start:end])
+    return ChunkInfo(
+        id=_stable_chunk_id(text, start + 1),
+        start_line=start + 1,
+        end_line=end,
+        byte_len=len(text.encode("utf-8", errors="replace")),
+        heading=heading,
+        start_byte=start_byte,
+    )
+
+
 def _chunk_by_lines(lines: list[str]) -> list[ChunkInfo]:
     """Split into fixed-size line chunks."""
-    chunks: list[ChunkInfo] = []
     total = len(lines)
-    start = 0
-
-    while start < total:
-        end = min(start + CHUNK_TARGET_LINES, total)
-        chunk_lines = lines[start:end]
-        chunk_text = "".join(chunk_lines)
-        chunk_id = _stable_chunk_id(chunk_text, start + 1)
-
-        chunks.append(
-            ChunkInfo(
-                id=chunk_id,
-                start_line=start + 1,
-                end_line=end,
-                byte_len=len(chunk_text.encode("utf-8", errors="replace")),
-            )
-        )
-        start = end
-
+    chunks: list[ChunkInfo] = []
+    offset = 0
+    for start in range(0, total, CHUNK_TARGET_LINES):
+        chunks.append(_chunk(lines, start, min(start + CHUNK_TARGET_LINES, total), offset))
+        offset = chunks[-1].end_byte
     return chunks
 
 
@@ -152,40 +198,484 @@ def _chunk_by_headings(lines: list[str]) -> list[ChunkInfo]:
     chunks: list[ChunkInfo] = []
     current_start = 0
     current_heading: str | None = None
+    offset = 0
 
     for i, line in enumerate(lines):
         stripped = line.lstrip()
         if stripped.startswith(_MD_HEADING_PREFIXES) and i > 0:
             # Emit previous chunk
-            chunk_lines = lines[current_start:i]
-            if chunk_lines:
-                chunk_text = "".join(chunk_lines)
-                chunk_id = _stable_chunk_id(chunk_text, current_start + 1)
-                chunks.append(
-                    ChunkInfo(
-                        id=chunk_id,
-                        start_line=current_start + 1,
-                        end_line=i,
-                        byte_len=len(chunk_text.encode("utf-8", errors="replace")),
-                        heading=current_heading,
-                    )
-                )
+            if current_start < i:
+                chunks.append(_chunk(lines, current_start, i, offset, current_heading))
+                offset = chunks[-1].end_byte
             current_start = i
             current_heading = stripped.rstrip()
 
     # Final chunk
     if current_start < len(lines):
-        chunk_lines = lines[current_start:]
-        chunk_text = "".join(chunk_lines)
-        chunk_id = _stable_chunk_id(chunk_text, current_start + 1)
-        chunks.append(
-            ChunkInfo(
-                id=chunk_id,
-                start_line=current_start + 1,
-                end_line=len(lines),
-                byte_len=len(chunk_text.encode("utf-8", errors="replace")),
-                heading=current_heading,
-            )
-        )
+        chunks.append(_chunk(lines, current_start, len(lines), offset, current_heading))
+
+    return chunks
+
+
+def _chunk_by_content(lines: list[str]) -> list[ChunkInfo]:
+    """Split where a rolling hash over the last few lines says so, within CDC_MIN_BYTES..CDC_MAX_BYTES.
+
+    Whether a line can end a chunk depends only on it and the five lines
+    before it, so after an edit the boundaries fall back into step at the
+    first hash-picked boundary past CDC_MIN_BYTES (unless a run of chunks
+    was cut at CDC_MAX_BYTES); later chunks, and their IDs, stay put.
+    """
+    chunks: list[ChunkInfo] = []
+    seen: dict[str, int] = {}
+    start = 0
+    offset = 0
+    size = 0
+    h = 0
+    for i, line in enumerate(lines):
+        data = line.encode("utf-8", errors="replace")
+        h = _cdc_roll(h, data)
+        size += len(data)
+        if size >= CDC_MAX_BYTES or (size >= CDC_MIN_BYTES and not h & _CDC_MASK) or i == len(lines) - 1:
+            text = "".join(lines[start : i + 1])
+            chunks.append(ChunkInfo(_content_chunk_id(_text_hash(text), seen), start + 1, i + 1, size, None, offset))
+            start = i + 1
+            offset += size
+            size = 0
+    return chunks
+
+
+# ── Byte-level chunking ──
+
+# Line breaks str.splitlines() honors besides "\n" and "\r\n", UTF-8 encoded
+_RARE_LINE_BREAKS = (b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+
+# Up to CHUNK_TARGET_LINES "\n"-terminated lines, or fewer plus a final unterminated one
+_LINE_BLOCK_RE = re.compile(rb"(?:[^\n]*\n){0,%d}(?:[^\n]*\n|[^\n]+\Z)" % (CHUNK_TARGET_LINES - 1))
+
+# What str.isspace() accepts, UTF-8 encoded: single bytes, then 2- and 3-byte sequences
+_WS_BYTES = frozenset(b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f ")
+_WS_2 = (b"\xc2\x85", b"\xc2\xa0")
+_WS_3 = (
+    b"\xe1\x9a\x80",
+    *(b"\xe2\x80" + bytes([c]) for c in range(0x80, 0x8B)),
+    b"\xe2\x80\xa8",
+    b"\xe2\x80\xa9",
+    b"\xe2\x80\xaf",
+    b"\xe2\x81\x9f",
+    b"\xe3\x80\x80",
+)
+_WS = rb"(?:[\t-\r\x1c- ]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)"
+_LEADING_WS_RE = re.compile(_WS + rb"*")
+# _WS without what str.splitlines() breaks on, so a match stays on one line
+_LINE_WS = rb"(?:[\t\x1f ]|\xc2\xa0|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xaf]|\xe2\x81\x9f|\xe3\x80\x80)"
+# Group 1 is the heading prefix when a line's lstrip() starts with one of _MD_HEADING_PREFIXES
+_HEADING_LINE_RE = re.compile(_LINE_WS + rb"*(#{1,6} )")
+# The same for every line after the first of ASCII text, in one scan
+_ASCII_HEADING_LINES_RE = re.compile(rb"\n[\t\x1f ]*(#{1,6} )")
+
+
+def chunk_bytes(data: bytes, strategy: str = "auto") -> list[ChunkInfo]:
+    """chunk_text() over UTF-8 bytes, without decoding or splitting them.
+
+    data must be valid UTF-8; chunks, IDs and byte lengths are exactly those
+    of chunk_text(data.decode()). Line boundaries are found with regex scans
+    and bytes.count(), byte lengths are offset differences, and chunk IDs
+    hash memoryview slices of data. Text using line breaks other than "\n"
+    and "\r\n" (a lone "\r", form feed, U+2028, ...) is decoded and chunked
+    by chunk_lines() instead.
+    """
+    if not data:
+        return []
+    if _has_rare_line_breaks(data):
+        return chunk_lines(data.decode("utf-8").splitlines(keepends=True), strategy)
+
+    headings: list[tuple[int, int]] | None = None
+    if strategy == "auto":
+        headings = _heading_lines(data)
+        strategy = "headings" if len(headings) >= 2 else "lines"
+
+    view = memoryview(data)
+    if strategy == "headings":
+        return _chunk_bytes_by_headings(data, view, headings if headings is not None else _heading_lines(data))
+    if strategy == "content":
+        return _chunk_bytes_by_content(data, view)
+    return _chunk_bytes_by_lines(data, view)
+
+
+def _has_rare_line_breaks(data: bytes) -> bool:
+    """True if str.splitlines() would break data anywhere but after "\n"."""
+    if b"\r" in data and data.count(b"\r") != data.count(b"\r\n"):
+        return True
+    if any(brk in data for brk in _RARE_LINE_BREAKS[:5]):
+        return True
+    # Multi-byte breaks: memchr for their last byte first, it is rarely there
+    if b"\x85" in data and b"\xc2\x85" in data:
+        return True
+    return (b"\xa8" in data or b"\xa9" in data) and (b"\xe2\x80\xa8" in data or b"\xe2\x80\xa9" in data)
+
+
+def _heading_lines(data: bytes) -> list[tuple[int, int]]:
+    """(line offset, heading offset) of each line whose lstrip() starts with a markdown heading prefix."""
+    found: list[tuple[int, int]] = []
+    if data.isascii() and data.count(b"#") * 64 > len(data):
+        # "#"-dense text (code with comments): one regex scan beats a find() per "#"
+        match = _HEADING_LINE_RE.match(data)
+        if match:
+            found.append((0, match.start(1)))
+        found.extend((m.start() + 1, m.start(1)) for m in _ASCII_HEADING_LINES_RE.finditer(data))
+        return found
+    pos = data.find(b"#")
+    while pos != -1:
+        # Only the first "#" of a line can open a heading
+        line_start = data.rfind(b"\n", 0, pos) + 1
+        match = _HEADING_LINE_RE.match(data, line_start)
+        if match:
+            found.append((line_start, pos))
+        line_end = data.find(b"\n", pos)
+        if line_end == -1:
+            break
+        pos = data.find(b"#", line_end)
+    return found
+
 
+def _line_count(data: bytes) -> int:
+    return data.count(b"\n") + (not data.endswith(b"\n"))
+
+
+def _stable_chunk_id_bytes(data: bytes, view: memoryview, start: int, end: int, start_line: int) -> str:
+    """_stable_chunk_id() of data[start:end], hashing a stripped slice in place."""
+    return f"chunk_{start_line}_{_bytes_hash(data, view, start, end)}"
+
+
+def _bytes_hash(data: bytes, view: memoryview, start: int, end: int) -> str:
+    """_text_hash() of data[start:end]."""
+    start = _LEADING_WS_RE.match(data, start, end).end()
+    return hashlib.sha256(view[start : _rstrip_end(data, start, end)]).hexdigest()[:12]
+
+
+def _rstrip_end(data: bytes, start: int, end: int) -> int:
+    """End offset of data[start:end].rstrip() in str.rstrip()'s sense."""
+    while end > start:
+        if data[end - 1] in _WS_BYTES:
+            end -= 1
+        elif data[end - 1] < 0x80:
+            break
+        elif data.endswith(_WS_2, start, end):
+            end -= 2
+        elif data.endswith(_WS_3, start, end):
+            end -= 3
+        else:
+            break
+    return end
+
+
+def _byte_chunk(
+    data: bytes, view: memoryview, start: int, end: int, start_line: int, end_line: int, heading: str | None = None
+) -> ChunkInfo:
+    """ChunkInfo for data[start:end], which holds lines start_line..end_line (1-based)."""
+    return ChunkInfo(
+        id=_stable_chunk_id_bytes(data, view, start, end, start_line),
+        start_line=start_line,
+        end_line=end_line,
+        byte_len=end - start,
+        heading=heading,
+        start_byte=start,
+    )
+
+
+def _chunk_bytes_by_lines(data: bytes, view: memoryview) -> list[ChunkInfo]:
+    total = _line_count(data)
+    chunks: list[ChunkInfo] = []
+    for match in _LINE_BLOCK_RE.finditer(data):
+        start_line = len(chunks) * CHUNK_TARGET_LINES + 1
+        end_line = min(start_line + CHUNK_TARGET_LINES - 1, total)
+        chunks.append(_byte_chunk(data, view, match.start(), match.end(), start_line, end_line))
     return chunks
+
+
+def _chunk_bytes_by_headings(data: bytes, view: memoryview, headings: list[tuple[int, int]]) -> list[ChunkInfo]:
+    chunks: list[ChunkInfo] = []
+    current_start = 0
+    current_line = 1
+    current_heading: str | None = None
+
+    for offset, mark in headings:
+        if offset == 0:
+            continue
+        line = current_line + data.count(b"\n", current_start, offset)
+        chunks.append(_byte_chunk(data, view, current_start, offset, current_line, line - 1, current_heading))
+        line_end = data.find(b"\n", mark)
+        current_heading = data[mark : line_end if line_end != -1 else len(data)].decode("utf-8").rstrip()
+        current_start = offset
+        current_line = line
+
+    chunks.append(_byte_chunk(data, view, current_start, len(data), current_line, _line_count(data), current_heading))
+    return chunks
+
+
+def _chunk_bytes_by_content(data: bytes, view: memoryview) -> list[ChunkInfo]:
+    chunks: list[ChunkInfo] = []
+    seen: dict[str, int] = {}
+    total = len(data)
+    start = pos = 0
+    start_line = line = 1
+    h = 0
+    crc32 = zlib.crc32
+    while pos < total:
+        # Split about _CDC_SLAB_BYTES of whole lines at a time: one C call, and
+        # never a copy of the whole file. Only "\n" and "\r\n" breaks are left.
+        slab_end = data.find(b"\n", pos + _CDC_SLAB_BYTES) + 1 or total
+        for piece in data[pos:slab_end].splitlines(keepends=True):
+            h = ((h << 1) + crc32(piece)) & _CDC_HASH_MASK  # _cdc_roll(), inlined
+            pos += len(piece)
+            size = pos - start
+            if size >= CDC_MAX_BYTES or (size >= CDC_MIN_BYTES and not h & _CDC_MASK) or pos == total:
+                chunk_id = _content_chunk_id(_bytes_hash(data, view, start, pos), seen)
+                chunks.append(ChunkInfo(chunk_id, start_line, line, size, None, start))
+                start = pos
+                start_line = line + 1
+            line += 1
+    return chunks
+
+
+# ── Streaming ──
+
+# Characters str.splitlines() breaks after
+_LINE_BREAK_CHARS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+
+
+class _OpenChunks:
+    """One strategy's chunks, built from lines as they arrive.
+
+    Lines are buffered only until the end of the current block or chunk,
+    then encoded once and hashed with the chunk's leading whitespace
+    dropped and its trailing whitespace held back, so the ID matches
+    _stable_chunk_id() over the whole chunk (or, with content_ids, the
+    line-free ID of a content-defined chunk).
+    """
+
+    def __init__(self, content_ids: bool = False) -> None:
+        self.done: list[ChunkInfo] = []
+        self.heading: str | None = None
+        self._start_line = 1
+        self._start_byte = 0
+        self._lines: list[str] = []
+        self.line_count = 0
+        self._byte_len = 0
+        self._hash = hashlib.sha256()
+        self._started = False
+        self._pending = b""
+        self._seen: dict[str, int] | None = {} if content_ids else None
+
+    def add(self, line: str) -> None:
+        self._lines.append(line)
+        self.line_count += 1
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        data = "".join(self._lines).encode("utf-8", errors="replace")
+        self._lines.clear()
+        self._byte_len += len(data)
+        start = 0 if self._started else _LEADING_WS_RE.match(data).end()
+        end = _rstrip_end(data, start, len(data))
+        if end > start:
+            self._started = True
+            if self._pending:
+                self._hash.update(self._pending)
+            self._hash.update(memoryview(data)[start:end])
+            self._pending = data[end:]
+        elif self._started:
+            self._pending += data
+
+    def close(self, heading: str | None = None) -> None:
+        """End the open chunk (if it has lines) and start the next one under heading."""
+        if self.line_count:
+            self.flush()
+            end_line = self._start_line + self.line_count - 1
+            h = self._hash.hexdigest()[:12]
+            self.done.append(
+                ChunkInfo(
+                    id=_content_chunk_id(h, self._seen) if self._seen is not None else f"chunk_{self._start_line}_{h}",
+                    start_line=self._start_line,
+                    end_line=end_line,
+                    byte_len=self._byte_len,
+                    heading=self.heading,
+                    start_byte=self._start_byte,
+                )
+            )
+            self._start_line = end_line + 1
+            self._start_byte += self._byte_len
+            self.line_count = 0
+            self._byte_len = 0
+            self._hash = hashlib.sha256()
+            self._started = False
+            self._pending = b""
+        self.heading = heading
+
+
+class StreamChunker:
+    """chunk_text() over a byte stream fed block by block.
+
+    feed() returns the chunks completed so far and finish() the rest; together
+    they are exactly chunk_text() of the whole stream decoded as UTF-8. Only
+    the current block, the line spanning it and one open chunk's unhashed
+    lines are held, so memory is bounded by the block size plus the longest
+    line, not the stream size.
+
+    "auto" needs two heading lines to pick "headings", so until it has seen
+    them both strategies are built and nothing is returned before finish().
+    ok turns False once the stream sniffs as binary or is not valid UTF-8;
+    chunk_text() would then never have seen the text, so chunks already
+    returned should be discarded.
+    """
+
+    def __init__(self, strategy: str = "auto") -> None:
+        if strategy not in ("auto", "headings", "content"):
+            strategy = "lines"
+        self.strategy = strategy
+        self.ok = True
+        # NUL in the first SNIFF_BYTES (known once that many bytes were fed)
+        self.looks_binary = False
+        self._head: bytearray | None = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")("strict")
+        self._partial: list[str] = []
+        self._line_no = 0
+        self._heading_count = 0
+        self._by_lines = _OpenChunks() if strategy in ("auto", "lines") else None
+        self._by_headings = _OpenChunks() if strategy in ("auto", "headings") else None
+        self._by_content = _OpenChunks(content_ids=True) if strategy == "content" else None
+        # Rolling hash and size of the open content-defined chunk
+        self._cdc_hash = 0
+        self._cdc_size = 0
+
+    def feed(self, block: bytes) -> list[ChunkInfo]:
+        if not self.ok:
+            return []
+        if self._head is not None:
+            # Hold the first SNIFF_BYTES back until the binary sniff can run
+            self._head += block
+            if len(self._head) < SNIFF_BYTES:
+                return []
+            block = self._sniff()
+            if not self.ok:
+                return []
+        try:
+            text = self._decoder.decode(block)
+        except UnicodeDecodeError:
+            self.ok = False
+            return []
+        self._add_text(text)
+        return self._take()
+
+    def finish(self) -> list[ChunkInfo]:
+        done: list[ChunkInfo] = []
+        if self.ok and self._head is not None:
+            block = self._sniff()
+            if self.ok:
+                done = self.feed(block)
+        if not self.ok:
+            return []
+        try:
+            self._add_text(self._decoder.decode(b"", final=True))
+        except UnicodeDecodeError:
+            self.ok = False
+            return []
+        if self._partial:
+            self._add_lines(["".join(self._partial)])
+            self._partial = []
+        if self.strategy == "auto":
+            self._decide(final=True)
+        for chunks in (self._by_lines, self._by_headings, self._by_content):
+            if chunks is not None:
+                chunks.close()
+        return done + self._take()
+
+    def _sniff(self) -> bytes:
+        head = bytes(self._head)
+        self._head = None
+        self.looks_binary = has_nul(head)
+        self.ok = not sniff_binary(head)
+        return head
+
+    def _add_text(self, text: str) -> None:
+        if not text:
+            return
+        partial = self._partial
+        if partial and partial[-1].endswith("\r") and not text.startswith("\n"):
+            # A "\r" held back in case "\n" followed: it ended its line
+            self._add_lines(["".join(partial)])
+            partial.clear()
+        lines = text.splitlines(keepends=True)
+        tail = lines[-1]
+        if tail[-1] not in _LINE_BREAK_CHARS or tail[-1] == "\r":
+            lines.pop()
+        else:
+            tail = None
+        if partial and lines:
+            lines[0] = "".join(partial) + lines[0]
+            partial.clear()
+        if tail is not None:
+            partial.append(tail)
+        if lines:
+            self._add_lines(lines)
+        for chunks in (self._by_lines, self._by_headings, self._by_content):
+            if chunks is not None:
+                chunks.flush()
+
+    def _add_lines(self, lines: list[str]) -> None:
+        if self._by_content is not None:
+            self._add_content_lines(lines)
+            return
+        by_lines = self._by_lines
+        by_headings = self._by_headings
+        for line in lines:
+            i = self._line_no
+            self._line_no += 1
+            if by_headings is not None:
+                stripped = line.lstrip()
+                if stripped.startswith(_MD_HEADING_PREFIXES):
+                    self._heading_count += 1
+                    if i > 0:
+                        by_headings.close(stripped.rstrip())
+                by_headings.add(line)
+            if by_lines is not None:
+                if i and i % CHUNK_TARGET_LINES == 0:
+                    by_lines.close()
+                by_lines.add(line)
+        if self.strategy == "auto":
+            self._decide()
+
+    def _add_content_lines(self, lines: list[str]) -> None:
+        by_content = self._by_content
+        h = self._cdc_hash
+        size = self._cdc_size
+        for line in lines:
+            data = line.encode("utf-8")
+            h = _cdc_roll(h, data)
+            size += len(data)
+            by_content.add(line)
+            if size >= CDC_MAX_BYTES or (size >= CDC_MIN_BYTES and not h & _CDC_MASK):
+                by_content.close()
+                size = 0
+        self._line_no += len(lines)
+        self._cdc_hash = h
+        self._cdc_size = size
+
+    def _decide(self, final: bool = False) -> None:
+        if self._heading_count >= 2:
+            self.strategy = "headings"
+            self._by_lines = None
+        elif final:
+            self.strategy = "lines"
+            self._by_headings = None
+
+    def _take(self) -> list[ChunkInfo]:
+        # None while "auto" is undecided
+        by_strategy = {"lines": self._by_lines, "headings": self._by_headings, "content": self._by_content}
+        chunks = by_strategy.get(self.strategy)
+        if chunks is None or not chunks.done:
+            return []
+        done = chunks.done
+        chunks.done = []
+        return done
@@ -10,7 +10,10 @@ from pathlib import Path
 
 from zip_meta_map import __version__
 from zip_meta_map.builder import build, validate_index
+from zip_meta_map.detect import Detection
 from zip_meta_map.profiles import ALL_PROFILES
+from zip_meta_map.roles import RoleStats, format_role_stats
+from zip_meta_map.scanner import DEFAULT_MAX_CONTENT_BYTES
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -45,6 +48,7 @@ def main(argv: list[str] | None = None) -> int:
         default=None,
         help="Path to a META_ZIP_POLICY.json file",
     )
+    _add_scan_arguments(build_parser)
     build_parser.add_argument(
         "--format",
         choices=["pretty", "json", "ndjson"],
@@ -69,6 +73,11 @@ def main(argv: list[str] | None = None) -> int:
         dest="report_format",
         help="Generate a detailed standalone markdown report",
     )
+    build_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print per-tier role classification hits and timings to stderr",
+    )
 
     # explain command
     explain_parser = subparsers.add_parser("explain", help="Show detected profile and top files to read")
@@ -80,6 +89,7 @@ def main(argv: list[str] | None = None) -> int:
         default=None,
         help="Force a specific profile (default: auto-detect)",
     )
+    _add_scan_arguments(explain_parser)
     explain_parser.add_argument(
         "--json",
         action="store_true",
@@ -168,6 +178,73 @@ def main(argv: list[str] | None = None) -> int:
     return 0
 
 
+def _int_at_least(value: str, minimum: int) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {value!r}") from None
+    if number < minimum:
+        raise argparse.ArgumentTypeError(f"must be at least {minimum}, got: {number}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    """argparse type for byte counts: an integer of at least 0."""
+    return _int_at_least(value, 0)
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for thread counts: an integer of at least 1."""
+    return _int_at_least(value, 1)
+
+
+def _add_scan_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the scan strategy options shared by build and explain."""
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=None,
+        help="Threads for reading and hashing files (default: chosen from file count; 1 = sequential)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        dest="cache_path",
+        help=(
+            "Cache file for incremental rebuilds; unchanged files are not re-read "
+            "(.json = single JSON document, other suffixes = SQLite database)"
+        ),
+    )
+    parser.add_argument(
+        "--max-content-bytes",
+        type=_non_negative_int,
+        default=DEFAULT_MAX_CONTENT_BYTES,
+        help=(
+            "Files larger than this are hashed by streaming and not analyzed "
+            f"for chunks, excerpts or risk flags (default: {DEFAULT_MAX_CONTENT_BYTES})"
+        ),
+    )
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="ZIP inputs only: index the central directory without decompressing (CRC32, no content fields)",
+    )
+    parser.add_argument(
+        "--git-index",
+        action="store_true",
+        help=(
+            "Git work trees: list tracked files from .git/index instead of walking; with --cache, "
+            "files git sees as clean reuse hashes by blob ID (falls back to walking)"
+        ),
+    )
+    parser.add_argument(
+        "--gitignore",
+        action="store_true",
+        help="Directories: also skip files ignored by .gitignore files and .git/info/exclude",
+    )
+
+
 def _cmd_build(args: argparse.Namespace) -> int:
     input_path: Path = args.input
     if not input_path.exists():
@@ -182,6 +259,7 @@ def _cmd_build(args: argparse.Namespace) -> int:
     # For --manifest-only with -o, still write the directory but skip FRONT.md
     output_dir = args.output
     manifest_only = args.manifest_only
+    role_stats = RoleStats() if args.stats else None
 
     try:
         front, index = build(
@@ -189,11 +267,21 @@ def _cmd_build(args: argparse.Namespace) -> int:
             output_dir=None if manifest_only and output_dir else output_dir,
             profile_name=args.profile,
             policy_path=policy_path,
+            max_workers=args.workers,
+            cache_path=args.cache_path,
+            max_content_bytes=args.max_content_bytes,
+            metadata_only=args.metadata_only,
+            git_index=args.git_index,
+            gitignore=args.gitignore,
+            role_stats=role_stats,
         )
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
+    if role_stats is not None:
+        print("\n".join(format_role_stats(role_stats.to_dict())), file=sys.stderr)
+
     # Handle --manifest-only with -o: write only the JSON
     if manifest_only and output_dir:
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -279,14 +367,28 @@ def _cmd_explain(args: argparse.Namespace) -> int:
         print(f"Error: {input_path} does not exist", file=sys.stderr)
         return 1
 
+    detections: list[Detection] = []
     try:
-        _, index = build(input_path, profile_name=args.profile)
+        _, index = build(
+            input_path,
+            profile_name=args.profile,
+            max_workers=args.workers,
+            cache_path=args.cache_path,
+            max_content_bytes=args.max_content_bytes,
+            metadata_only=args.metadata_only,
+            git_index=args.git_index,
+            gitignore=args.gitignore,
+            on_detect=detections.append,
+        )
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
 
+    detection = detections[0] if detections else None
     if args.json_output:
         explain_data = _build_explain_data(index)
+        if detection is not None:
+            explain_data["detection"] = detection.to_dict()
         print(json.dumps(explain_data, indent=2))
         return 0
 
@@ -299,6 +401,12 @@ def _cmd_explain(args: argparse.Namespace) -> int:
     print(f"Files:    {len(files)}")
     print()
 
+    if detection is not None:
+        print(f"Detection: score={detection.score:.2f}  {detection.reason}")
+        for runner_up in detection.runner_ups:
+            print(f"  {runner_up.profile.name:20s} score={runner_up.score:.2f}  {', '.join(runner_up.markers)}")
+        print()
+
     # Role distribution
     role_counts: dict[str, int] = {}
     for f in files:
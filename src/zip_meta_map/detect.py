@@ -0,0 +1,192 @@
+"""Profile detection by marker priority, with early exit.
+
+Detection only looks at paths. Exact detect files ("Cargo.toml") count
+only at the root; glob detect files ("*.csproj") match a file name at any
+depth. Profiles are ranked: monorepo markers first, then the more specific
+language markers ahead of the more general ones. The highest-ranked
+profile with a marker wins, and python_cli is the default.
+
+Each profile with a marker also gets a confidence score from 0 to 1, from
+how many markers matched and how deep they sit. The score says how strong
+a profile's evidence is; it does not override the rank.
+
+A ProfileDetector takes paths one at a time and reports when the winner
+is settled: once a monorepo marker is seen, or, for a breadth-first
+listing past its root level, once no higher-ranked profile has a glob
+marker that could still turn up deeper. detect_directory() walks only the
+top DETECT_MAX_DEPTH levels of a tree and stops there.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from zip_meta_map.globs import compile_globs, normcase
+from zip_meta_map.profiles import ALL_PROFILES, DEFAULT_PROFILE, Profile
+from zip_meta_map.scanner import iter_directory_levels
+
+# Path components a directory walk descends to while detecting
+DETECT_MAX_DEPTH = 4
+
+# Highest priority first: workspace markers, then Rust > Go > .NET > Java > Node/TS > Python
+DETECTION_ORDER = ["monorepo", "rust_cli", "go_cli", "dotnet_cli", "java_cli", "node_ts_tool", "python_cli"]
+
+# Evidence of one root-level marker; a marker n directories down counts 1/(n+1) as much
+_MARKER_WEIGHT = 0.6
+
+
+def marker_score(markers: list[str]) -> float:
+    """Confidence that markers identify their profile: 1 - product of (1 - weight) per marker.
+
+    One root marker scores 0.6, two score 0.84 and three 0.94; a nested
+    marker adds less the deeper it is. No markers score 0.0.
+    """
+    doubt = 1.0
+    for path in markers:
+        doubt *= 1.0 - _MARKER_WEIGHT / (path.count("/") + 1)
+    return round(1.0 - doubt, 2)
+
+
+@dataclass
+class ProfileMatch:
+    """One profile's evidence: the paths that matched its detect files.
+
+    rank is the profile's position in DETECTION_ORDER (0 wins over all
+    others) and decides the winner. score is marker_score(markers).
+    """
+
+    profile: Profile
+    rank: int
+    markers: list[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        return marker_score(self.markers)
+
+    def to_dict(self) -> dict:
+        return {"profile": self.profile.name, "score": self.score, "markers": self.markers}
+
+
+@dataclass
+class Detection:
+    """The detected profile and why it won."""
+
+    profile: Profile
+    reason: str
+    # Every profile with a marker, highest priority first (the winner included)
+    matches: list[ProfileMatch] = field(default_factory=list)
+    paths_seen: int = 0
+    # True if a decisive marker stopped detection before the rest of the listing was read
+    early_exit: bool = False
+
+    @property
+    def markers(self) -> list[str]:
+        return self.matches[0].markers if self.matches and self.matches[0].profile is self.profile else []
+
+    @property
+    def score(self) -> float:
+        """The winner's confidence; 0.0 for the default profile with no marker."""
+        return marker_score(self.markers)
+
+    @property
+    def runner_ups(self) -> list[ProfileMatch]:
+        return [m for m in self.matches if m.profile is not self.profile]
+
+    def to_dict(self) -> dict:
+        return {
+            "profile": self.profile.name,
+            "score": self.score,
+            "reason": self.reason,
+            "markers": self.markers,
+            "runner_ups": [s.to_dict() for s in self.runner_ups],
+            "paths_seen": self.paths_seen,
+            "early_exit": self.early_exit,
+        }
+
+
+class ProfileDetector:
+    """Accumulates detect-file hits from a stream of relative paths."""
+
+    def __init__(self, breadth_first: bool = False) -> None:
+        self.breadth_first = breadth_first
+        self.paths_seen = 0
+        self._exact: dict[str, list[int]] = {}
+        self._globs: list[tuple[int, re.Pattern]] = []
+        for rank, name in enumerate(DETECTION_ORDER):
+            profile = ALL_PROFILES[name]
+            for detect_file in profile.detect_files:
+                if "*" in detect_file:
+                    continue
+                self._exact.setdefault(detect_file, []).append(rank)
+            regex = compile_globs([p for p in profile.detect_files if "*" in p])
+            if regex is not None:
+                self._globs.append((rank, regex))
+        # rank -> matched paths, in the order seen
+        self._hits: dict[int, list[str]] = {}
+        self._best = len(DETECTION_ORDER)
+        self._past_root = False
+
+    def add(self, path: str) -> bool:
+        """Record one path. Returns True once further paths cannot change the winner."""
+        self.paths_seen += 1
+        slash = path.rfind("/")
+        if slash == -1:
+            for rank in self._exact.get(path, ()):
+                self._hit(rank, path)
+        else:
+            self._past_root = True
+        name = normcase(path[slash + 1 :])
+        for rank, regex in self._globs:
+            if regex.fullmatch(name):
+                self._hit(rank, path)
+        return self.decided
+
+    def _hit(self, rank: int, path: str) -> None:
+        self._hits.setdefault(rank, []).append(path)
+        self._best = min(self._best, rank)
+
+    @property
+    def decided(self) -> bool:
+        """True when the winner can no longer change."""
+        if self._best == 0:
+            return True
+        if not (self.breadth_first and self._past_root):
+            return False
+        # Root markers are all in; only a higher-ranked glob marker could still win
+        return all(rank >= self._best for rank, _ in self._globs)
+
+    def result(self, early_exit: bool = False) -> Detection:
+        matches = [
+            ProfileMatch(ALL_PROFILES[DETECTION_ORDER[rank]], rank, paths) for rank, paths in sorted(self._hits.items())
+        ]
+        if not matches:
+            return Detection(DEFAULT_PROFILE, "no detect files found; default profile", [], self.paths_seen)
+        best = matches[0]
+        return Detection(
+            profile=best.profile,
+            reason=f"found {', '.join(best.markers)}",
+            matches=matches,
+            paths_seen=self.paths_seen,
+            early_exit=early_exit,
+        )
+
+
+def detect_paths(rel_paths: Iterable[str], breadth_first: bool = False) -> Detection:
+    """Detect a profile from relative paths, stopping at the first decisive marker.
+
+    Set breadth_first if every root-level path comes before any nested one,
+    so that detection can also stop once the root level is done.
+    """
+    detector = ProfileDetector(breadth_first)
+    for path in rel_paths:
+        if detector.add(path):
+            return detector.result(early_exit=True)
+    return detector.result()
+
+
+def detect_directory(root: Path, gitignore: bool = False, max_depth: int | None = DETECT_MAX_DEPTH) -> Detection:
+    """Detect a directory's profile from its top max_depth levels, walked breadth-first."""
+    return detect_paths(iter_directory_levels(root, [".git/**"], max_depth, gitignore), breadth_first=True)
@@ -154,8 +154,12 @@ def _compare_file_entries(old: dict, new: dict) -> list[str]:
     """Compare two file entries and return a list of change descriptions."""
     changes: list[str] = []
 
-    if old.get("sha256") != new.get("sha256"):
-        changes.append("content changed")
+    # Compare whichever digest both entries carry (metadata-only indexes have crc32)
+    for digest in ("sha256", "crc32"):
+        if digest in old and digest in new:
+            if old[digest] != new[digest]:
+                changes.append("content changed")
+            break
 
     if old.get("role") != new.get("role"):
         changes.append(f"role: {old.get('role')} -> {new.get('role')}")
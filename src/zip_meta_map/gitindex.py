@@ -0,0 +1,217 @@
+"""Read git's index (.git/index) without running git.
+
+The index already lists every tracked path with its blob ID and the stat
+data git saw when it last checked the file. A directory scan can use it to
+enumerate files without walking the tree. A file is trusted to still hold
+its indexed blob when its stat data matches, as git's own clean check does.
+
+Supports index versions 2-4 with SHA-1 object IDs. Anything unexpected
+(missing file, bad checksum, SHA-256 repository, split or sparse index)
+makes read_git_index() return None so callers fall back to a filesystem
+walk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat as stat_module
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+_HEADER = struct.Struct(">4sII")
+_EXTENSION = struct.Struct(">4sI")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, 20-byte SHA-1, flags
+_ENTRY = struct.Struct(">10I20sH")
+
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE = 0x3000
+_FLAG_NAME_MASK = 0x0FFF
+_EXT_INTENT_TO_ADD = 0x2000
+
+_MODE_GITLINK = 0o160000
+_MODE_DIR = 0o040000
+
+_U32 = 0xFFFFFFFF
+
+# Extensions that mean the entries above them are not the whole index:
+# "link" points at a shared split index, "sdir" marks a sparse index
+_UNSUPPORTED_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+
+@dataclass
+class GitIndexEntry:
+    path: str
+    blob: str
+    mode: int
+    size: int
+    mtime: tuple[int, int]
+    ctime: tuple[int, int]
+    dev: int
+    ino: int
+    # Intent-to-add entries carry a placeholder blob, never the file's content
+    intent_to_add: bool = False
+
+
+@dataclass
+class GitIndex:
+    entries: list[GitIndexEntry]
+    # Index file mtime: files modified at or after it are "racily clean"
+    mtime_ns: int
+
+    def __post_init__(self) -> None:
+        self._by_path = {e.path: e for e in self.entries}
+
+    def paths(self) -> list[str]:
+        """Tracked regular files and symlinks, in scan_directory() order."""
+        return sorted(
+            (e.path for e in self.entries if stat_module.S_ISREG(e.mode) or stat_module.S_ISLNK(e.mode)),
+            key=lambda p: p.split("/"),
+        )
+
+    def clean_blob(self, path: str, st: os.stat_result) -> str | None:
+        """Return the indexed blob ID if the file on disk still holds it.
+
+        Mirrors git's stat check: size, mtime, ctime, device and inode must
+        match the index (all truncated to 32 bits as git stores them), and
+        the file must be older than the index itself (else git would also
+        re-read it). Symlinks are never trusted: their blob is the link text.
+        """
+        entry = self._by_path.get(path)
+        if entry is None or entry.intent_to_add or not stat_module.S_ISREG(entry.mode):
+            return None
+        if st.st_mtime_ns >= self.mtime_ns:
+            return None
+        if (
+            entry.size != st.st_size & _U32
+            or entry.mtime != (st.st_mtime_ns // 1_000_000_000 & _U32, st.st_mtime_ns % 1_000_000_000)
+            or entry.ctime != (st.st_ctime_ns // 1_000_000_000 & _U32, st.st_ctime_ns % 1_000_000_000)
+            or entry.dev != st.st_dev & _U32
+            or entry.ino != st.st_ino & _U32
+        ):
+            return None
+        return entry.blob
+
+
+def _git_dir(root: Path) -> Path | None:
+    """Locate the git directory of a work tree root (.git dir or "gitdir:" file)."""
+    dot_git = root / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        text = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+        if text.startswith("gitdir:"):
+            return (root / text[len("gitdir:") :].strip()).resolve()
+    return None
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Decode git's offset varint (index v4 path prefix lengths)."""
+    c = data[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, pos
+
+
+def parse_git_index(data: bytes) -> list[GitIndexEntry]:
+    """Parse the bytes of a git index file.
+
+    Raises ValueError on anything malformed or unsupported.
+    """
+    if len(data) < _HEADER.size + 20:
+        raise ValueError("git index too short")
+    if hashlib.sha1(data[:-20]).digest() != data[-20:]:
+        raise ValueError("git index checksum mismatch")
+    signature, version, count = _HEADER.unpack_from(data)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise ValueError(f"unsupported git index (signature {signature!r}, version {version})")
+
+    entries: list[GitIndexEntry] = []
+    pos = _HEADER.size
+    end = len(data) - 20
+    previous = b""
+    try:
+        for _ in range(count):
+            start = pos
+            fields = _ENTRY.unpack_from(data, pos)
+            pos += _ENTRY.size
+            ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, mode, _uid, _gid, size, sha, flags = fields
+            extended = 0
+            if flags & _FLAG_EXTENDED:
+                if version < 3:
+                    raise ValueError("extended flags in a version 2 index")
+                (extended,) = struct.unpack_from(">H", data, pos)
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                nul = data.index(b"\0", pos, end)
+                if strip > len(previous):
+                    raise ValueError("bad path prefix length")
+                name = previous[: len(previous) - strip] + data[pos:nul]
+                pos = nul + 1
+            else:
+                nul = data.index(b"\0", pos, end)
+                name = data[pos:nul]
+                if (flags & _FLAG_NAME_MASK) not in (len(name), _FLAG_NAME_MASK):
+                    raise ValueError("path length does not match entry flags")
+                # Entries are NUL-padded to a multiple of 8 bytes
+                pos = start + ((nul - start + 8) & ~7)
+            previous = name
+            if not name:
+                raise ValueError("git index entry has an empty path")
+
+            if mode & 0o170000 == _MODE_DIR:
+                raise ValueError("sparse index entries are not supported")
+            if flags & _FLAG_STAGE:
+                continue  # unmerged: no single blob for this path
+            entries.append(
+                GitIndexEntry(
+                    path=name.decode("utf-8"),
+                    blob=sha.hex(),
+                    mode=mode,
+                    size=size,
+                    mtime=(mtime_s, mtime_ns),
+                    ctime=(ctime_s, ctime_ns),
+                    dev=dev,
+                    ino=ino,
+                    intent_to_add=bool(extended & _EXT_INTENT_TO_ADD),
+                )
+            )
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise ValueError(f"truncated or malformed git index: {exc}") from exc
+    if pos > end:
+        raise ValueError("git index entries overrun the checksum")
+    while pos < end:
+        if pos + _EXTENSION.size > end:
+            raise ValueError("truncated git index extension")
+        signature, size = _EXTENSION.unpack_from(data, pos)
+        if signature in _UNSUPPORTED_EXTENSIONS:
+            raise ValueError(f"{_UNSUPPORTED_EXTENSIONS[signature]} is not supported")
+        pos += _EXTENSION.size + size
+    if pos != end:
+        raise ValueError("git index extensions overrun the checksum")
+    return [e for e in entries if e.mode & 0o170000 != _MODE_GITLINK]
+
+
+def read_git_index(root: Path) -> GitIndex | None:
+    """Read the index of a git work tree rooted at root.
+
+    Returns None if root is not a work tree root or the index is missing,
+    unreadable or in a form this reader does not support.
+    """
+    git_dir = _git_dir(root)
+    if git_dir is None:
+        return None
+    index_path = git_dir / "index"
+    try:
+        mtime_ns = index_path.stat().st_mtime_ns
+        entries = parse_git_index(index_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    return GitIndex(entries=entries, mtime_ns=mtime_ns)
@@ -0,0 +1,408 @@
+"""Compiled glob matching for ignore rules.
+
+fnmatch() re-translates its pattern on every call (behind a small LRU cache)
+and is usually called once per glob per path. The helpers here translate a
+glob list once into a single regex plus literal-name sets, with identical
+answers to the per-glob fnmatch loops they replace.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from fnmatch import translate
+from pathlib import PurePosixPath
+
+# fnmatch() applies os.path.normcase to both sides; on POSIX that is a no-op,
+# so skip the per-path call entirely there.
+_FOLD_CASE = os.path.normcase("A/") != "A/"
+
+_MAGIC_CHARS = frozenset("*?[")
+
+
+def normcase(value: str) -> str:
+    """os.path.normcase(), skipped where it is a no-op."""
+    return os.path.normcase(value) if _FOLD_CASE else value
+
+
+def is_literal(pattern: str) -> bool:
+    """Return True if a glob has no wildcard characters."""
+    return _MAGIC_CHARS.isdisjoint(pattern)
+
+
+def compile_globs(patterns: list[str]) -> re.Pattern | None:
+    """Compile globs into one regex that fullmatches iff fnmatch() would.
+
+    Returns None for an empty pattern list.
+    """
+    if not patterns:
+        return None
+    return re.compile(translate_globs(patterns))
+
+
+def translate_globs(patterns: list[str]) -> str:
+    """Regex source that matches (with re.match) a normcase()d path iff fnmatch() would match any glob."""
+    return "|".join(translate(normcase(p)) for p in patterns)
+
+
+class _NameSet:
+    """Match single path components against globs: literal set + regex."""
+
+    __slots__ = ("literals", "regex")
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.literals = frozenset(normcase(p) for p in patterns if is_literal(p))
+        self.regex = compile_globs([p for p in patterns if not is_literal(p)])
+
+    def __bool__(self) -> bool:
+        return bool(self.literals) or self.regex is not None
+
+    def any_match(self, parts: list[str] | tuple[str, ...]) -> bool:
+        if self.literals and not self.literals.isdisjoint(parts):
+            return True
+        if self.regex is not None:
+            match = self.regex.match
+            for part in parts:
+                if match(part):
+                    return True
+        return False
+
+
+class IgnoreMatcher:
+    """Ignore globs compiled once per build.
+
+    A path is ignored when any of these hold (the historic _should_ignore
+    semantics):
+
+    - it fnmatches any glob as a whole path;
+    - for "dir/**" globs (no leading "**/"), any path component matches "dir";
+    - for "**/dir/**" globs, any directory component matches "dir".
+    """
+
+    def __init__(self, ignore_globs: list[str]) -> None:
+        self.globs = list(ignore_globs)
+
+        full: list[str] = []
+        any_component: list[str] = []
+        dir_component: list[str] = []
+        prefixes: list[str] = []
+        for glob in self.globs:
+            if not glob.endswith("/**"):
+                full.append(glob)
+                continue
+            prefixes.append(glob[:-3])
+            if glob.startswith("**/"):
+                inner = glob[3:-3]
+                dir_name = glob.split("/")[1]
+                dir_component.append(dir_name)
+            else:
+                inner = glob[:-3]
+                dir_name = glob.split("/")[0]
+                any_component.append(dir_name)
+            # A literal "dir/**" or "**/dir/**" whole-path match implies the
+            # component check on dir_name, so the regex alternative is redundant.
+            if not (dir_name and is_literal(inner)):
+                full.append(glob)
+
+        self._full = compile_globs(full)
+
+        self._any_component = _NameSet(any_component)
+        self._dir_component = _NameSet(dir_component)
+        self._prune_components = _NameSet(any_component + dir_component)
+        self._prune_prefix = compile_globs(prefixes)
+
+    def matches(self, path: str) -> bool:
+        """Return True if a relative POSIX path is ignored."""
+        parts: list[str] | tuple[str, ...] = path.split("/")
+        if "" in parts or "." in parts:
+            # Only unusual paths need PurePosixPath's normalisation
+            posix = PurePosixPath(path)
+            path, parts = str(posix), posix.parts
+        if _FOLD_CASE:
+            path = normcase(path)
+            parts = [normcase(p) for p in parts]
+
+        if self._full is not None and self._full.match(path):
+            return True
+        if self._any_component and self._any_component.any_match(parts):
+            return True
+        if self._dir_component and self._dir_component.any_match(parts[:-1]):
+            return True
+        return False
+
+    def prunes(self, rel_dir: str) -> bool:
+        """Return True if every file below a directory is ignored.
+
+        Conservative: only directory globs ("dir/**", "**/dir/**", "a/b/**")
+        can prune, so pruning never changes which files are listed.
+        """
+        parts = [normcase(p) for p in rel_dir.split("/")] if _FOLD_CASE else rel_dir.split("/")
+        if self._prune_prefix is not None and self._prune_prefix.match(normcase(rel_dir)):
+            return True
+        return bool(self._prune_components) and self._prune_components.any_match(parts)
+
+
+# ── .gitignore rules ──
+
+
+def _gitignore_regex(pattern: str) -> str:
+    """Translate one gitignore pattern (no "!" or trailing "/") to a regex.
+
+    The regex fullmatches paths relative to the .gitignore's directory.
+    Patterns without a slash (other than a trailing one) match at any depth.
+    """
+    anchored = "/" in pattern
+    if pattern.startswith("/"):
+        pattern = pattern[1:]
+    out: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            double = pattern.startswith("**", i)
+            if double and (i == 0 or pattern[i - 1] == "/") and (i + 2 == n or pattern[i + 2] == "/"):
+                # "**" as a whole segment: "**/" is zero or more directories, a final "**" is everything
+                out.append(".*" if i + 2 == n else "(?:.*/)?")
+                i += 3
+                continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append("[^/]*")
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j]
+                negate = body[:1] in ("!", "^")
+                if negate:
+                    body = body[1:]
+                chars: list[str] = []
+                k = 0
+                while k < len(body):
+                    ch = body[k]
+                    if ch == "\\" and k + 1 < len(body):
+                        k += 1
+                        chars.append(re.escape(body[k]))
+                    elif ch in "[\\":
+                        chars.append("\\" + ch)
+                    else:
+                        chars.append(ch)
+                    k += 1
+                out.append("[" + ("^" if negate else "") + "".join(chars) + "]")
+                i = j + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    body = "".join(out)
+    return body if anchored else "(?:.*/)?" + body
+
+
+class GitignoreRules:
+    """The patterns of one .gitignore file, compiled once.
+
+    Supports comments, escapes, trailing-space trimming, "!" negation,
+    directory-only patterns ("build/"), anchoring ("/dist", "docs/*.html")
+    and "**". As in git, the last matching pattern wins.
+    """
+
+    __slots__ = ("_negated", "_files", "_dirs")
+
+    def __init__(self, text: str) -> None:
+        self._negated: list[bool] = []
+        file_alts: list[str] = []
+        dir_alts: list[str] = []
+        for raw in text.splitlines():
+            line = raw
+            while line.endswith(" ") and not line.endswith("\\ "):
+                line = line[:-1]
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            alt = f"(?P<p{len(self._negated)}>{_gitignore_regex(line)})"
+            self._negated.append(negated)
+            dir_alts.append(alt)
+            if not dir_only:
+                file_alts.append(alt)
+        # Later patterns take precedence, so they are tried first
+        self._files = re.compile("|".join(reversed(file_alts))) if file_alts else None
+        self._dirs = re.compile("|".join(reversed(dir_alts))) if dir_alts else None
+
+    def __bool__(self) -> bool:
+        return self._dirs is not None
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        """Return True (ignored), False (re-included by "!") or None (no pattern matches).
+
+        path is relative to the directory holding the .gitignore.
+        """
+        regex = self._dirs if is_dir else self._files
+        if regex is None:
+            return None
+        m = regex.fullmatch(path)
+        if m is None:
+            return None
+        return not self._negated[int(m.lastgroup[1:])]
+
+
+# ── Tiered glob lists ──
+
+
+# Sentinel tier, above any real one
+_NO_TIER = 1 << 30
+
+# Splits off a glob's literal tail after its last wildcard or bracket
+_GLOB_TAIL = re.compile(r"[*?\[\]]")
+
+
+def _plain_component(text: str) -> bool:
+    """True for a non-empty literal with no "/"."""
+    return bool(text) and "/" not in text and is_literal(text)
+
+
+def _suffix_key(text: str) -> str:
+    """The last ".ext" of text, or "" if it has no dot."""
+    dot = text.rfind(".")
+    return text[dot:] if dot >= 0 else ""
+
+
+class GlobTiers:
+    """Find the first of several glob lists that matches a path.
+
+    first(path) is the lowest i such that fnmatch(path, g) holds for some
+    glob g in tiers[i], or None. Common glob shapes are answered by lookups
+    on the path's components instead of regex matching:
+
+    - "a/b.txt" (literal): the whole path;
+    - "dir/**": a startswith() among the globs for the path's first component;
+    - "**/name": the last component;
+    - "**/dir/**": the inner components;
+    - "*suffix" and "**/*suffix": an endswith() among the globs for the path's
+      last ".ext".
+
+    Other globs starting with a literal directory ("src/*/cli.py") or ending
+    in a literal ".ext" ("**/test_*.py") get their own regex, tried only on
+    paths with that first component or extension. The rest share one regex
+    with a named group per tier.
+    """
+
+    def __init__(self, tiers: list[list[str]]) -> None:
+        self._exact: dict[str, int] = {}
+        self._prefixes: dict[str, list[tuple[str, int]]] = {}
+        self._names: dict[str, int] = {}
+        self._dirs: dict[str, int] = {}
+        # ".ext" -> (suffix, tier, needs a "/" before the suffix)
+        self._suffixes: dict[str, list[tuple[str, int, bool]]] = {}
+        # Per-glob regexes gated on the path's first component / last ".ext"
+        self._head_globs: dict[str, list[tuple[re.Pattern, int]]] = {}
+        self._ext_globs: dict[str, list[tuple[re.Pattern, int]]] = {}
+        rest: list[str] = []
+        self._rest_min = _NO_TIER
+        for tier, patterns in enumerate(tiers):
+            leftover = [p for p in patterns if _FOLD_CASE or not self._index(p, tier)]
+            if leftover:
+                rest.append(f"(?P<t{tier}>{translate_globs(leftover)})")
+                self._rest_min = min(self._rest_min, tier)
+        self._rest = re.compile("|".join(rest)) if rest else None
+
+    def _index(self, pattern: str, tier: int) -> bool:
+        """File pattern under a lookup if its shape allows; False if it needs the regex."""
+        if is_literal(pattern):
+            self._exact.setdefault(pattern, tier)
+        elif pattern.startswith("**/") and pattern.endswith("/**") and _plain_component(pattern[3:-3]):
+            self._dirs.setdefault(pattern[3:-3], tier)
+        elif pattern.endswith("/**") and is_literal(pattern[:-3]):
+            prefix = pattern[:-2]
+            self._prefixes.setdefault(prefix.split("/", 1)[0], []).append((prefix, tier))
+        elif pattern.startswith("**/") and _plain_component(pattern[3:]):
+            self._names.setdefault(pattern[3:], tier)
+        elif pattern.startswith("**/*") and _plain_component(pattern[4:]) and "." in pattern[4:]:
+            suffix = pattern[4:]
+            self._suffixes.setdefault(_suffix_key(suffix), []).append((suffix, tier, True))
+        elif pattern.startswith("*") and _plain_component(pattern.lstrip("*")) and "." in pattern:
+            suffix = pattern.lstrip("*")
+            self._suffixes.setdefault(_suffix_key(suffix), []).append((suffix, tier, False))
+        elif "/" in pattern and is_literal(pattern.split("/", 1)[0]):
+            regex = re.compile(translate(pattern))
+            self._head_globs.setdefault(pattern.split("/", 1)[0], []).append((regex, tier))
+        elif "/" not in (ext := _suffix_key(_GLOB_TAIL.split(pattern)[-1])) and ext:
+            self._ext_globs.setdefault(ext, []).append((re.compile(translate(pattern)), tier))
+        else:
+            return False
+        return True
+
+    def dir_rank(self, head: str) -> int:
+        """The first tier among globs decided by a path's directory alone ("dir/**", "**/dir/**").
+
+        head is the path up to and including its last "/", or "" if it has
+        none. Every file in a directory shares the result, so callers
+        classifying many paths can compute it once per directory and pass it
+        to first(). It is an opaque rank, not a tier index.
+        """
+        best = _NO_TIER
+        if head and not _FOLD_CASE:
+            parts = head.split("/")
+            for prefix, tier in self._prefixes.get(parts[0], ()):
+                if tier < best and head.startswith(prefix):
+                    best = tier
+            if self._dirs:
+                for part in parts[1:-1]:
+                    tier = self._dirs.get(part)
+                    if tier is not None and tier < best:
+                        best = tier
+        return best
+
+    def first(self, path: str, parts: list[str] | None = None, dir_rank: int | None = None) -> int | None:
+        """Index of the first tier with a glob that fnmatches path, or None.
+
+        parts, if given, is path.split("/"); dir_rank, if given, is
+        dir_rank() of the path's directory.
+        """
+        if parts is None:
+            parts = path.split("/")
+        if dir_rank is None:
+            dir_rank = self.dir_rank(path[: len(path) - len(parts[-1])])
+        best = dir_rank
+        if not _FOLD_CASE:
+            tier = self._exact.get(path)
+            if tier is not None and tier < best:
+                best = tier
+            if len(parts) > 1:
+                tier = self._names.get(parts[-1])
+                if tier is not None and tier < best:
+                    best = tier
+            for regex, tier in self._head_globs.get(parts[0], ()):
+                if tier < best and regex.match(path):
+                    best = tier
+            ext = _suffix_key(parts[-1])
+            for suffix, tier, needs_slash in self._suffixes.get(ext, ()):
+                if tier < best and path.endswith(suffix) and (not needs_slash or "/" in path[: -len(suffix)]):
+                    best = tier
+            for regex, tier in self._ext_globs.get(ext, ()):
+                if tier < best and regex.match(path):
+                    best = tier
+        # The regex can only help if it holds a tier below the best lookup hit
+        if self._rest is not None and self._rest_min < best:
+            m = self._rest.match(normcase(path))
+            if m is not None:
+                best = min(best, int(m.lastgroup[1:]))
+        return None if best == _NO_TIER else best
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
-from fnmatch import fnmatch
 from pathlib import PurePosixPath
 
+from zip_meta_map.globs import GlobTiers
 from zip_meta_map.profiles import Profile
 
 
@@ -329,91 +331,207 @@ _INTERNAL_INDICATORS: list[str] = [
 ]
 
 
-def _matches_any(path: str, patterns: list[str]) -> bool:
-    """Check if path matches any of the given glob patterns."""
-    for pattern in patterns:
-        if fnmatch(path, pattern):
-            return True
-    return False
-
-
-def assign_role(path: str, profile: Profile) -> RoleAssignment:
-    """Assign a role to a file path based on the profile and heuristics.
-
-    Returns a RoleAssignment with role, confidence (0.0-1.0), and reason.
-    The assignment is deterministic: same inputs always produce same outputs.
-    """
-    posix = PurePosixPath(path)
-    name = posix.name
-    ext = posix.suffix.lower()
-
-    # ── Priority 1: Profile entrypoints (highest confidence) ──
-    for pattern in profile.entrypoint_patterns:
-        if fnmatch(path, pattern):
-            return RoleAssignment("entrypoint", 0.95, f"matches profile entrypoint pattern '{pattern}'")
-
-    # ── Priority 2: Lockfiles (unambiguous) ──
-    if name in _LOCKFILES:
-        return RoleAssignment("lockfile", 0.95, f"'{name}' is a known lock file")
-
-    # ── Priority 3: CI pipelines ──
-    if _matches_any(path, _CI_PATTERNS):
-        return RoleAssignment("ci", 0.90, "CI/CD pipeline definition")
-
-    # ── Priority 4: Filename-based roles ──
-    if name in _NAME_ROLES:
-        role, conf, reason = _NAME_ROLES[name]
-        return RoleAssignment(role, conf, reason)
-
-    # ── Priority 5: Generated / vendor directories ──
-    if _matches_any(path, _GENERATED_DIR_PATTERNS):
-        return RoleAssignment("generated", 0.85, "file in generated/build output directory")
-
-    if _matches_any(path, _VENDOR_DIR_PATTERNS):
-        return RoleAssignment("vendor", 0.85, "file in vendored third-party directory")
-
-    # ── Priority 6: Test fixtures (before tests, more specific) ──
-    if _matches_any(path, _FIXTURE_PATTERNS):
-        return RoleAssignment("fixture", 0.85, "test fixture or sample data")
-
-    # ── Priority 7: Tests ──
-    if _matches_any(path, _TEST_PATTERNS):
-        return RoleAssignment("test", 0.85, "test file")
-
-    # ── Priority 8: Schema files ──
-    if _matches_any(path, _SCHEMA_PATTERNS):
-        return RoleAssignment("schema", 0.85, "schema definition")
-
-    # ── Priority 9: Architecture / design docs ──
-    if name in _DOC_ARCH_NAMES:
-        return RoleAssignment("doc_architecture", 0.90, f"'{name}' is an architecture document")
+# ── Compiled classifier ──
+
+# Glob tiers are grouped into stages by where they sit between the name and
+# extension lookups of the cascade in CompiledProfile.assign().
+_STAGE_ENTRYPOINT = 0  # before lockfiles
+_STAGE_CI = 1  # before filename roles
+_STAGE_LAYOUT = 2  # generated .. schema: before architecture doc names
+_STAGE_DOCS = 3  # architecture dirs, API docs, scripts: before public API names
+_STAGE_LATE = 4  # internal modules, custom roles: before extensions
+
+_BUILTIN_TIERS: list[tuple[int, list[str], RoleAssignment]] = [
+    (_STAGE_CI, _CI_PATTERNS, RoleAssignment("ci", 0.90, "CI/CD pipeline definition")),
+    (
+        _STAGE_LAYOUT,
+        _GENERATED_DIR_PATTERNS,
+        RoleAssignment("generated", 0.85, "file in generated/build output directory"),
+    ),
+    (_STAGE_LAYOUT, _VENDOR_DIR_PATTERNS, RoleAssignment("vendor", 0.85, "file in vendored third-party directory")),
+    (_STAGE_LAYOUT, _FIXTURE_PATTERNS, RoleAssignment("fixture", 0.85, "test fixture or sample data")),
+    (_STAGE_LAYOUT, _TEST_PATTERNS, RoleAssignment("test", 0.85, "test file")),
+    (_STAGE_LAYOUT, _SCHEMA_PATTERNS, RoleAssignment("schema", 0.85, "schema definition")),
+    (_STAGE_DOCS, _DOC_ARCH_PATTERNS, RoleAssignment("doc_architecture", 0.80, "file in architecture docs directory")),
+    (_STAGE_DOCS, _DOC_API_PATTERNS, RoleAssignment("doc_api", 0.80, "file in API documentation directory")),
+    (_STAGE_DOCS, _SCRIPT_PATTERNS, RoleAssignment("script", 0.75, "file in scripts/tools directory")),
+    (_STAGE_LATE, _INTERNAL_INDICATORS, RoleAssignment("internal", 0.70, "internal/private module")),
+]
 
-    if _matches_any(path, _DOC_ARCH_PATTERNS):
-        return RoleAssignment("doc_architecture", 0.80, "file in architecture docs directory")
+_NO_HIT: tuple[int, RoleAssignment | None] = (_STAGE_LATE + 1, None)
 
-    # ── Priority 10: API docs ──
-    if _matches_any(path, _DOC_API_PATTERNS):
-        return RoleAssignment("doc_api", 0.80, "file in API documentation directory")
 
-    # ── Priority 11: Scripts ──
-    if _matches_any(path, _SCRIPT_PATTERNS):
-        return RoleAssignment("script", 0.75, "file in scripts/tools directory")
+def _name_ext_depth(path: str, parts: list[str]) -> tuple[str, str, int]:
+    """(name, lowercased suffix, part count) as PurePosixPath computes them; parts is path.split("/")."""
+    if "" in parts or "." in parts:
+        # Only unusual paths need PurePosixPath's normalisation
+        posix = PurePosixPath(path)
+        return posix.name, posix.suffix.lower(), len(posix.parts)
+    name = parts[-1]
+    dot = name.rfind(".")
+    ext = name[dot:].lower() if 0 < dot < len(name) - 1 else ""
+    return name, ext, len(parts)
 
-    # ── Priority 12: Public API modules ──
-    if name in _PUBLIC_API_NAMES and ext in _SOURCE_EXTS:
-        # Only if it's in a src-like directory (not root-level)
-        if len(posix.parts) >= 2:
-            return RoleAssignment("public_api", 0.70, f"'{name}' is typically a public API surface")
 
-    # ── Priority 13: Internal modules ──
-    if _matches_any(path, _INTERNAL_INDICATORS):
-        return RoleAssignment("internal", 0.70, "internal/private module")
+class CompiledProfile:
+    """A profile's role rules compiled once.
 
-    # ── Priority 14: Custom roles from profile ──
-    for custom in profile.custom_roles:
-        if _matches_any(path, custom.patterns):
-            return RoleAssignment(custom.name, custom.confidence, f"custom role '{custom.name}' via pattern match")
+    Every glob tier of the cascade (profile entrypoints, the built-in
+    directory and filename globs, custom roles) goes into one GlobTiers in
+    priority order, so one lookup finds the highest-priority glob tier.
+    The filename and extension tables are plain dict/set lookups. Results
+    are identical to the fnmatch cascade.
+    """
 
+    def __init__(self, profile: Profile) -> None:
+        self.profile = profile
+        self._hits: list[tuple[int, RoleAssignment]] = []
+        tiers: list[list[str]] = []
+
+        def add(stage: int, patterns: list[str], assignment: RoleAssignment) -> None:
+            tiers.append(patterns)
+            self._hits.append((stage, assignment))
+
+        # One tier per entrypoint pattern, since the reason names the pattern
+        for pattern in profile.entrypoint_patterns:
+            add(
+                _STAGE_ENTRYPOINT,
+                [pattern],
+                RoleAssignment("entrypoint", 0.95, f"matches profile entrypoint pattern '{pattern}'"),
+            )
+        for stage, patterns, assignment in _BUILTIN_TIERS:
+            add(stage, patterns, assignment)
+        for custom in profile.custom_roles:
+            add(
+                _STAGE_LATE,
+                custom.patterns,
+                RoleAssignment(custom.name, custom.confidence, f"custom role '{custom.name}' via pattern match"),
+            )
+        self._tier_patterns = tiers
+        self._tiers = GlobTiers(tiers)
+        self._steps: list[tuple[str, _Step]] | None = None
+
+    def assign(self, path: str, dir_rank: int | None = None) -> RoleAssignment:
+        """Same result as assign_role(path, self.profile).
+
+        dir_rank is GlobTiers.dir_rank() of the path's directory, if known.
+        """
+        parts = path.split("/")
+        name, ext, depth = _name_ext_depth(path, parts)
+        tier = self._tiers.first(path, parts, dir_rank)
+        stage, hit = _NO_HIT if tier is None else self._hits[tier]
+
+        # ── Priority 1: Profile entrypoints (highest confidence) ──
+        if stage == _STAGE_ENTRYPOINT:
+            return hit
+
+        # ── Priority 2: Lockfiles (unambiguous) ──
+        if name in _LOCKFILES:
+            return RoleAssignment("lockfile", 0.95, f"'{name}' is a known lock file")
+
+        # ── Priority 3: CI pipelines ──
+        if stage == _STAGE_CI:
+            return hit
+
+        # ── Priority 4: Filename-based roles ──
+        if name in _NAME_ROLES:
+            role, conf, reason = _NAME_ROLES[name]
+            return RoleAssignment(role, conf, reason)
+
+        # ── Priorities 5-8: Generated, vendor, fixtures, tests, schemas ──
+        if stage == _STAGE_LAYOUT:
+            return hit
+
+        # ── Priority 9: Architecture / design docs ──
+        if name in _DOC_ARCH_NAMES:
+            return RoleAssignment("doc_architecture", 0.90, f"'{name}' is an architecture document")
+
+        # ── Priorities 9-11: Architecture doc dirs, API docs, scripts ──
+        if stage == _STAGE_DOCS:
+            return hit
+
+        # ── Priority 12: Public API modules ──
+        if name in _PUBLIC_API_NAMES and ext in _SOURCE_EXTS:
+            # Only if it's in a src-like directory (not root-level)
+            if depth >= 2:
+                return RoleAssignment("public_api", 0.70, f"'{name}' is typically a public API surface")
+
+        # ── Priorities 13-14: Internal modules, custom roles from profile ──
+        if hit is not None:
+            return hit
+
+        return _assign_by_extension(name, ext)
+
+    def assign_many(self, paths: list[str]) -> list[RoleAssignment]:
+        """assign() for each path, deciding directory-level globs once per directory.
+
+        Equal assignments are returned as one shared object.
+        """
+        dir_rank = self._tiers.dir_rank
+        ranks: dict[str, int] = {}
+        interned: dict[RoleAssignment, RoleAssignment] = {}
+        out: list[RoleAssignment] = []
+        for path in paths:
+            head = path[: path.rfind("/") + 1]
+            rank = ranks.get(head)
+            if rank is None:
+                rank = ranks[head] = dir_rank(head)
+            a = self.assign(path, rank)
+            out.append(interned.setdefault(a, a))
+        return out
+
+    # ── Instrumented classification ──
+
+    def _trace_steps(self) -> list[tuple[str, _Step]]:
+        """The cascade as one step per priority tier, each with its own matcher (built on first use)."""
+        if self._steps is not None:
+            return self._steps
+        entries = len(self.profile.entrypoint_patterns)
+        builtin = entries + len(_BUILTIN_TIERS)
+
+        def glob(index: int) -> _Step:
+            return _glob_step(self._tier_patterns[index : index + 1], [self._hits[index][1]])
+
+        steps: list[tuple[str, _Step]] = [
+            ("entrypoint", _glob_step(self._tier_patterns[:entries], [a for _, a in self._hits[:entries]])),
+            ("lockfile", _lockfile_step),
+            ("ci", glob(entries)),
+            ("filename", _filename_step),
+            *((self._hits[i][1].role, glob(i)) for i in range(entries + 1, entries + 6)),
+            ("doc_architecture_name", _arch_name_step),
+            *((self._hits[i][1].role, glob(i)) for i in range(entries + 6, builtin - 1)),
+            ("public_api", _public_api_step),
+            ("internal", glob(builtin - 1)),
+            *((f"custom:{custom.name}", glob(builtin + i)) for i, custom in enumerate(self.profile.custom_roles)),
+            *_EXTENSION_STEPS,
+        ]
+        self._steps = steps
+        return steps
+
+    def trace(self, path: str, stats: RoleStats) -> RoleAssignment:
+        """assign() tier by tier, recording each tier's checks, hits and time in stats.
+
+        Slower than assign() (the tiers are not matched together); same result.
+        """
+        parts = path.split("/")
+        name, ext, depth = _name_ext_depth(path, parts)
+        clock = time.perf_counter_ns
+        for tier, step in self._trace_steps():
+            start = clock()
+            a = step(path, name, ext, depth)
+            stats.record(tier, clock() - start, a is not None)
+            if a is not None:
+                return a
+        raise AssertionError("the 'unknown' tier always matches")
+
+    def trace_many(self, paths: list[str], stats: RoleStats) -> list[RoleAssignment]:
+        """trace() for each path; every tier appears in stats, even if never reached."""
+        stats.add_tiers(tier for tier, _ in self._trace_steps())
+        return [self.trace(path, stats) for path in paths]
+
+
+def _assign_by_extension(name: str, ext: str) -> RoleAssignment:
+    """The extension-based tail of the cascade (priority 15 onwards)."""
     # ── Priority 15: Extension-based roles (lower confidence) ──
     if ext in _EXT_ROLES:
         role, conf, reason = _EXT_ROLES[ext]
@@ -437,3 +555,171 @@ def assign_role(path: str, profile: Profile) -> RoleAssignment:
 
     # ── Fallback: unknown ──
     return RoleAssignment("unknown", 0.30, f"no heuristic matched for '{name}'")
+
+
+# Instance attribute holding a profile's CompiledProfile. Profiles are frozen
+# (and unhashable), so it is set with object.__setattr__; it is not a
+# dataclass field and does not affect equality, repr or replace().
+_COMPILED_ATTR = "_compiled_roles"
+
+
+def compile_profile(profile: Profile) -> CompiledProfile:
+    """The CompiledProfile for a profile, compiled on first use and kept on the profile."""
+    compiled = profile.__dict__.get(_COMPILED_ATTR)
+    if compiled is None:
+        compiled = CompiledProfile(profile)
+        object.__setattr__(profile, _COMPILED_ATTR, compiled)
+    return compiled
+
+
+def assign_role(path: str, profile: Profile) -> RoleAssignment:
+    """Assign a role to a file path based on the profile and heuristics.
+
+    Returns a RoleAssignment with role, confidence (0.0-1.0), and reason.
+    The assignment is deterministic: same inputs always produce same outputs.
+    """
+    return compile_profile(profile).assign(path)
+
+
+def assign_roles(paths: list[str], profile: Profile, stats: RoleStats | None = None) -> list[RoleAssignment]:
+    """assign_role() for many paths at once, in input order.
+
+    Directory-level globs ("tests/**", "vendor/**", "**/fixtures/**") are
+    matched once per directory rather than once per file, which pays off
+    on sorted listings of large trees. With stats, each path instead goes
+    through the cascade tier by tier and the per-tier counters are added
+    to stats.
+    """
+    compiled = compile_profile(profile)
+    if stats is not None:
+        return compiled.trace_many(paths, stats)
+    return compiled.assign_many(paths)
+
+
+# ── Tier statistics ──
+
+
+@dataclass
+class TierStats:
+    """Counters for one priority tier: paths that reached it, paths it classified, time spent testing."""
+
+    checks: int = 0
+    hits: int = 0
+    ns: int = 0
+
+
+class RoleStats:
+    """Opt-in per-tier counters for role classification.
+
+    Filled by assign_roles(..., stats=...), which then runs the cascade
+    tier by tier. Tiers are kept in priority order; custom roles appear as
+    "custom:<name>".
+    """
+
+    def __init__(self) -> None:
+        self.tiers: dict[str, TierStats] = {}
+        self.paths = 0
+
+    def add_tiers(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.tiers.setdefault(name, TierStats())
+
+    def record(self, tier: str, ns: int, hit: bool) -> None:
+        entry = self.tiers.get(tier)
+        if entry is None:
+            entry = self.tiers[tier] = TierStats()
+        entry.checks += 1
+        entry.ns += ns
+        if hit:
+            entry.hits += 1
+            self.paths += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "paths": self.paths,
+            "tiers": [
+                {"tier": name, "checks": t.checks, "hits": t.hits, "time_us": round(t.ns / 1000, 1)}
+                for name, t in self.tiers.items()
+            ],
+        }
+
+
+def format_role_stats(stats: dict) -> list[str]:
+    """Format RoleStats.to_dict() as a table of per-tier checks, hits and time."""
+    lines = [f"Role tiers ({stats['paths']} paths, instrumented)"]
+    lines.append(f"{'Tier':<28s}  {'Checks':>8s}  {'Hits':>8s}  {'Time':>10s}")
+    lines.append("-" * 60)
+    for tier in stats["tiers"]:
+        lines.append(
+            f"{tier['tier']:<28s}  {tier['checks']:>8d}  {tier['hits']:>8d}  {_format_us(tier['time_us']):>10s}"
+        )
+    return lines
+
+
+def _format_us(us: float) -> str:
+    if us < 1000:
+        return f"{us:.0f} us"
+    if us < 1_000_000:
+        return f"{us / 1000:.1f} ms"
+    return f"{us / 1_000_000:.2f} s"
+
+
+# ── Cascade steps for trace() ──
+
+# (path, name, lowercased suffix, part count) -> assignment, or None to fall through
+_Step = Callable[[str, str, str, int], "RoleAssignment | None"]
+
+
+def _glob_step(tiers: list[list[str]], assignments: list[RoleAssignment]) -> _Step:
+    matcher = GlobTiers(tiers)
+
+    def step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+        tier = matcher.first(path)
+        return None if tier is None else assignments[tier]
+
+    return step
+
+
+def _lockfile_step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+    if name in _LOCKFILES:
+        return RoleAssignment("lockfile", 0.95, f"'{name}' is a known lock file")
+    return None
+
+
+def _filename_step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+    if name in _NAME_ROLES:
+        return RoleAssignment(*_NAME_ROLES[name])
+    return None
+
+
+def _arch_name_step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+    if name in _DOC_ARCH_NAMES:
+        return RoleAssignment("doc_architecture", 0.90, f"'{name}' is an architecture document")
+    return None
+
+
+def _public_api_step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+    if name in _PUBLIC_API_NAMES and ext in _SOURCE_EXTS and depth >= 2:
+        return RoleAssignment("public_api", 0.70, f"'{name}' is typically a public API surface")
+    return None
+
+
+def _extension_step(exts: set[str] | dict[str, tuple[str, float, str]] | None) -> _Step:
+    """A step for one extension tier of _assign_by_extension(); None = the final fallback."""
+
+    def step(path: str, name: str, ext: str, depth: int) -> RoleAssignment | None:
+        if exts is None or ext in exts:
+            return _assign_by_extension(name, ext)
+        return None
+
+    return step
+
+
+_EXTENSION_STEPS: list[tuple[str, _Step]] = [
+    ("extension", _extension_step(_EXT_ROLES)),
+    ("asset", _extension_step(_ASSET_EXTS)),
+    ("data", _extension_step(_DATA_EXTS)),
+    ("source", _extension_step(_SOURCE_EXTS)),
+    ("json_yaml", _extension_step({".json", ".yaml", ".yml"})),
+    ("unknown", _extension_step(None)),
+]
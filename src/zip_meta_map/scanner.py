@@ -3,55 +3,492 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import os
+import threading
 import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
-from fnmatch import fnmatch
-from pathlib import Path, PurePosixPath
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, TypeVar
+
+# load/save_hash_cache are re-exported: they lived here before cache.py
+from zip_meta_map.cache import HashCache, open_hash_cache
+from zip_meta_map.cache import load_hash_cache as load_hash_cache
+from zip_meta_map.cache import save_hash_cache as save_hash_cache
+from zip_meta_map.globs import GitignoreRules, IgnoreMatcher
+
+# Below this many files a thread pool costs more than it saves
+PARALLEL_MIN_FILES = 100
+
+# Files up to this size are read whole so one read serves hashing and
+# analysis. Larger files are hashed in blocks and their bytes are not kept.
+DEFAULT_MAX_CONTENT_BYTES = 16 * 1024 * 1024
+
+# Block size for files over the content cap that are streamed to a StreamAnalyzer
+STREAM_BLOCK_BYTES = 1024 * 1024
+
+_T = TypeVar("_T")
+
+# How much work a file gets, decided from its path before anything is read
+CONTENT_FULL = "full"  # hash, and analyze the bytes
+CONTENT_HASH = "hash"  # hash only: no content, no source
+CONTENT_SKIP = "skip"  # neither read nor hashed
+CONTENT_LEVELS = (CONTENT_FULL, CONTENT_HASH, CONTENT_SKIP)
+
+_COMPRESSION_NAMES = {
+    zipfile.ZIP_STORED: "stored",
+    zipfile.ZIP_DEFLATED: "deflated",
+    zipfile.ZIP_BZIP2: "bzip2",
+    zipfile.ZIP_LZMA: "lzma",
+}
+
+
+class ContentSource(ABC):
+    """Lazy handle on one file's bytes.
+
+    get() loads them on first call and keeps them until release(). Scanners
+    attach a source to every file within the content cap, so bytes are only
+    held while something is using them rather than for the whole scan.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: bytes | None = None) -> None:
+        self._data = data
+
+    @abstractmethod
+    def _load(self) -> bytes:
+        """Read the bytes from wherever they live."""
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def get(self) -> bytes:
+        data = self._data
+        if data is None:
+            data = self._data = self._load()
+        return data
+
+    def release(self) -> None:
+        self._data = None
+
+
+class FileSource(ContentSource):
+    """A file on disk."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: Path, data: bytes | None = None) -> None:
+        super().__init__(data)
+        self.path = path
+
+    def _load(self) -> bytes:
+        return self.path.read_bytes()
+
+
+class ZipReader:
+    """Inflates members of one archive for ZipMemberSource.
+
+    ZipFile handles are not thread-safe, so each thread opens its own on
+    first use. Handles are kept until close(); use the reader as a context
+    manager. After close(), read() opens and closes a handle per call, so
+    sources from a finished scan can still load their bytes.
+    """
+
+    def __init__(self, zip_path: Path) -> None:
+        self.path = zip_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handles: list[zipfile.ZipFile] = []
+        self._closed = False
+
+    def __enter__(self) -> ZipReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def read(self, info: zipfile.ZipInfo) -> bytes:
+        if self._closed:
+            with zipfile.ZipFile(self.path, "r") as zf:
+                return zf.read(info)
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.path, "r")
+            with self._lock:
+                self._handles.append(zf)
+        return zf.read(info)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            for zf in self._handles:
+                zf.close()
+            self._handles.clear()
+            self._local = threading.local()
+
+
+class ZipMemberSource(ContentSource):
+    """A ZIP member, inflated through a shared ZipReader."""
+
+    __slots__ = ("reader", "info")
+
+    def __init__(self, reader: ZipReader, info: zipfile.ZipInfo, data: bytes | None = None) -> None:
+        super().__init__(data)
+        self.reader = reader
+        self.info = info
+
+    def _load(self) -> bytes:
+        return self.reader.read(self.info)
 
 
 @dataclass
 class ScannedFile:
     path: str
     size_bytes: int
-    sha256: str
+    sha256: str | None
+    # Bytes kept for the caller (retain_content=True)
     content: bytes | None = None
+    crc32: str | None = None
+    compression: str | None = None
+    # Cache validation fields (stat fields, or ZIP CRC32 + sizes) from an incremental scan
+    stamp: dict | None = None
+    # Index entry reused from the cache; content is not read when this is set
+    cached_entry: dict | None = None
+    # Lazy handle on the bytes, for files within the content cap
+    source: ContentSource | None = field(default=None, compare=False, repr=False)
+    # What the scan's analyze hook returned while the bytes were loaded
+    analysis: dict | None = None
+    # CONTENT_FULL, CONTENT_HASH or CONTENT_SKIP, from the scan's plan
+    content_work: str = CONTENT_FULL
+
+    def load_content(self) -> bytes | None:
+        """Return the file's bytes: retained content, else loaded through source."""
+        if self.content is not None:
+            return self.content
+        return self.source.get() if self.source is not None else None
+
+    def release_content(self) -> None:
+        """Drop bytes loaded through source (retained content is left alone)."""
+        if self.source is not None:
+            self.source.release()
+
+
+# Called on a worker thread with each freshly read file; its result is stored in ScannedFile.analysis
+Analyzer = Callable[[ScannedFile], dict]
+
+# Maps a relative path to its content level (CONTENT_FULL, CONTENT_HASH or CONTENT_SKIP)
+ContentPlan = Callable[[str], str]
+
+# Called on a worker thread with (path, size_bytes, blocks) for a CONTENT_FULL file
+# over the content cap, while the blocks are read and hashed; its result is stored in
+# ScannedFile.analysis
+StreamAnalyzer = Callable[[str, int, Iterator[bytes]], dict]
+
+
+@lru_cache(maxsize=32)
+def _compiled(ignore_globs: tuple[str, ...]) -> IgnoreMatcher:
+    return IgnoreMatcher(list(ignore_globs))
 
 
 def _should_ignore(path: str, ignore_globs: list[str]) -> bool:
     """Check if a path matches any ignore glob."""
-    posix = PurePosixPath(path)
-    path_str = str(posix)
-    for glob in ignore_globs:
-        if fnmatch(path_str, glob):
-            return True
-        # For directory globs like "__pycache__/**", check if any path
-        # component matches the directory name. Only applies to simple
-        # globs without ** prefix (those are handled by fnmatch above).
-        if glob.endswith("/**") and not glob.startswith("**/"):
-            dir_name = glob.split("/")[0]
-            for part in posix.parts:
-                if fnmatch(part, dir_name):
-                    return True
-        # For **/dir/** patterns, check if any component matches the dir name
-        if glob.startswith("**/") and glob.endswith("/**"):
-            dir_name = glob.split("/")[1]
-            for part in posix.parts[:-1]:  # skip the filename itself
-                if fnmatch(part, dir_name):
-                    return True
+    return _compiled(tuple(ignore_globs)).matches(path)
+
+
+def _read_gitignore(path: str) -> GitignoreRules | None:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            rules = GitignoreRules(f.read())
+    except OSError:
+        return None
+    return rules or None
+
+
+def _gitignored(frames: list[list[GitignoreRules]], prefixes: list[str], rel: str, is_dir: bool) -> bool:
+    """Apply .gitignore levels deepest first; the first level with a matching pattern decides."""
+    for level in range(len(frames) - 1, -1, -1):
+        rules_list = frames[level]
+        if not rules_list:
+            continue
+        sub = rel[len(prefixes[level]) :]
+        for rules in reversed(rules_list):
+            verdict = rules.match(sub, is_dir)
+            if verdict is not None:
+                return verdict
     return False
 
 
+def _walk(root: Path, matcher: IgnoreMatcher, gitignore: bool = False) -> Iterator[tuple[str, os.DirEntry]]:
+    """Yield (relative POSIX path, DirEntry) for every non-ignored file under root.
+
+    Entries are visited in name order, depth-first, which reproduces the order
+    of sorted(root.rglob("*")). Directories whose whole subtree is ignored are
+    never opened. Symlinked directories are not followed, matching rglob().
+
+    With gitignore=True, each directory's .gitignore (and .git/info/exclude at
+    the root) is compiled when the directory is opened and applied on top of
+    the matcher. As in git, a file inside an ignored directory cannot be
+    re-included, so ignored directories are pruned.
+    """
+    stack: list[Iterator[os.DirEntry]] = []
+    prefixes: list[str] = []
+    frames: list[list[GitignoreRules]] = []
+
+    def _open(path: str, prefix: str) -> None:
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except PermissionError:
+            return
+        stack.append(iter(entries))
+        prefixes.append(prefix)
+        if gitignore:
+            sources = [os.path.join(path, ".gitignore")]
+            if not prefix:
+                sources.insert(0, os.path.join(path, ".git", "info", "exclude"))
+            frames.append([rules for rules in map(_read_gitignore, sources) if rules is not None])
+
+    _open(str(root), "")
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            prefixes.pop()
+            if gitignore:
+                frames.pop()
+            continue
+        rel = prefixes[-1] + entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not matcher.prunes(rel) and not (gitignore and _gitignored(frames, prefixes, rel, True)):
+                _open(entry.path, rel + "/")
+            continue
+        try:
+            is_file = entry.is_file()
+        except OSError:
+            is_file = False
+        if is_file and not matcher.matches(rel) and not (gitignore and _gitignored(frames, prefixes, rel, False)):
+            yield rel, entry
+
+
 def _sha256(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def _keeps_content(size: int, retain_content: bool, max_content_bytes: int | None) -> bool:
+    return retain_content and (max_content_bytes is None or size <= max_content_bytes)
+
+
+def _read_file(fpath: Path, size: int, keep: bool) -> tuple[str, bytes | None]:
+    """Hash a file, returning its bytes only if keep is set.
+
+    Files that are not kept are streamed through hashlib in fixed-size
+    blocks, so memory stays flat regardless of file size.
+    """
+    if keep:
+        data = fpath.read_bytes()
+        return _sha256(data), data
+    with open(fpath, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest(), None
+
+
+def _hashing_blocks(fh: BinaryIO, update: Callable[[bytes], None]) -> Iterator[bytes]:
+    while block := fh.read(STREAM_BLOCK_BYTES):
+        update(block)
+        yield block
+
+
+def _stream_read(fh: BinaryIO, path: str, size: int, stream: StreamAnalyzer) -> tuple[str, dict]:
+    """Feed a file's blocks to stream() as they are read and hashed: one read for both.
+
+    Returns (sha256, stream's result). Blocks stream() leaves unconsumed are
+    still read and hashed.
+    """
+    h = hashlib.sha256()
+    blocks = _hashing_blocks(fh, h.update)
+    analysis = stream(path, size, blocks)
+    for _ in blocks:
+        pass
+    return h.hexdigest(), analysis
+
+
+def _finish(
+    f: ScannedFile, source: ContentSource | None, retain_content: bool, analyze: Analyzer | None
+) -> ScannedFile:
+    """Give a scanned file its bytes and run analyze() while they are loaded.
+
+    source may already hold the bytes read for hashing. Unless retain_content
+    is set they are released afterwards and the source reloads them on demand,
+    so a scan holds at most one file's bytes per worker.
+    """
+    f.source = source
+    if source is None:
+        return f
+    if retain_content and f.cached_entry is None:
+        f.content = source.get()
+    if analyze is not None and f.cached_entry is None:
+        f.analysis = analyze(f)
+    source.release()
+    return f
+
+
+def list_directory(
+    root: Path, ignore_globs: list[str], gitignore: bool = False, stats: dict[str, os.stat_result] | None = None
+) -> list[str]:
+    """List the files under a directory without reading or hashing them.
+
+    Returns sorted relative POSIX paths, in the same order scan_directory()
+    emits them. Cheap enough to run before a profile has been chosen.
+    With gitignore=True, paths ignored by .gitignore files are left out too.
+    With stats, each listed file's DirEntry.stat() result is stored under
+    its path, for scan_paths() and scan_paths_cached() to reuse.
+    """
+    paths: list[str] = []
+    for rel, entry in _walk(root.resolve(), IgnoreMatcher(ignore_globs), gitignore):
+        paths.append(rel)
+        if stats is not None:
+            try:
+                stats[rel] = entry.stat()
+            except OSError:
+                pass  # the scan stats it again and reports the error
+    return paths
+
+
+def iter_directory_levels(
+    root: Path, ignore_globs: list[str], max_depth: int | None = None, gitignore: bool = False
+) -> Iterator[str]:
+    """Yield the files list_directory() would list, breadth-first.
+
+    All files directly under root come first, then those one level down,
+    and so on (name order within each directory). Directories below
+    max_depth path components are never opened, and a caller that stops
+    iterating early never opens the deeper levels at all.
+    """
+    matcher = IgnoreMatcher(ignore_globs)
+    # (directory, its prefix, .gitignore frames of it and its ancestors, their prefixes)
+    level: list[tuple[str, str, list[list[GitignoreRules]], list[str]]] = [(str(root.resolve()), "", [], [])]
+    depth = 1
+    while level and (max_depth is None or depth <= max_depth):
+        next_level: list[tuple[str, str, list[list[GitignoreRules]], list[str]]] = []
+        for path, prefix, frames, prefixes in level:
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except PermissionError:
+                continue
+            if gitignore:
+                sources = [os.path.join(path, ".gitignore")]
+                if not prefix:
+                    sources.insert(0, os.path.join(path, ".git", "info", "exclude"))
+                frames = frames + [[rules for rules in map(_read_gitignore, sources) if rules is not None]]
+                prefixes = prefixes + [prefix]
+            for entry in entries:
+                rel = prefix + entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if not matcher.prunes(rel) and not (gitignore and _gitignored(frames, prefixes, rel, True)):
+                        next_level.append((entry.path, rel + "/", frames, prefixes))
+                    continue
+                try:
+                    is_file = entry.is_file()
+                except OSError:
+                    is_file = False
+                if is_file and not matcher.matches(rel):
+                    if not (gitignore and _gitignored(frames, prefixes, rel, False)):
+                        yield rel
+        level = next_level
+        depth += 1
+
+
+def filter_paths(paths: list[str], ignore_globs: list[str]) -> list[str]:
+    """Drop paths matching any ignore glob, preserving order."""
+    matches = IgnoreMatcher(ignore_globs).matches
+    return [p for p in paths if not matches(p)]
+
+
+def default_workers(file_count: int) -> int:
+    """Pick a thread count for scanning file_count files (1 = sequential)."""
+    if file_count < PARALLEL_MIN_FILES:
+        return 1
+    return min(os.cpu_count() or 4, 8)
+
+
+def _map(fn: Callable[[str], _T], paths: list[str], max_workers: int) -> list[_T]:
+    """Apply fn to every path, on a thread pool when max_workers > 1. Order is preserved."""
+    if max_workers <= 1 or len(paths) < 2:
+        return [fn(rel) for rel in paths]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(fn, paths))
+
+
+def scan_paths(
+    root: Path,
+    paths: list[str],
+    retain_content: bool = False,
+    max_workers: int = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+    stats: dict[str, os.stat_result] | None = None,
+) -> list[ScannedFile]:
+    """Read and hash files from a listing produced by list_directory().
+
+    Args:
+        root: Directory the paths are relative to.
+        paths: Relative POSIX paths, already filtered and sorted.
+        retain_content: If True, keep file bytes in ScannedFile.content.
+        max_workers: Threads used for reading and hashing (1 = sequential).
+        max_content_bytes: Files larger than this are stream-hashed and get
+            no content or source. None = no cap.
+        analyze: Called on the worker thread with each file while its bytes
+            are loaded (see _finish()); the result goes to ScannedFile.analysis.
+        plan: Content level per path. CONTENT_HASH files are stream-hashed
+            and get no content or source; CONTENT_SKIP files are only stat'ed.
+            None = CONTENT_FULL for every file.
+        stream: Gets the blocks of CONTENT_FULL files over the content cap
+            while they are hashed (see _stream_read()); the result goes to
+            ScannedFile.analysis.
+        stats: Stat results already taken by list_directory(stats=...);
+            paths without one are stat'ed here.
+    """
+    root = root.resolve()
+    wants_bytes = retain_content or analyze is not None
+
+    def _process_file(rel: str) -> ScannedFile:
+        fpath = root / rel
+        size = _stat(fpath, rel, stats).st_size
+        work = plan(rel) if plan is not None else CONTENT_FULL
+        if work == CONTENT_SKIP:
+            return ScannedFile(path=rel, size_bytes=size, sha256=None, content_work=work)
+        fits = work == CONTENT_FULL and _keeps_content(size, True, max_content_bytes)
+        if stream is not None and work == CONTENT_FULL and not fits:
+            with open(fpath, "rb") as fh:
+                sha, analysis = _stream_read(fh, rel, size, stream)
+            return ScannedFile(path=rel, size_bytes=size, sha256=sha, analysis=analysis, content_work=work)
+        sha, content = _read_file(fpath, size, fits and wants_bytes)
+        f = ScannedFile(path=rel, size_bytes=size, sha256=sha, content_work=work)
+        return _finish(f, FileSource(fpath, content) if fits else None, retain_content, analyze)
+
+    return _map(_process_file, paths, max_workers)
+
+
 def scan_directory(
     root: Path,
     ignore_globs: list[str],
     retain_content: bool = False,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
 ) -> list[ScannedFile]:
     """Scan a directory and return a list of ScannedFile entries.
 
@@ -59,27 +496,11 @@ def scan_directory(
         root: Directory to scan.
         ignore_globs: Patterns to exclude.
         retain_content: If True, keep file bytes in ScannedFile.content.
+        max_content_bytes: Per-file cap on retained content (None = no cap).
     """
-    files: list[ScannedFile] = []
-    root = root.resolve()
-
-    for fpath in sorted(root.rglob("*")):
-        if not fpath.is_file():
-            continue
-        rel = fpath.relative_to(root).as_posix()
-        if _should_ignore(rel, ignore_globs):
-            continue
-        data = fpath.read_bytes()
-        files.append(
-            ScannedFile(
-                path=rel,
-                size_bytes=len(data),
-                sha256=_sha256(data),
-                content=data if retain_content else None,
-            )
-        )
-
-    return files
+    stats: dict[str, os.stat_result] = {}
+    paths = list_directory(root, ignore_globs, stats=stats)
+    return scan_paths(root, paths, retain_content, max_content_bytes=max_content_bytes, stats=stats)
 
 
 def scan_directory_parallel(
@@ -87,6 +508,7 @@ def scan_directory_parallel(
     ignore_globs: list[str],
     retain_content: bool = False,
     max_workers: int | None = None,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
 ) -> list[ScannedFile]:
     """Scan a directory using parallel I/O for large repos.
 
@@ -95,90 +517,414 @@ def scan_directory_parallel(
     """
     root = root.resolve()
 
-    # Collect paths first (sequential — fast)
-    paths: list[Path] = []
-    for fpath in sorted(root.rglob("*")):
-        if not fpath.is_file():
-            continue
-        rel = fpath.relative_to(root).as_posix()
-        if _should_ignore(rel, ignore_globs):
-            continue
-        paths.append(fpath)
+    # Collect paths first (sequential — fast, no reads)
+    stats: dict[str, os.stat_result] = {}
+    paths = list_directory(root, ignore_globs, stats=stats)
 
     # For small dirs, just use sequential scan
-    if len(paths) < 100:
-        return scan_directory(root, ignore_globs, retain_content)
+    if len(paths) < PARALLEL_MIN_FILES:
+        return scan_paths(root, paths, retain_content, max_content_bytes=max_content_bytes, stats=stats)
 
-    def _process_file(fpath: Path) -> ScannedFile:
-        rel = fpath.relative_to(root).as_posix()
-        data = fpath.read_bytes()
-        return ScannedFile(
-            path=rel,
-            size_bytes=len(data),
-            sha256=_sha256(data),
-            content=data if retain_content else None,
+    workers = max_workers or default_workers(len(paths))
+    return scan_paths(
+        root, paths, retain_content, max_workers=workers, max_content_bytes=max_content_bytes, stats=stats
+    )
+
+
+def _read_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, keep: bool) -> tuple[str, bytes | None]:
+    """Hash a ZIP member, returning its bytes only if keep is set."""
+    if keep:
+        data = zf.read(info.filename)
+        return _sha256(data), data
+    with zf.open(info.filename) as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest(), None
+
+
+def list_zip(zip_path: Path, ignore_globs: list[str]) -> list[str]:
+    """List member paths from a ZIP's central directory without decompressing."""
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        names = sorted(info.filename for info in zf.infolist() if not info.is_dir())
+    return filter_paths(names, ignore_globs)
+
+
+def _zip_members(zf: zipfile.ZipFile, ignore_globs: list[str]) -> list[zipfile.ZipInfo]:
+    """Return the non-ignored file members of a ZIP, sorted by name."""
+    matcher = IgnoreMatcher(ignore_globs)
+    return [
+        info
+        for info in sorted(zf.infolist(), key=lambda i: i.filename)
+        if not info.is_dir() and not matcher.matches(info.filename)
+    ]
+
+
+def scan_zip_metadata(zip_path: Path, ignore_globs: list[str]) -> list[ScannedFile]:
+    """Describe ZIP members from the central directory alone.
+
+    No member is decompressed: entries carry the stored CRC32 and compression
+    method instead of a SHA-256, and no content.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = _zip_members(zf, ignore_globs)
+    return [
+        ScannedFile(
+            path=info.filename,
+            size_bytes=info.file_size,
+            sha256=None,
+            crc32=f"{info.CRC:08x}",
+            compression=_COMPRESSION_NAMES.get(info.compress_type, f"method_{info.compress_type}"),
         )
+        for info in members
+    ]
+
+
+def _scan_members(
+    zf: zipfile.ZipFile,
+    members: list[zipfile.ZipInfo],
+    retain_content: bool,
+    max_content_bytes: int | None,
+    reader: ZipReader,
+    hits: dict[str, tuple[str, dict | None]] | None = None,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+) -> list[ScannedFile]:
+    """Hash ZIP members.
+
+    hits maps member names to a cached (sha256, index entry or None). Those
+    members are not hashed again, and are only read if their content is
+    wanted and no cached entry makes it unnecessary. CONTENT_FULL members
+    within the content cap get a ZipMemberSource over reader; larger ones
+    are inflated block by block through stream, if given.
+    """
+    wants_bytes = retain_content or analyze is not None
+    files: list[ScannedFile] = []
+    for info in members:
+        work = plan(info.filename) if plan is not None else CONTENT_FULL
+        stamp = _member_stamp(info) if hits is not None else None
+        if work == CONTENT_SKIP:
+            files.append(
+                ScannedFile(path=info.filename, size_bytes=info.file_size, sha256=None, stamp=stamp, content_work=work)
+            )
+            continue
+        fits = work == CONTENT_FULL and _keeps_content(info.file_size, True, max_content_bytes)
+        keep = fits and wants_bytes
+        streams = stream is not None and work == CONTENT_FULL and not fits
+        hit = hits.get(info.filename) if hits is not None else None
+        analysis = None
+        if hit is None:
+            if streams:
+                with zf.open(info.filename) as fh:
+                    sha, analysis = _stream_read(fh, info.filename, info.file_size, stream)
+                content = None
+            else:
+                sha, content = _read_member(zf, info, keep)
+            entry = None
+        else:
+            sha, entry = hit
+            if streams and entry is None:
+                with zf.open(info.filename) as fh:
+                    _, analysis = _stream_read(fh, info.filename, info.file_size, stream)
+            content = zf.read(info.filename) if keep and entry is None else None
+        f = ScannedFile(
+            path=info.filename,
+            size_bytes=info.file_size,
+            sha256=sha,
+            stamp=stamp,
+            cached_entry=entry,
+            analysis=analysis,
+            content_work=work,
+        )
+        source = ZipMemberSource(reader, info, content) if fits else None
+        files.append(_finish(f, source, retain_content, analyze))
+    return files
+
+
+def _scan_zip_members(
+    zip_path: Path,
+    members: list[zipfile.ZipInfo],
+    retain_content: bool,
+    max_workers: int | None,
+    max_content_bytes: int | None,
+    hits: dict[str, tuple[str, dict | None]] | None = None,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+) -> list[ScannedFile]:
+    """Scan members on a thread pool, one ZipFile handle per task, preserving order.
+
+    The ZipReader behind the members' sources is closed once the scan is done.
+    """
+    workers = max_workers or default_workers(len(members))
+    with ZipReader(zip_path) as reader:
+        if workers <= 1 or len(members) < PARALLEL_MIN_FILES:
+            with zipfile.ZipFile(zip_path, "r") as zf:
+                return _scan_members(
+                    zf, members, retain_content, max_content_bytes, reader, hits, analyze, plan, stream
+                )
+
+        # A few slices per worker keeps threads busy when member sizes are uneven
+        slice_size = max(1, -(-len(members) // (workers * 4)))
+        slices = [members[i : i + slice_size] for i in range(0, len(members), slice_size)]
 
-    workers = max_workers or min(os.cpu_count() or 4, 8)
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        results = list(pool.map(_process_file, paths))
+        def _scan_slice(infos: list[zipfile.ZipInfo]) -> list[ScannedFile]:
+            with zipfile.ZipFile(zip_path, "r") as own:
+                return _scan_members(own, infos, retain_content, max_content_bytes, reader, hits, analyze, plan, stream)
 
-    # Sort by path for deterministic output
-    results.sort(key=lambda f: f.path)
-    return results
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return [f for chunk in pool.map(_scan_slice, slices) for f in chunk]
 
 
 def scan_zip(
     zip_path: Path,
     ignore_globs: list[str],
     retain_content: bool = False,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
 ) -> list[ScannedFile]:
-    """Scan a ZIP archive and return a list of ScannedFile entries."""
-    files: list[ScannedFile] = []
+    """Scan a ZIP archive and return a list of ScannedFile entries.
 
-    with zipfile.ZipFile(zip_path, "r") as zf:
-        for info in sorted(zf.infolist(), key=lambda i: i.filename):
-            if info.is_dir():
-                continue
-            rel = info.filename
-            if _should_ignore(rel, ignore_globs):
-                continue
-            data = zf.read(info.filename)
-            files.append(
-                ScannedFile(
-                    path=rel,
-                    size_bytes=info.file_size,
-                    sha256=_sha256(data),
-                    content=data if retain_content else None,
-                )
-            )
+    Members larger than max_content_bytes are inflated and hashed in blocks
+    and their content is not retained.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf, ZipReader(zip_path) as reader:
+        members = _zip_members(zf, ignore_globs)
+        return _scan_members(zf, members, retain_content, max_content_bytes, reader)
 
-    return files
+
+def scan_zip_parallel(
+    zip_path: Path,
+    ignore_globs: list[str],
+    retain_content: bool = False,
+    max_workers: int | None = None,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+) -> list[ScannedFile]:
+    """Scan a ZIP archive, inflating and hashing members on a thread pool.
+
+    ZipFile handles are not safe to share between threads, so each task
+    opens its own handle and processes a contiguous slice of the central
+    directory. zlib and hashlib release the GIL, so threads scale here.
+    Output order is identical to scan_zip(). Falls back to a sequential
+    scan for small archives (<100 members) or max_workers=1.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = _zip_members(zf, ignore_globs)
+    return _scan_zip_members(
+        zip_path, members, retain_content, max_workers, max_content_bytes, analyze=analyze, plan=plan, stream=stream
+    )
 
 
 # ── Incremental cache ──
 
-_CACHE_VERSION = 1
 
+def hash_records(files: list[ScannedFile]) -> dict[str, dict]:
+    """Cache records ({sha256, **stamp}) for files from an incremental scan."""
+    return {f.path: {"sha256": f.sha256, **(f.stamp or {})} for f in files}
+
+
+def _reusable_entry(record: dict, analysis_key: str | None) -> dict | None:
+    """Return a record's cached index entry if it was made under analysis_key."""
+    if analysis_key is None or record.get("analysis") != analysis_key:
+        return None
+    return record.get("entry")
+
+
+def _stat(fpath: Path, rel: str, stats: dict[str, os.stat_result] | None) -> os.stat_result:
+    """The walk's stat result for rel if it kept one, else a fresh stat."""
+    st = stats.get(rel) if stats is not None else None
+    return st if st is not None else fpath.stat()
+
+
+def _file_stamp(stat: os.stat_result) -> dict:
+    """Stat fields that identify an unchanged file."""
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "ctime_ns": stat.st_ctime_ns,
+        "ino": stat.st_ino,
+        "dev": stat.st_dev,
+    }
 
-def load_hash_cache(cache_path: Path) -> dict[str, dict]:
-    """Load cached file hashes. Returns {path: {sha256, size, mtime}}."""
-    if not cache_path.exists():
-        return {}
+
+def _moved_away(old_path: Path, stat: os.stat_result) -> bool:
+    """True if old_path no longer holds another file: it is gone, or is the same inode (a hard link)."""
     try:
-        data = json.loads(cache_path.read_text(encoding="utf-8"))
-        if data.get("version") != _CACHE_VERSION:
-            return {}
-        return data.get("entries", {})
-    except (json.JSONDecodeError, KeyError):
-        return {}
+        old = old_path.stat()
+    except OSError:
+        return True
+    return (old.st_dev, old.st_ino) == (stat.st_dev, stat.st_ino)
+
 
+def _match_record(
+    cache: HashCache, root: Path, rel: str, stat: os.stat_result, stamp: dict, blob: str | None
+) -> tuple[dict | None, str | None, bool]:
+    """Find the cache record that describes a file.
 
-def save_hash_cache(cache_path: Path, entries: dict[str, dict]) -> None:
-    """Save file hash cache."""
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    data = {"version": _CACHE_VERSION, "entries": entries}
-    cache_path.write_text(json.dumps(data), encoding="utf-8")
+    Returns (record, source_path, unchanged). source_path is the path the
+    record was stored under, which differs from rel for renames and copies.
+    unchanged means the file is known to hold the record's bytes, so it
+    need not be hashed.
+    """
+    cached = cache.get(rel)
+    if cached is not None and cached.get("sha256") is None:
+        cached = None  # written for a skipped file: no hash to reuse
+    if cached is not None:
+        unchanged = all(cached.get(k) == v for k, v in stamp.items())
+        return cached, rel, unchanged or (blob is not None and cached.get("blob") == blob)
+    if stat.st_ino:
+        found = cache.find_inode(stat.st_dev, stat.st_ino)
+        if (
+            found is not None
+            and found[1].get("sha256") is not None
+            and found[1].get("size") == stat.st_size
+            and found[1].get("mtime_ns") == stat.st_mtime_ns
+            and _moved_away(root / found[0], stat)
+        ):
+            # An unchanged ctime means nothing touched the inode since it was
+            # cached (a parent directory was renamed). Otherwise the inode may
+            # have been freed and reused by a new file with the same size and
+            # mtime, so the file is re-hashed and only matching bytes reuse the record.
+            return found[1], found[0], found[1].get("ctime_ns") == stat.st_ctime_ns
+    if blob is not None:
+        found = cache.find_blob(blob)
+        if found is not None:
+            return found[1], found[0], True
+    return None, None, False
+
+
+def scan_paths_cached(
+    root: Path,
+    paths: list[str],
+    cache: HashCache,
+    retain_content: bool = False,
+    max_workers: int = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    analysis_key: str | None = None,
+    rename_keeps_entry: Callable[[str, str], bool] | None = None,
+    clean_blob: Callable[[str, os.stat_result], str | None] | None = None,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+    stats: dict[str, os.stat_result] | None = None,
+) -> list[ScannedFile]:
+    """Scan a listing against already-loaded cache records.
+
+    Files whose size, st_mtime_ns, st_ctime_ns, st_ino and st_dev all match
+    the record for their path reuse its hash. A path with no record is looked
+    up by (st_dev, st_ino). A file found that way whose old path is gone,
+    with the same size and st_mtime_ns, is a rename or move. It reuses the
+    old path's hash outright if its st_ctime_ns is unchanged too (a parent
+    directory was renamed). Otherwise it is re-hashed (inodes get reused),
+    and the old record still counts if the bytes match.
+
+    clean_blob(path, stat) may vouch for a file's git blob ID (see
+    gitindex.GitIndex.clean_blob). A record with the same blob, under this
+    path or any other, then supplies the hash even if the stat data differs
+    (fresh clone, new checkout directory).
+
+    When the record also holds an index entry made under analysis_key, that
+    entry is attached as cached_entry and the file is not read at all. An
+    entry found under another path is only carried over (with its path
+    updated) if rename_keeps_entry(old_path, new_path) says the new path
+    would produce the same entry. Each file's stamp holds the fields to store
+    back; the cache itself is not written. analyze, plan and stream are as
+    for scan_paths(); analyze and stream skip files with a cached entry, and
+    CONTENT_SKIP files never consult the cache. stats are reused as in
+    scan_paths().
+    """
+    root = root.resolve()
+    wants_bytes = retain_content or analyze is not None
+
+    def _process_file(rel: str) -> ScannedFile:
+        fpath = root / rel
+        stat = _stat(fpath, rel, stats)
+        size = stat.st_size
+        stamp = _file_stamp(stat)
+        work = plan(rel) if plan is not None else CONTENT_FULL
+        if work == CONTENT_SKIP:
+            return ScannedFile(path=rel, size_bytes=size, sha256=None, stamp=stamp, content_work=work)
+        blob = clean_blob(rel, stat) if clean_blob is not None else None
+
+        record, source, unchanged = _match_record(cache, root, rel, stat, stamp, blob)
+        fits = work == CONTENT_FULL and _keeps_content(size, True, max_content_bytes)
+        keep = fits and wants_bytes
+        streams = stream is not None and work == CONTENT_FULL and not fits
+        entry = None
+        analysis = None
+        if unchanged:
+            # Cache hit — use cached hash, and the cached analysis if still valid
+            sha = record["sha256"]
+            entry = _reusable_entry(record, analysis_key)
+            if entry is not None and source != rel:
+                keeps = rename_keeps_entry is not None and rename_keeps_entry(source, rel)
+                entry = dict(entry, path=rel) if keeps else None
+            if streams and entry is None:
+                with open(fpath, "rb") as fh:
+                    _, analysis = _stream_read(fh, rel, size, stream)
+            content = fpath.read_bytes() if keep and entry is None else None
+        else:
+            # Cache miss — hash the file. Same bytes (e.g. only touched) keep their analysis.
+            if streams:
+                with open(fpath, "rb") as fh:
+                    sha, analysis = _stream_read(fh, rel, size, stream)
+                content = None
+            else:
+                sha, content = _read_file(fpath, size, keep)
+            if record is not None and record.get("sha256") == sha:
+                entry = _reusable_entry(record, analysis_key)
+                if entry is not None and source != rel:
+                    keeps = rename_keeps_entry is not None and rename_keeps_entry(source, rel)
+                    entry = dict(entry, path=rel) if keeps else None
+
+        if blob is not None:
+            stamp["blob"] = blob
+        f = ScannedFile(
+            path=rel,
+            size_bytes=size,
+            sha256=sha,
+            stamp=stamp,
+            cached_entry=entry,
+            analysis=analysis,
+            content_work=work,
+        )
+        return _finish(f, FileSource(fpath, content) if fits else None, retain_content, analyze)
+
+    return _map(_process_file, paths, max_workers)
+
+
+def scan_paths_incremental(
+    root: Path,
+    paths: list[str],
+    cache_path: Path,
+    retain_content: bool = False,
+    max_workers: int = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    stats: dict[str, os.stat_result] | None = None,
+) -> list[ScannedFile]:
+    """Scan a listing using cached hashes for unchanged files.
+
+    Files are considered unchanged when size, nanosecond mtime/ctime, inode
+    and device match the cache; renamed files are matched by inode (see
+    scan_paths_cached()). Changed files are re-hashed (on max_workers
+    threads). The cache is rewritten after scanning and only keeps entries
+    for the given paths.
+    """
+    cache = open_hash_cache(cache_path)
+    try:
+        files = scan_paths_cached(
+            root,
+            paths,
+            cache,
+            retain_content,
+            max_workers=max_workers,
+            max_content_bytes=max_content_bytes,
+            stats=stats,
+        )
+        cache.save(hash_records(files))
+    finally:
+        cache.close()
+    return files
 
 
 def scan_directory_incremental(
@@ -186,41 +932,88 @@ def scan_directory_incremental(
     ignore_globs: list[str],
     cache_path: Path,
     retain_content: bool = False,
+    max_workers: int = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
 ) -> list[ScannedFile]:
     """Scan a directory using cached hashes for unchanged files.
 
-    Files are considered unchanged when path + size + mtime match the cache.
-    Changed files are re-hashed. The cache is updated after scanning.
+    Files are considered unchanged when size, nanosecond mtime/ctime, inode
+    and device match the cache. Changed files are re-hashed. The cache is
+    updated after scanning.
     """
-    cache = load_hash_cache(cache_path)
-    files: list[ScannedFile] = []
-    new_cache: dict[str, dict] = {}
-    root = root.resolve()
+    stats: dict[str, os.stat_result] = {}
+    paths = list_directory(root, ignore_globs, stats=stats)
+    return scan_paths_incremental(
+        root,
+        paths,
+        cache_path,
+        retain_content,
+        max_workers=max_workers,
+        max_content_bytes=max_content_bytes,
+        stats=stats,
+    )
 
-    for fpath in sorted(root.rglob("*")):
-        if not fpath.is_file():
-            continue
-        rel = fpath.relative_to(root).as_posix()
-        if _should_ignore(rel, ignore_globs):
+
+def _member_stamp(info: zipfile.ZipInfo) -> dict:
+    """Central-directory fields that identify an unchanged ZIP member."""
+    return {"size": info.file_size, "crc": info.CRC, "compress_size": info.compress_size}
+
+
+def scan_zip_cached(
+    zip_path: Path,
+    ignore_globs: list[str],
+    cache: HashCache,
+    retain_content: bool = False,
+    max_workers: int | None = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+    analysis_key: str | None = None,
+    analyze: Analyzer | None = None,
+    plan: ContentPlan | None = None,
+    stream: StreamAnalyzer | None = None,
+) -> list[ScannedFile]:
+    """Scan a ZIP archive against already-loaded cache records.
+
+    The ZIP counterpart of scan_paths_cached(): members whose name + CRC32 +
+    compressed size + uncompressed size match a record reuse its hash, and
+    its index entry when made under analysis_key.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = _zip_members(zf, ignore_globs)
+
+    hits: dict[str, tuple[str, dict | None]] = {}
+    for info in members:
+        cached = cache.get(info.filename)
+        if not cached or cached.get("sha256") is None:
             continue
+        if all(cached.get(k) == v for k, v in _member_stamp(info).items()):
+            hits[info.filename] = (cached["sha256"], _reusable_entry(cached, analysis_key))
 
-        stat = fpath.stat()
-        size = stat.st_size
-        mtime = stat.st_mtime
+    return _scan_zip_members(
+        zip_path, members, retain_content, max_workers, max_content_bytes, hits, analyze, plan, stream
+    )
 
-        cached = cache.get(rel)
-        if cached and cached.get("size") == size and cached.get("mtime") == mtime:
-            # Cache hit — use cached hash
-            sha = cached["sha256"]
-            content = fpath.read_bytes() if retain_content else None
-        else:
-            # Cache miss — hash the file
-            data = fpath.read_bytes()
-            sha = _sha256(data)
-            content = data if retain_content else None
 
-        new_cache[rel] = {"sha256": sha, "size": size, "mtime": mtime}
-        files.append(ScannedFile(path=rel, size_bytes=size, sha256=sha, content=content))
+def scan_zip_incremental(
+    zip_path: Path,
+    ignore_globs: list[str],
+    cache_path: Path,
+    retain_content: bool = False,
+    max_workers: int | None = 1,
+    max_content_bytes: int | None = DEFAULT_MAX_CONTENT_BYTES,
+) -> list[ScannedFile]:
+    """Scan a ZIP archive using cached hashes for unchanged members.
 
-    save_hash_cache(cache_path, new_cache)
+    Members are considered unchanged when name + CRC32 + compressed size +
+    uncompressed size from the central directory match the cache. Unchanged
+    members are never decompressed unless their content is retained.
+    Changed members are inflated and hashed. The cache is updated after scanning.
+    """
+    cache = open_hash_cache(cache_path)
+    try:
+        files = scan_zip_cached(
+            zip_path, ignore_globs, cache, retain_content, max_workers=max_workers, max_content_bytes=max_content_bytes
+        )
+        cache.save(hash_records(files))
+    finally:
+        cache.close()
     return files
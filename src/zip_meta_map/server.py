@@ -15,6 +15,7 @@ except ImportError:
 
 from zip_meta_map.builder import build, validate_index
 from zip_meta_map.profiles import ALL_PROFILES
+from zip_meta_map.scanner import DEFAULT_MAX_CONTENT_BYTES
 
 
 def create_server() -> "Server":
@@ -50,6 +51,38 @@ def create_server() -> "Server":
                             "type": "boolean",
                             "description": "Return only the JSON index, skip FRONT.md (default: false)",
                         },
+                        "workers": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "Threads for reading and hashing files (default: chosen from file count)",
+                        },
+                        "cache_path": {
+                            "type": "string",
+                            "description": "Incremental build cache: .json file or SQLite by suffix (default: none)",
+                        },
+                        "max_content_bytes": {
+                            "type": "integer",
+                            "minimum": 0,
+                            "description": "Larger files are hashed by streaming and not analyzed (default: 16 MiB)",
+                        },
+                        "metadata_only": {
+                            "type": "boolean",
+                            "description": (
+                                "ZIP inputs only: index the central directory without decompressing "
+                                "(CRC32 instead of SHA-256, no content-derived fields)"
+                            ),
+                        },
+                        "git_index": {
+                            "type": "boolean",
+                            "description": (
+                                "Git work trees: list tracked files from .git/index instead of walking "
+                                "(falls back to walking if the index can't be read)"
+                            ),
+                        },
+                        "gitignore": {
+                            "type": "boolean",
+                            "description": "Directories: also skip files ignored by .gitignore and .git/info/exclude",
+                        },
                     },
                 },
             ),
@@ -72,6 +105,38 @@ def create_server() -> "Server":
                             "enum": list(ALL_PROFILES.keys()),
                             "description": "Force a specific profile (default: auto-detect)",
                         },
+                        "workers": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "Threads for reading and hashing files (default: chosen from file count)",
+                        },
+                        "cache_path": {
+                            "type": "string",
+                            "description": "Incremental build cache: .json file or SQLite by suffix (default: none)",
+                        },
+                        "max_content_bytes": {
+                            "type": "integer",
+                            "minimum": 0,
+                            "description": "Larger files are hashed by streaming and not analyzed (default: 16 MiB)",
+                        },
+                        "metadata_only": {
+                            "type": "boolean",
+                            "description": (
+                                "ZIP inputs only: index the central directory without decompressing "
+                                "(CRC32 instead of SHA-256, no content-derived fields)"
+                            ),
+                        },
+                        "git_index": {
+                            "type": "boolean",
+                            "description": (
+                                "Git work trees: list tracked files from .git/index instead of walking "
+                                "(falls back to walking if the index can't be read)"
+                            ),
+                        },
+                        "gitignore": {
+                            "type": "boolean",
+                            "description": "Directories: also skip files ignored by .gitignore and .git/info/exclude",
+                        },
                     },
                 },
             ),
@@ -154,6 +219,22 @@ def create_server() -> "Server":
     return server
 
 
+def _scan_options(arguments: dict) -> dict:
+    """Map optional tool arguments onto build() scan keywords."""
+    cache_path = arguments.get("cache_path")
+    max_content_bytes = arguments.get("max_content_bytes", DEFAULT_MAX_CONTENT_BYTES)
+    if max_content_bytes is not None and max_content_bytes < 0:
+        raise ValueError(f"max_content_bytes must be at least 0, got: {max_content_bytes}")
+    return {
+        "max_workers": arguments.get("workers"),
+        "cache_path": Path(cache_path) if cache_path else None,
+        "max_content_bytes": max_content_bytes,
+        "metadata_only": arguments.get("metadata_only", False),
+        "git_index": arguments.get("git_index", False),
+        "gitignore": arguments.get("gitignore", False),
+    }
+
+
 def _handle_build(arguments: dict) -> list["TextContent"]:
     from mcp.types import TextContent
 
@@ -164,7 +245,7 @@ def _handle_build(arguments: dict) -> list["TextContent"]:
     profile_name = arguments.get("profile")
     manifest_only = arguments.get("manifest_only", False)
 
-    front, index = build(input_path, profile_name=profile_name)
+    front, index = build(input_path, profile_name=profile_name, **_scan_options(arguments))
 
     if manifest_only:
         return [TextContent(type="text", text=json.dumps(index, indent=2))]
@@ -183,7 +264,7 @@ def _handle_explain(arguments: dict) -> list["TextContent"]:
         return [TextContent(type="text", text=f"Error: {input_path} does not exist")]
 
     profile_name = arguments.get("profile")
-    _, index = build(input_path, profile_name=profile_name)
+    _, index = build(input_path, profile_name=profile_name, **_scan_options(arguments))
 
     # Build explain data
     files = index["files"]
@@ -0,0 +1,72 @@
+"""Decode-once text view over a file's bytes.
+
+Chunking, excerpting and risk detection all want the same strict UTF-8
+text. A TextView decodes it on first use and hands the same string to
+every consumer. Bytes that sniff as binary, by a NUL
+or a well-known magic number in the first block, are never decoded.
+"""
+
+from __future__ import annotations
+
+# Leading bytes inspected by the binary sniff
+SNIFF_BYTES = 8192
+
+# Magic numbers of common binary formats. ASCII-only signatures too short
+# to tell apart from ordinary text ("MZ", "BZh", "ID3") are left out.
+_BINARY_MAGIC = (
+    b"\x89PNG\r\n\x1a\n",
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF87a",
+    b"GIF89a",
+    b"%PDF-",
+    b"PK\x03\x04",  # ZIP, JAR, wheel, docx
+    b"PK\x05\x06",  # empty ZIP
+    b"\x1f\x8b",  # gzip
+    b"\xfd7zXZ\x00",
+    b"7z\xbc\xaf\x27\x1c",
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"\x7fELF",
+    b"\xca\xfe\xba\xbe",  # Java class, Mach-O fat
+    b"\xcf\xfa\xed\xfe",  # Mach-O 64-bit
+    b"\xce\xfa\xed\xfe",  # Mach-O 32-bit
+    b"\x00asm",  # WebAssembly
+    b"wOFF",
+    b"wOF2",
+    b"SQLite format 3\x00",
+)
+
+
+def has_nul(data: bytes) -> bool:
+    """True if a NUL byte occurs in the first SNIFF_BYTES."""
+    return data.find(b"\x00", 0, SNIFF_BYTES) != -1
+
+
+def sniff_binary(data: bytes) -> bool:
+    """True if data is obviously binary: a NUL or a known magic number up front."""
+    return data.startswith(_BINARY_MAGIC) or has_nul(data)
+
+
+class TextView:
+    """A file's bytes with their UTF-8 text, decoded at most once.
+
+    text is None when the bytes sniff as binary or are not valid UTF-8.
+    """
+
+    __slots__ = ("data", "binary", "_text", "_decoded")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.binary = sniff_binary(data)
+        self._text: str | None = None
+        self._decoded = False
+
+    @property
+    def text(self) -> str | None:
+        if not self._decoded:
+            self._decoded = True
+            if not self.binary:
+                try:
+                    self._text = self.data.decode("utf-8", errors="strict")
+                except UnicodeDecodeError:
+                    pass
+        return self._text
@@ -0,0 +1,250 @@
+"""Tests for the single-pass content analyzer."""
+
+import random
+import re
+
+import pytest
+
+from zip_meta_map.analyzer import analyze_content, excerpt_from_text
+from zip_meta_map.chunker import CHUNK_THRESHOLD_BYTES, chunk_text, is_chunkable
+from zip_meta_map.safety import detect_risk_flags
+from zip_meta_map.textview import TextView, sniff_binary
+
+# ── Reference: the per-module passes the analyzer replaces ──
+
+
+def _reference_text(content: bytes) -> str | None:
+    if sniff_binary(content):
+        return None
+    try:
+        return content.decode("utf-8", errors="strict")
+    except UnicodeDecodeError:
+        return None
+
+
+def _reference_excerpt(content: bytes) -> str | None:
+    text = _reference_text(content)
+    if text is None:
+        return None
+    lines = text.splitlines()
+    if not lines:
+        return None
+    excerpt = "\n".join(lines[:8])
+    if len(excerpt.encode("utf-8")) > 1024:
+        excerpt = excerpt[:1024]
+        last_nl = excerpt.rfind("\n")
+        if last_nl > 0:
+            excerpt = excerpt[:last_nl]
+    return excerpt if excerpt.strip() else None
+
+
+# Frozen copy of detect_risk_flags() as it was before the analyzer, so a
+# regression in the shared code cannot also move the expected output.
+_BASELINE_EXEC = [
+    re.compile(r"\b(subprocess|os\.system|os\.popen|shlex|exec|eval)\b"),
+    re.compile(r"\b(child_process|spawn|execSync|execFile)\b"),
+    re.compile(r"\b(system|popen|backtick|exec)\b"),
+]
+_BASELINE_SECRET = [
+    re.compile(r"(?i)(api[_-]?key|secret[_-]?key|password|token|credential)\s*[=:]"),
+    re.compile(r"(?i)(aws[_-]?access|aws[_-]?secret|private[_-]?key)"),
+    re.compile(r"(?:^|\s)(sk-[a-zA-Z0-9]{20,}|ghp_[a-zA-Z0-9]{36,}|AKIA[A-Z0-9]{16})"),
+]
+_BASELINE_NETWORK = [
+    re.compile(r"\b(requests\.|urllib|fetch\(|axios|http\.get|https\.get)\b"),
+    re.compile(r"\b(socket|websocket|net\.connect)\b"),
+]
+_BASELINE_BINARY_EXTS = {".exe", ".dll", ".so", ".dylib", ".bin", ".dat", ".class", ".pyc", ".pyo", ".wasm"}
+_BASELINE_TEXT_EXTS = {
+    ".py", ".ts", ".js", ".md", ".json", ".yaml", ".yml", ".toml", ".txt", ".rst", ".html", ".css", ".xml", ".sh",
+}  # fmt: skip
+
+
+def _baseline_risk_flags(path: str, content: bytes) -> list[str]:
+    flags: list[str] = []
+    name = path.rsplit("/", 1)[-1] if "/" in path else path
+    ext = ""
+    dot = name.rfind(".")
+    if dot >= 0:
+        ext = name[dot:].lower()
+    if ".." in path.split("/"):
+        flags.append("path_traversal")
+    if ext in _BASELINE_TEXT_EXTS and b"\x00" in content[:8192]:
+        flags.append("binary_masquerade")
+    if ext in _BASELINE_BINARY_EXTS:
+        flags.append("binary_executable")
+    if ext not in _BASELINE_BINARY_EXTS:
+        try:
+            text = content.decode("utf-8", errors="strict")
+        except UnicodeDecodeError:
+            return flags
+        for flag, patterns in (
+            ("exec_shell", _BASELINE_EXEC),
+            ("secrets_like", _BASELINE_SECRET),
+            ("network_io", _BASELINE_NETWORK),
+        ):
+            if any(p.search(text) for p in patterns):
+                flags.append(flag)
+    return flags
+
+
+_CONTENT_FLAGS = {"exec_shell", "secrets_like", "network_io"}
+
+
+def _reference_risk_flags(path: str, content: bytes) -> list[str]:
+    flags = _baseline_risk_flags(path, content)
+    # The one intended change since: bytes that sniff as binary are not scanned
+    if sniff_binary(content):
+        flags = [f for f in flags if f not in _CONTENT_FLAGS]
+    return flags
+
+
+def _reference(path: str, content: bytes, wants_excerpt: bool) -> dict:
+    fields: dict = {}
+    text = _reference_text(content)
+    if is_chunkable(path, len(content)) and text is not None:
+        chunks = chunk_text(text)
+        if chunks:
+            fields["chunks"] = [c.to_dict() for c in chunks]
+    if wants_excerpt:
+        excerpt = _reference_excerpt(content)
+        if excerpt:
+            fields["excerpt"] = excerpt
+    flags = _reference_risk_flags(path, content)
+    if flags:
+        fields["risk_flags"] = flags
+    return fields
+
+
+_PIECES = [
+    "def f():\n",
+    "    return 1\n",
+    "# Heading\n",
+    "## Sub heading\r\n",
+    "plain line\r",
+    "form\x0cfeed\x0bvtab\n",
+    "\x1c\x1d\x1e\x1f sep\n",
+    "   \n",
+    "\n",
+    "\t\n",
+    "café   next\x85 line\n",
+    "api_key = 'x'\n",
+    "AKIA" + "A" * 16 + "\n",
+    "import subprocess\n",
+    "requests.get(url)\n",
+    "x" * 5000 + "\n",
+    "　wide space　\n",
+]
+
+
+def _random_content(rng: random.Random, ascii_only: bool) -> bytes:
+    pieces = [p for p in _PIECES if p.isascii()] if ascii_only else _PIECES
+    text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 900)))
+    data = text.encode("utf-8")
+    roll = rng.random()
+    if roll < 0.1:
+        data += b"\xff\xfe"  # not UTF-8
+    elif roll < 0.2:
+        data = b"\x00" + data  # NUL in the first block
+    elif roll < 0.25:
+        data = b"x" * 9000 + b"\x00" + data  # NUL past the sniffed block
+    elif roll < 0.3:
+        data = b"%PDF-" + data  # binary magic number
+    return data
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_separate_passes(seed):
+    rng = random.Random(seed)
+    content = _random_content(rng, ascii_only=seed % 2 == 0)
+    for path in ("src/mod.py", "docs/guide.md", "notes.txt", "tool.exe", "lib/x.so", "../up.json", "image.png"):
+        for wants_excerpt in (False, True):
+            result = analyze_content(path, content, len(content), wants_excerpt)
+            assert result.fields() == _reference(path, content, wants_excerpt), (path, wants_excerpt)
+
+
+@pytest.mark.parametrize(
+    "path, content, expected",
+    [
+        ("src/mod.py", b"\x00import subprocess\n", ["binary_masquerade"]),
+        ("../docs/a.md", b"# A\x00\n", ["path_traversal", "binary_masquerade"]),
+        ("src/mod.py", b"x" * 9000 + b"\x00import subprocess\n", ["exec_shell"]),
+        ("notes.txt", b"%PDF-1.4 import subprocess\n", []),
+        ("image.png", b"\x00import subprocess\n", []),
+        ("image.png", b"import subprocess\n", ["exec_shell"]),
+        ("tool.exe", b"import subprocess\n", ["binary_executable"]),
+        ("lib/x.SO", b"\x00api_key = 1\n", ["binary_executable"]),
+        ("src/mod.py", b"import subprocess\n\xff\xfe", []),
+    ],
+)
+def test_binary_risk_flags(path, content, expected):
+    assert analyze_content(path, content, len(content), False).risk_flags == expected
+    assert detect_risk_flags(path, content, len(content)) == expected
+
+
+def test_chunks_match_chunk_text():
+    text = "".join(_PIECES[:9]) * 400
+    assert len(text) >= CHUNK_THRESHOLD_BYTES
+    data = text.encode("ascii")
+    fast = analyze_content("big.py", data, len(data), False).chunks
+    assert fast == chunk_text(text)
+
+
+def test_excerpt_only_scans_a_prefix():
+    long_first_line = "a" * 10_000 + "\nsecond\n"
+    assert excerpt_from_text(long_first_line) == _reference_excerpt(long_first_line.encode())
+    assert excerpt_from_text("\r\n" * 3000 + "x") is None
+
+
+def test_unread_content_gets_path_flags_only():
+    result = analyze_content("../escape.exe", None, 10, True)
+    assert result.text is None
+    assert result.fields() == {"risk_flags": ["path_traversal", "binary_executable"]}
+
+
+def test_binary_extension_skips_decode_when_unused():
+    assert analyze_content("tool.exe", b"MZ plain", 8, False).text is None
+    assert analyze_content("tool.py", b"print()", 7, False).text == "print()"
+
+
+# ── TextView ──
+
+
+def test_text_view_decodes_once():
+    view = TextView(b"line one\nline two\n")
+    assert view.text == "line one\nline two\n"
+    assert view.text is view.text
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\x89PNG\r\n\x1a\n\x00\x00",
+        b"PK\x03\x04plain",
+        b"\x7fELF",
+        b"%PDF-1.4\n",
+        b"text\x00with nul",
+    ],
+)
+def test_text_view_skips_decoding_binary(data):
+    view = TextView(data)
+    assert view.binary
+    assert view.text is None
+
+
+@pytest.mark.parametrize("data", [b"", b"MZ is also how this note starts\n", b"x" * 9000 + b"\x00", "café".encode()])
+def test_text_view_decodes_text(data):
+    view = TextView(data)
+    assert not view.binary
+    assert view.text == data.decode("utf-8")
+
+
+def test_text_view_invalid_utf8():
+    assert TextView(b"\xff\xfe text").text is None
+
+
+def test_binary_magic_skips_content_analysis():
+    # Decodes as UTF-8, but the PDF signature marks it binary: no chunks, excerpt or content flags
+    data = b"%PDF-1.4\nimport subprocess\n"
+    assert analyze_content("doc.md", data, len(data), True).fields() == {}
+    assert detect_risk_flags("doc.md", data, len(data)) == []
@@ -50,3 +50,14 @@ def test_benchmark_role_throughput():
     results = benchmark(FIXTURE_DIR, runs=1)
     assert "per_file_us" in results["phases"]["roles"]
     assert results["phases"]["roles"]["per_file_us"] > 0
+
+
+def test_benchmark_role_tiers():
+    """The instrumented pass counts every file once, and every tier is listed."""
+    results = benchmark(FIXTURE_DIR, runs=1)
+    stats = results["role_tiers"]
+    assert stats["paths"] == results["file_count"]
+    assert sum(t["hits"] for t in stats["tiers"]) == results["file_count"]
+    assert [t["tier"] for t in stats["tiers"]][:2] == ["entrypoint", "lockfile"]
+    assert stats["tiers"][-1]["tier"] == "unknown"
+    assert "Role tiers" in format_results(results)
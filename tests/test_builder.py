@@ -1,12 +1,23 @@
 """Tests for the core builder."""
 
 import json
+import shutil
 import zipfile
 from pathlib import Path
 
+import jsonschema
 import pytest
 
-from zip_meta_map.builder import build, build_index, detect_profile, load_policy, validate_index
+from zip_meta_map import scanner
+from zip_meta_map.builder import (
+    build,
+    build_index,
+    detect_profile,
+    detect_profile_from_paths,
+    load_policy,
+    validate_index,
+)
+from zip_meta_map.chunker import chunk_text
 from zip_meta_map.profiles import PYTHON_CLI
 from zip_meta_map.scanner import scan_directory
 
@@ -43,6 +54,32 @@ def test_detect_profile_python():
     assert profile.name == "python_cli"
 
 
+def test_detect_profile_from_paths():
+    assert detect_profile_from_paths(["Cargo.toml", "src/main.rs"]).name == "rust_cli"
+    assert detect_profile_from_paths(["src/App/App.csproj"]).name == "dotnet_cli"
+    assert detect_profile_from_paths(["pnpm-workspace.yaml", "package.json"]).name == "monorepo"
+
+
+def test_build_auto_detect_skips_ignored_content(tmp_path, monkeypatch):
+    """Auto-detection must not read files the chosen profile ignores."""
+    (tmp_path / "package.json").write_text("{}")
+    (tmp_path / "index.js").write_text("module.exports = 1;")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "index.js").write_text("x")
+
+    read: list[str] = []
+    original = Path.read_bytes
+
+    def _tracking_read(self):
+        read.append(self.relative_to(tmp_path).as_posix())
+        return original(self)
+
+    monkeypatch.setattr(Path, "read_bytes", _tracking_read)
+    _, index = build(tmp_path)
+    assert index["profile"] == "node_ts_tool"
+    assert sorted(read) == ["index.js", "package.json"]
+
+
 def test_build_index_valid_schema():
     files = scan_directory(FIXTURE_DIR, PYTHON_CLI.ignore_globs)
     index = build_index(files, PYTHON_CLI, "tiny_python_cli")
@@ -150,6 +187,224 @@ def test_build_invalid_input(tmp_path):
         build(bad)
 
 
+def test_build_parallel_matches_sequential():
+    _, sequential = build(FIXTURE_DIR, max_workers=1)
+    _, parallel = build(FIXTURE_DIR, max_workers=4)
+    assert parallel == sequential
+
+
+def test_build_incremental_cache(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    _, plain = build(FIXTURE_DIR)
+    _, first = build(FIXTURE_DIR, cache_path=cache_path)
+    assert cache_path.exists()
+    _, second = build(FIXTURE_DIR, cache_path=cache_path, max_workers=2)
+    assert first == plain
+    assert second == plain
+
+
+def test_build_cache_reuses_analysis(tmp_path, monkeypatch):
+    """A rebuild after a one-file change only reads and analyzes that file."""
+    project = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, project)
+    cache_path = tmp_path / "cache.json"
+    build(project, cache_path=cache_path)
+    assert all("entry" in r for r in json.loads(cache_path.read_text())["entries"].values())
+
+    (project / "README.md").write_text("# Changed\n\nNew readme.\n")
+    read: list[str] = []
+    real_read_bytes = Path.read_bytes
+
+    def tracking_read_bytes(self):
+        read.append(self.name)
+        return real_read_bytes(self)
+
+    monkeypatch.setattr(Path, "read_bytes", tracking_read_bytes)
+    _, cached = build(project, cache_path=cache_path)
+    monkeypatch.undo()
+
+    assert read == ["README.md"]
+    _, plain = build(project)
+    assert cached == plain
+    readme = next(f for f in cached["files"] if f["path"] == "README.md")
+    assert readme["excerpt"].startswith("# Changed")
+
+
+def test_build_cache_survives_directory_rename(tmp_path, monkeypatch):
+    """Renamed files keep their cached entry when the new path yields the same one."""
+    project = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, project)
+    cache_path = tmp_path / "cache.sqlite"
+    build(project, cache_path=cache_path)
+
+    (project / "src" / "tiny_cli").rename(project / "src" / "tiny_tool")
+    (project / "docs").mkdir()
+    (project / "tests" / "test_main.py").rename(project / "docs" / "example.py")
+
+    read: list[str] = []
+    real_read_bytes = Path.read_bytes
+
+    def tracking_read_bytes(self):
+        read.append(self.name)
+        return real_read_bytes(self)
+
+    monkeypatch.setattr(Path, "read_bytes", tracking_read_bytes)
+    _, cached = build(project, cache_path=cache_path)
+    monkeypatch.undo()
+
+    # main.py and __init__.py keep their roles under src/tiny_tool; the moved test does not
+    assert read == ["example.py"]
+    _, plain = build(project)
+    assert cached == plain
+
+
+def test_build_cache_invalidated_by_profile(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    build(FIXTURE_DIR, cache_path=cache_path)
+    _, forced = build(FIXTURE_DIR, profile_name="node_ts_tool", cache_path=cache_path)
+    _, plain = build(FIXTURE_DIR, profile_name="node_ts_tool")
+    assert forced == plain
+
+
+def test_build_zip_incremental_cache(tmp_path, monkeypatch):
+    zip_path = tmp_path / "fixture.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for fpath in sorted(FIXTURE_DIR.rglob("*")):
+            if fpath.is_file():
+                zf.write(fpath, str(fpath.relative_to(FIXTURE_DIR)))
+
+    cache_path = tmp_path / "cache.json"
+    _, plain = build(zip_path)
+    _, first = build(zip_path, cache_path=cache_path)
+
+    def no_open(*args, **kwargs):
+        raise AssertionError("unchanged member was decompressed")
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", no_open)
+    _, second = build(zip_path, cache_path=cache_path)
+    assert first == plain
+    assert second == plain
+
+
+def test_build_metadata_only_zip(tmp_path, monkeypatch):
+    """Metadata-only builds read the central directory and never open a member."""
+    zip_path = tmp_path / "fixture.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for fpath in sorted(FIXTURE_DIR.rglob("*")):
+            if fpath.is_file():
+                zf.write(fpath, str(fpath.relative_to(FIXTURE_DIR)))
+    _, full = build(zip_path)
+
+    def no_open(*args, **kwargs):
+        raise AssertionError("member was decompressed")
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", no_open)
+    _, index = build(zip_path, metadata_only=True)
+    validate_index(index)
+
+    assert index["metadata_only"] is True
+    assert "crc32" in index["capabilities"]
+    assert [f["path"] for f in index["files"]] == [f["path"] for f in full["files"]]
+    assert index["start_here"] == full["start_here"]
+    readme = next(f for f in index["files"] if f["path"] == "README.md")
+    assert "sha256" not in readme
+    assert "excerpt" not in readme
+    assert readme["compression"] == "deflated"
+    assert int(readme["crc32"], 16) == zipfile.ZipFile(zip_path).getinfo("README.md").CRC
+
+
+def test_build_metadata_only_rejects_directory():
+    with pytest.raises(ValueError, match="metadata_only"):
+        build(FIXTURE_DIR, metadata_only=True)
+
+
+def test_build_content_cap_skips_analysis():
+    """Files over max_content_bytes are hashed but not excerpted."""
+    _, index = build(FIXTURE_DIR, max_content_bytes=16)
+    readme = next(f for f in index["files"] if f["path"] == "README.md")
+    assert len(readme["sha256"]) == 64
+    assert "excerpt" not in readme
+    validate_index(index)
+
+
+def _with_big_files(tmp_path: Path) -> Path:
+    root = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, root)
+    body = "".join(f"## Part {i}\n" + "text line\r\n" * 300 for i in range(40))
+    (root / "docs").mkdir(exist_ok=True)
+    (root / "docs" / "big.md").write_text(body, newline="")
+    (root / "dump.sql").write_text("INSERT INTO t VALUES (1);\n" * 20_000)
+    (root / "blob.txt").write_bytes(b"text\n" * 5000 + b"\xff")
+    return root
+
+
+@pytest.mark.parametrize("as_zip", [False, True])
+def test_build_content_cap_streams_chunks(tmp_path, monkeypatch, as_zip):
+    """Chunkable files over max_content_bytes are chunked block by block, like in-memory ones."""
+    root = _with_big_files(tmp_path)
+    if as_zip:
+        root = Path(shutil.make_archive(str(tmp_path / "a"), "zip", root))
+    _, full = build(root)
+    monkeypatch.setattr(scanner, "STREAM_BLOCK_BYTES", 4097)
+    _, capped = build(root, max_content_bytes=1024)
+    by_path = {f["path"]: f for f in capped["files"]}
+    for f in full["files"]:
+        assert by_path[f["path"]]["sha256"] == f["sha256"]
+        assert by_path[f["path"]].get("chunks") == f.get("chunks"), f["path"]
+    assert len(by_path["dump.sql"]["chunks"]) == 200
+    assert by_path["docs/big.md"]["chunks"][1]["heading"] == "## Part 1"
+    assert "chunks" not in by_path["blob.txt"]
+    assert "excerpt" not in by_path["docs/big.md"]
+    validate_index(capped)
+
+
+@pytest.mark.parametrize("as_zip", [False, True])
+def test_build_content_cap_streams_on_cache_hit(tmp_path, as_zip):
+    """Cached hashes whose entries can't be reused are streamed for analysis alone."""
+    root = _with_big_files(tmp_path)
+    if as_zip:
+        root = Path(shutil.make_archive(str(tmp_path / "a"), "zip", root))
+    cache_path = tmp_path / "cache.json"
+    _, full = build(root, cache_path=cache_path)
+    _, capped = build(root, cache_path=cache_path, max_content_bytes=1024)
+    assert [f.get("chunks") for f in capped["files"]] == [f.get("chunks") for f in full["files"]]
+
+
+def test_build_index_loads_lazy_content():
+    """Files scanned without retained bytes are read on demand, one at a time."""
+    _, built = build(FIXTURE_DIR)
+    files = scan_directory(FIXTURE_DIR, PYTHON_CLI.ignore_globs)
+    assert all(f.content is None for f in files)
+    index = build_index(files, PYTHON_CLI, "tiny_python_cli")
+    assert index["files"] == built["files"]
+    assert not any(f.source.loaded for f in files)
+
+
+def test_build_zip_analyzes_while_scanning(tmp_path, monkeypatch):
+    """ZIP members are analyzed on the bytes read for hashing, never inflated twice."""
+    shutil.make_archive(str(tmp_path / "a"), "zip", FIXTURE_DIR)
+    reads: list[str] = []
+    real_read = zipfile.ZipFile.read
+
+    def tracking_read(self, name, pwd=None):
+        reads.append(getattr(name, "filename", name))
+        return real_read(self, name, pwd)
+
+    monkeypatch.setattr(zipfile.ZipFile, "read", tracking_read)
+    _, index = build(tmp_path / "a.zip")
+    assert sorted(reads) == sorted(f["path"] for f in index["files"])
+
+
+def test_build_rejects_zero_workers():
+    with pytest.raises(ValueError, match="max_workers"):
+        build(FIXTURE_DIR, max_workers=0)
+
+
+def test_build_rejects_negative_content_cap():
+    with pytest.raises(ValueError, match="max_content_bytes"):
+        build(FIXTURE_DIR, max_content_bytes=-1)
+
+
 def test_build_forced_profile():
     front, index = build(FIXTURE_DIR, profile_name="node_ts_tool")
     assert index["profile"] == "node_ts_tool"
@@ -186,6 +441,122 @@ def test_build_with_policy_ignore_extra(tmp_path):
     assert "tests/test_main.py" not in paths
 
 
+def _project_with_vendor(tmp_path: Path) -> Path:
+    project = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, project)
+    (project / "vendor" / "lib").mkdir(parents=True)
+    (project / "vendor" / "lib" / "client.py").write_text('import subprocess\nsubprocess.run("ls", shell=True)\n')
+    (project / "vendor" / "lib" / "tool.exe").write_bytes(b"MZ\x00\x00")
+    return project
+
+
+def _write_policy(tmp_path: Path, **fields) -> Path:
+    policy_path = tmp_path / "META_ZIP_POLICY.json"
+    policy_path.write_text(json.dumps({"format": "zip-meta-policy", "version": "0.1", **fields}))
+    return policy_path
+
+
+def test_build_vendor_secrets_flagged_by_default(tmp_path):
+    """Vendored files are analyzed unless a policy opts them out, so content risk flags still apply."""
+    project = _project_with_vendor(tmp_path)
+    (project / "vendor" / "lib" / "x.py").write_text('API_KEY = "AKIA' + "A" * 16 + '"\n')
+    _, index = build(project)
+    files = {f["path"]: f for f in index["files"]}
+    assert "secrets_like" in files["vendor/lib/x.py"]["risk_flags"]
+    assert "exec_shell" in files["vendor/lib/client.py"]["risk_flags"]
+    assert "content" not in files["vendor/lib/x.py"]
+    assert any("secrets" in w for w in index["warnings"])
+
+
+def test_build_vendor_files_hash_only_by_policy(tmp_path, monkeypatch):
+    project = _project_with_vendor(tmp_path)
+    policy_path = _write_policy(tmp_path, role_content={"vendor": "hash"})
+    kept: list[tuple[str, bool]] = []
+    real_read_file = scanner._read_file
+
+    def tracking_read_file(fpath, size, keep):
+        kept.append((fpath.name, keep))
+        return real_read_file(fpath, size, keep)
+
+    monkeypatch.setattr(scanner, "_read_file", tracking_read_file)
+    _, index = build(project, policy_path=policy_path)
+    files = {f["path"]: f for f in index["files"]}
+    client = files["vendor/lib/client.py"]
+    assert client["content"] == "hash"
+    assert len(client["sha256"]) == 64
+    assert "risk_flags" not in client  # exec_shell needs the content
+    assert files["vendor/lib/tool.exe"]["risk_flags"] == ["binary_executable"]  # path-based flags remain
+    assert "content" not in files["src/tiny_cli/main.py"]
+    assert ("client.py", False) in kept and ("main.py", True) in kept
+    assert "content_policy" in index["capabilities"]
+    validate_index(index)
+
+
+def test_build_role_content_policy(tmp_path, monkeypatch):
+    project = _project_with_vendor(tmp_path)
+    policy_path = _write_policy(tmp_path, role_content={"vendor": "skip", "doc": "hash"})
+    read: list[str] = []
+    real_read_file = scanner._read_file
+
+    def tracking_read_file(fpath, size, keep):
+        read.append(fpath.name)
+        return real_read_file(fpath, size, keep)
+
+    monkeypatch.setattr(scanner, "_read_file", tracking_read_file)
+    _, index = build(project, policy_path=policy_path)
+    files = {f["path"]: f for f in index["files"]}
+    assert files["vendor/lib/client.py"]["content"] == "skip"
+    assert "sha256" not in files["vendor/lib/client.py"]
+    assert "client.py" not in read and "tool.exe" not in read
+    assert files["README.md"]["content"] == "hash"
+    assert "excerpt" not in files["README.md"]
+    validate_index(index)
+
+
+def test_build_role_content_full_restores_analysis(tmp_path):
+    project = _project_with_vendor(tmp_path)
+    policy_path = _write_policy(tmp_path, role_content={"vendor": "full"})
+    _, index = build(project, policy_path=policy_path)
+    client = next(f for f in index["files"] if f["path"] == "vendor/lib/client.py")
+    assert "content" not in client
+    assert "exec_shell" in client["risk_flags"]
+
+
+def test_build_cache_rehashes_previously_skipped_files(tmp_path):
+    project = _project_with_vendor(tmp_path)
+    cache_path = tmp_path / "cache.json"
+    build(project, cache_path=cache_path, policy_path=_write_policy(tmp_path, role_content={"vendor": "skip"}))
+    _, cached = build(project, cache_path=cache_path)
+    _, plain = build(project)
+    assert cached == plain
+
+
+def test_policy_rejects_unknown_content_level(tmp_path):
+    with pytest.raises(jsonschema.ValidationError):
+        load_policy(_write_policy(tmp_path, role_content={"vendor": "partial"}))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_build_content_defined_chunking(tmp_path, stream):
+    """A policy's "chunking": "content" gives line-free chunk IDs, streamed or not."""
+    root = _with_big_files(tmp_path)
+    cache_path = tmp_path / "cache.json"
+    _, plain = build(root, cache_path=cache_path)
+    policy_path = _write_policy(tmp_path, chunking="content")
+    cap = 1024 if stream else None
+    _, index = build(root, cache_path=cache_path, policy_path=policy_path, max_content_bytes=cap)
+    sql = next(f for f in index["files"] if f["path"] == "dump.sql")
+    assert sql["chunks"] == [c.to_dict() for c in chunk_text((root / "dump.sql").read_text(), "content")]
+    assert "content_chunk_ids" in index["capabilities"]
+    assert "content_chunk_ids" not in plain["capabilities"]
+    validate_index(index)
+
+
+def test_policy_rejects_unknown_chunking(tmp_path):
+    with pytest.raises(jsonschema.ValidationError):
+        load_policy(_write_policy(tmp_path, chunking="lines"))
+
+
 def test_policy_invalid_schema(tmp_path):
     bad_policy = {"format": "wrong", "version": "0.1"}
     policy_path = tmp_path / "bad.json"
@@ -363,3 +734,21 @@ def test_all_profiles_produce_valid_indices():
         assert len(index["files"]) > 0
         assert len(index["start_here"]) > 0
         assert len(index["plans"]) > 0
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_build_reuses_walk_stats(tmp_path, monkeypatch, cached):
+    """Files are stat'ed once, by the directory walk, not again by the scan."""
+    cache_path = tmp_path / "cache.sqlite" if cached else None
+    stated: list[Path] = []
+    real_stat = Path.stat
+
+    def tracking_stat(self, **kwargs):
+        stated.append(self)
+        return real_stat(self, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "stat", tracking_stat)
+        _, index = build(FIXTURE_DIR, cache_path=cache_path)
+    listed = {FIXTURE_DIR.resolve() / f["path"] for f in index["files"]}
+    assert not listed & set(stated)
@@ -0,0 +1,176 @@
+"""Tests for the hash/analysis cache backends."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from zip_meta_map.builder import build
+from zip_meta_map.cache import JsonHashCache, SqliteHashCache, open_hash_cache
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
+
+
+def _rows(db: Path) -> dict[str, str]:
+    conn = sqlite3.connect(db)
+    try:
+        return dict(conn.execute("SELECT path, record FROM files"))
+    finally:
+        conn.close()
+
+
+def test_open_hash_cache_picks_backend_by_suffix(tmp_path):
+    json_cache = open_hash_cache(tmp_path / "cache.json")
+    sqlite_cache = open_hash_cache(tmp_path / "cache.sqlite")
+    try:
+        assert isinstance(json_cache, JsonHashCache)
+        assert isinstance(sqlite_cache, SqliteHashCache)
+    finally:
+        json_cache.close()
+        sqlite_cache.close()
+
+
+def test_find_inode(tmp_path):
+    records = {"a.py": {"sha256": "a" * 64, "size": 1, "ino": 42, "dev": 7}, "b.py": {"sha256": "b" * 64}}
+    for name in ("cache.json", "cache.sqlite"):
+        cache = open_hash_cache(tmp_path / name)
+        cache.save(records)
+        cache.close()
+        cache = open_hash_cache(tmp_path / name)
+        try:
+            assert cache.find_inode(7, 42) == ("a.py", records["a.py"])
+            assert cache.find_inode(7, 43) is None
+        finally:
+            cache.close()
+
+
+def test_sqlite_round_trip(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    cache = SqliteHashCache(db)
+    cache.save({"a.py": {"sha256": "a" * 64, "size": 1}, "b.py": {"sha256": "b" * 64, "size": 2}})
+    cache.close()
+
+    cache = SqliteHashCache(db)
+    try:
+        assert cache.get("a.py") == {"sha256": "a" * 64, "size": 1}
+        assert cache.get("missing.py") is None
+    finally:
+        cache.close()
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_sqlite_save_only_writes_changed_rows(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    cache = SqliteHashCache(db)
+    cache.save({"a.py": {"sha256": "a" * 64}, "b.py": {"sha256": "b" * 64}, "gone.py": {"sha256": "c" * 64}})
+    cache.close()
+
+    cache = SqliteHashCache(db)
+    statements: list[str] = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.get("a.py")
+    cache.get("b.py")
+    cache.save({"a.py": {"sha256": "a" * 64}, "b.py": {"sha256": "d" * 64}})
+    cache.close()
+
+    assert _rows(db) == {"a.py": '{"sha256": "' + "a" * 64 + '"}', "b.py": '{"sha256": "' + "d" * 64 + '"}'}
+    upserts = [s for s in statements if s.startswith("INSERT INTO files")]
+    assert len(upserts) == 1 and "b.py" in upserts[0]
+    assert "SELECT path FROM files" not in statements
+
+
+def test_sqlite_save_skips_unchanged_rows_never_read(tmp_path):
+    """Records of skipped files are never looked up with get(), yet are not rewritten either."""
+    db = tmp_path / "cache.sqlite"
+    records = {"a.py": {"sha256": "a" * 64}, "skip.bin": {"sha256": None, "size": 3}}
+    cache = SqliteHashCache(db)
+    cache.save(records)
+    cache.close()
+
+    cache = SqliteHashCache(db)
+    statements: list[str] = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.save({**records, "new.py": {"sha256": "n" * 64}})
+    cache.close()
+
+    upserts = [s for s in statements if s.startswith("INSERT INTO files")]
+    assert len(upserts) == 1 and "new.py" in upserts[0]
+    assert set(_rows(db)) == {"a.py", "skip.bin", "new.py"}
+
+
+def test_sqlite_replaces_non_database_file(tmp_path):
+    db = tmp_path / "cache.db"
+    db.write_text('{"version": 1, "entries": {}}')
+    cache = SqliteHashCache(db)
+    try:
+        assert cache.get("a.py") is None
+        cache.save({"a.py": {"sha256": "a" * 64}})
+        assert cache.get("a.py") == {"sha256": "a" * 64}
+    finally:
+        cache.close()
+
+
+def test_sqlite_refuses_foreign_files(tmp_path):
+    """A --cache path pointing at someone else's file raises instead of deleting it."""
+    notes = tmp_path / "notes"
+    notes.write_text("not a cache\n")
+    with pytest.raises(ValueError, match="not a zip-meta-map cache"):
+        open_hash_cache(notes)
+    assert notes.read_text() == "not a cache\n"
+
+    for schema in ("CREATE TABLE users (id INTEGER)", "CREATE TABLE files (name TEXT)"):
+        db = tmp_path / "app.db"
+        db.unlink(missing_ok=True)
+        conn = sqlite3.connect(db)
+        conn.execute(schema)
+        conn.execute("PRAGMA user_version = 7")
+        conn.close()
+        before = db.read_bytes()
+        with pytest.raises(ValueError, match="not a zip-meta-map cache"):
+            SqliteHashCache(db)
+        assert db.read_bytes() == before
+
+
+def test_sqlite_accepts_older_cache_schema(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, record TEXT NOT NULL)")
+    conn.execute("INSERT INTO files VALUES ('a.py', '{}')")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    cache = SqliteHashCache(db)
+    try:
+        assert cache.get("a.py") is None
+    finally:
+        cache.close()
+
+
+def test_sqlite_version_mismatch_discards_rows(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    cache = SqliteHashCache(db)
+    cache.save({"a.py": {"sha256": "a" * 64}})
+    cache.close()
+
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA user_version = 999")
+    conn.close()
+
+    cache = SqliteHashCache(db)
+    try:
+        assert cache.get("a.py") is None
+    finally:
+        cache.close()
+
+
+def test_build_with_sqlite_cache(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    _, plain = build(FIXTURE_DIR)
+    _, first = build(FIXTURE_DIR, cache_path=db)
+    _, second = build(FIXTURE_DIR, cache_path=db, max_workers=4)
+    assert first == plain
+    assert second == plain
+    assert set(_rows(db)) == {f["path"] for f in plain["files"]}
@@ -1,6 +1,26 @@
 """Tests for the deterministic chunker."""
 
-from zip_meta_map.chunker import CHUNK_THRESHOLD_BYTES, ChunkInfo, chunk_text, is_chunkable
+import random
+import re
+import sys
+
+import pytest
+
+from zip_meta_map import chunker as chunker_module
+from zip_meta_map.chunker import (
+    _LINE_WS,
+    _WS_2,
+    _WS_3,
+    _WS_BYTES,
+    CDC_MAX_BYTES,
+    CDC_MIN_BYTES,
+    CHUNK_THRESHOLD_BYTES,
+    ChunkInfo,
+    StreamChunker,
+    chunk_bytes,
+    chunk_text,
+    is_chunkable,
+)
 
 
 def test_is_chunkable_large_py():
@@ -99,6 +119,8 @@ def test_chunk_to_dict():
     assert d["start_line"] == 1
     assert d["end_line"] == 100
     assert d["byte_len"] == 5000
+    assert d["start_byte"] == 0
+    assert d["end_byte"] == 5000
     assert d["heading"] == "# Intro"
 
 
@@ -115,3 +137,210 @@ def test_chunk_byte_len_accurate():
     total_bytes = sum(c.byte_len for c in chunks)
     actual_bytes = len(content.encode("utf-8"))
     assert total_bytes == actual_bytes
+
+
+# ── chunk_bytes ──
+
+_LINES = [
+    "def f():\n",
+    "    return 1\n",
+    "# Heading\n",
+    "  ## Indented heading  \n",
+    "\u00a0### After a no-break space\n",
+    "####### seven hashes\n",
+    "#no space\n",
+    "x = 1  # trailing comment\n",
+    "\n",
+    "   \t \n",
+    "\x1f\u3000 odd whitespace \u2003\n",
+    "caf\u00e9 \u65e5\u672c\n",
+    "last line without newline",
+]
+_RARE_BREAKS = ["\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029"]
+
+
+def _random_text(rng: random.Random) -> str:
+    lines = [rng.choice(_LINES) for _ in range(rng.randint(0, 400))]
+    text = "".join(line if line.endswith("\n") or i == len(lines) - 1 else line + "\n" for i, line in enumerate(lines))
+    roll = rng.random()
+    if roll < 0.2:
+        text = text.replace("\n", "\r\n")
+    elif roll < 0.4 and text:
+        pos = rng.randrange(len(text))
+        text = text[:pos] + rng.choice(_RARE_BREAKS) + text[pos:]
+    return text
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_chunk_bytes_matches_chunk_text(seed):
+    text = _random_text(random.Random(seed))
+    data = text.encode("utf-8")
+    for strategy in ("auto", "lines", "headings", "content"):
+        assert chunk_bytes(data, strategy) == chunk_text(text, strategy), strategy
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_chunk_offsets_tile_the_bytes(seed):
+    text = _random_text(random.Random(seed))
+    data = text.encode("utf-8")
+    for strategy in ("auto", "content"):
+        chunks = chunk_text(text, strategy)
+        assert [c.start_byte for c in chunks] == [0] + [c.end_byte for c in chunks[:-1]]
+        assert chunks[-1].end_byte == len(data) if chunks else data == b""
+        for chunk in chunks:
+            assert chunk.end_byte - chunk.start_byte == chunk.byte_len
+            piece = data[chunk.start_byte : chunk.end_byte].decode("utf-8")
+            assert len(piece.splitlines()) == chunk.end_line - chunk.start_line + 1
+
+
+def test_chunk_bytes_dense_comments():
+    """Code with a "#" on most lines takes the single-regex heading scan."""
+    text = "def f(x):\n    # comment\n    return x  # trailing\n\n" * 200
+    assert chunk_bytes(text.encode()) == chunk_text(text)
+    assert chunk_bytes(("# Top\n" + text).encode()) == chunk_text("# Top\n" + text)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\r\n   ### indented\n\r\n",
+        b"\n# Notes\n" + b"".join(b"item #%d\n" % i for i in range(4000)),
+        b"\n\n\t# Notes\n" + b"x = 1  # n\n" * 3000,
+        "\u3000\n# Notes\n".encode() + b"# Other\n" + b"y\n" * 200,
+    ],
+)
+def test_chunk_bytes_heading_scan_stays_on_its_line(data):
+    """Whitespace before a heading mark never spans a line break, at offset 0 or after it."""
+    for strategy in ("auto", "headings"):
+        assert chunk_bytes(data, strategy) == chunk_text(data.decode(), strategy), strategy
+
+
+# ── Content-defined chunking ──
+
+
+def _source_lines(seed: int, count: int) -> list[str]:
+    rng = random.Random(seed)
+    words = ["def", "return", "self", "value", "import", "for", "in", "if", "else", "(x)", "=", "+", "1"]
+    return [
+        " " * 4 * rng.randint(0, 3) + " ".join(rng.choices(words, k=rng.randint(0, 10))) + "\n" for _ in range(count)
+    ]
+
+
+def test_content_chunks_survive_insertions():
+    lines = _source_lines(0, 20_000)
+    before = chunk_bytes("".join(lines).encode(), "content")
+    lines[5:5] = ["# one new line near the top\n"]
+    lines[12_000:12_000] = ["x = 1\n"] * 3
+    after = chunk_bytes("".join(lines).encode(), "content")
+    kept = {c.id for c in before} & {c.id for c in after}
+    assert len(before) > 100
+    assert len(kept) >= len(before) - 6
+    # The same insertion re-IDs nearly every fixed line block
+    line_ids = {c.id for c in chunk_text("".join(_source_lines(0, 20_000)), "lines")}
+    assert len(line_ids & {c.id for c in chunk_text("".join(lines), "lines")}) < 10
+
+
+def test_content_chunk_sizes_and_ids():
+    text = "".join(_source_lines(1, 5000))
+    chunks = chunk_text(text, "content")
+    longest_line = max(len(line) for line in text.splitlines(keepends=True))
+    assert all(CDC_MIN_BYTES <= c.byte_len < CDC_MAX_BYTES + longest_line for c in chunks[:-1])
+    assert all(re.fullmatch(r"chunk_[0-9a-f]{12}", c.id) for c in chunks)
+    assert all(c.heading is None for c in chunks)
+
+
+def test_content_chunk_duplicates_are_numbered():
+    text = "same line\n" * 20_000
+    ids = [c.id for c in chunk_text(text, "content")]
+    assert ids[0] + "_2" == ids[1]
+    assert len(set(ids)) == len(ids)
+    assert ids == [c.id for c in chunk_bytes(text.encode(), "content")]
+
+
+def test_content_chunk_bytes_slabs(monkeypatch):
+    """Splitting the bytes slab by slab does not move boundaries."""
+    data = "".join(_source_lines(2, 3000)).replace("\n", "\r\n").encode()
+    whole = chunk_bytes(data, "content")
+    monkeypatch.setattr(chunker_module, "_CDC_SLAB_BYTES", 100)
+    assert chunk_bytes(data, "content") == whole == chunk_text(data.decode(), "content")
+
+
+def test_chunk_bytes_empty():
+    assert chunk_bytes(b"") == []
+    assert chunk_bytes(b"   \n\n") == chunk_text("   \n\n")
+
+
+def test_whitespace_tables_match_isspace():
+    spaces = [chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()]
+    encoded = {c.encode("utf-8") for c in spaces}
+    assert encoded == {bytes([b]) for b in _WS_BYTES} | set(_WS_2) | set(_WS_3)
+
+    # The in-line subset excludes exactly what splitlines() breaks on
+    in_line = re.compile(_LINE_WS + rb"\Z")
+    assert {c for c in spaces if in_line.match(c.encode("utf-8"))} == {
+        c for c in spaces if len(f"a{c}b".splitlines()) == 1
+    }
+
+
+# ── StreamChunker ──
+
+
+def _stream(data: bytes, strategy: str, sizes: list[int]) -> tuple[StreamChunker, list[ChunkInfo]]:
+    chunker = StreamChunker(strategy)
+    chunks: list[ChunkInfo] = []
+    pos = 0
+    for size in sizes * (len(data) + 1):
+        if pos >= len(data):
+            break
+        chunks += chunker.feed(data[pos : pos + size])
+        pos += size
+    return chunker, chunks + chunker.finish()
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_stream_chunker_matches_chunk_text(seed):
+    rng = random.Random(seed)
+    text = _random_text(rng)
+    data = text.encode("utf-8")
+    sizes = [rng.choice([1, 2, 3, 7, 64, 4096, 20000]) for _ in range(5)]
+    for strategy in ("auto", "lines", "headings", "content"):
+        chunker, chunks = _stream(data, strategy, sizes)
+        assert chunker.ok
+        assert chunks == chunk_text(text, strategy), strategy
+
+
+def test_stream_chunker_emits_as_it_goes():
+    data = ("x\n" * 10_000).encode()
+    chunker = StreamChunker("lines")
+    assert chunker.feed(data[:1000]) == []  # still inside the binary sniff window
+    first = chunker.feed(data[1000:])
+    assert [c.start_line for c in first] == list(range(1, 9901, 100))
+    rest = chunker.finish()
+    assert first + rest == chunk_text(data.decode(), "lines")
+
+
+def test_stream_chunker_carriage_return_across_blocks():
+    data = ("a" * 9000 + "\r\nb\rc\r\n").encode()
+    for cut in (9000, 9001, 9004, 9005):
+        _, chunks = _stream(data[:cut] + data[cut:], "lines", [cut, len(data)])
+        assert chunks == chunk_text(data.decode(), "lines")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\x00binary" + b"x\n" * 5000,
+        b"%PDF-1.4\n" + b"x\n" * 5000,
+        b"x\n" * 20000 + b"\xff\xfe",
+        b"x\n" * 20000 + "\u00e9".encode()[:1],
+    ],
+)
+def test_stream_chunker_rejects_non_text(data):
+    chunker, chunks = _stream(data, "auto", [4096])
+    assert not chunker.ok
+    assert chunker.finish() == []
+
+
+def test_stream_chunker_looks_binary():
+    chunker, _ = _stream(b"ab\x00" + b"x" * 10000, "auto", [5])
+    assert chunker.looks_binary
@@ -1,10 +1,12 @@
 """Tests for the CLI entry point."""
 
 import json
+import zipfile
 from pathlib import Path
 
 import pytest
 
+from zip_meta_map import builder
 from zip_meta_map.cli import main
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
@@ -30,6 +32,20 @@ def test_cli_build_stdout(capsys):
     assert "META_ZIP_INDEX.json" in captured.out
 
 
+@pytest.mark.parametrize("value", ["-1", "lots"])
+def test_cli_rejects_bad_content_cap(value, capsys):
+    with pytest.raises(SystemExit, match="2"):
+        main(["build", str(FIXTURE_DIR), "--max-content-bytes", value])
+    assert "--max-content-bytes" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "many"])
+def test_cli_rejects_bad_workers(value, capsys):
+    with pytest.raises(SystemExit, match="2"):
+        main(["build", str(FIXTURE_DIR), "--workers", value])
+    assert "--workers" in capsys.readouterr().err
+
+
 def test_cli_build_output_dir(tmp_path, capsys):
     out = tmp_path / "output"
     code = main(["build", str(FIXTURE_DIR), "-o", str(out)])
@@ -48,6 +64,24 @@ def test_cli_build_summary(tmp_path, capsys):
     assert "Files:" in captured.out
 
 
+def test_cli_build_workers_and_cache(tmp_path, capsys):
+    out = tmp_path / "output"
+    cache = tmp_path / "cache.json"
+    code = main(["build", str(FIXTURE_DIR), "-o", str(out), "--workers", "2", "--cache", str(cache)])
+    assert code == 0
+    assert cache.exists()
+    assert (out / "META_ZIP_INDEX.json").exists()
+
+
+def test_cli_build_stats(capsys):
+    code = main(["build", str(FIXTURE_DIR), "--stats", "--format", "json", "--manifest-only"])
+    assert code == 0
+    captured = capsys.readouterr()
+    json.loads(captured.out)  # stats stay off stdout
+    assert "Role tiers" in captured.err
+    assert "entrypoint" in captured.err
+
+
 def test_cli_build_missing_input(tmp_path, capsys):
     missing = tmp_path / "definitely_does_not_exist"
     code = main(["build", str(missing)])
@@ -99,6 +133,26 @@ def test_cli_explain_json(capsys):
     assert isinstance(data["plans"], dict)
 
 
+def test_cli_explain_metadata_only(tmp_path, capsys):
+    zip_path = tmp_path / "fixture.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for fpath in sorted(FIXTURE_DIR.rglob("*")):
+            if fpath.is_file():
+                zf.write(fpath, str(fpath.relative_to(FIXTURE_DIR)))
+
+    code = main(["explain", str(zip_path), "--metadata-only", "--json"])
+    assert code == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["profile"] == "python_cli"
+    assert "crc32" in data["capabilities"]
+
+
+def test_cli_explain_metadata_only_directory(capsys):
+    code = main(["explain", str(FIXTURE_DIR), "--metadata-only"])
+    assert code == 1
+    assert "metadata_only" in capsys.readouterr().err
+
+
 def test_cli_explain_missing_input(tmp_path, capsys):
     missing = tmp_path / "nope"
     code = main(["explain", str(missing)])
@@ -470,3 +524,46 @@ def test_cli_diff_bad_json(tmp_path, capsys):
     assert code == 1
     captured = capsys.readouterr()
     assert "could not read JSON" in captured.err
+
+
+def test_cli_explain_shows_detection(tmp_path, capsys):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "Cargo.toml").write_text("[package]\n")
+    (root / "package.json").write_text("{}\n")
+    code = main(["explain", str(root)])
+    assert code == 0
+    out = capsys.readouterr().out
+    assert "Detection: score=0.60  found Cargo.toml" in out
+    assert "node_ts_tool" in out
+
+    code = main(["explain", str(root), "--json"])
+    assert code == 0
+    detection = json.loads(capsys.readouterr().out)["detection"]
+    assert detection["profile"] == "rust_cli"
+    assert detection["markers"] == ["Cargo.toml"]
+    assert detection["score"] == 0.6
+    assert [r["profile"] for r in detection["runner_ups"]] == ["node_ts_tool"]
+
+
+def test_cli_explain_detects_once(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "Cargo.toml").write_text("[package]\n")
+    calls: list[Path] = []
+    real_detect_directory = builder.detect_directory
+
+    def counting_detect_directory(path, gitignore=False):
+        calls.append(path)
+        return real_detect_directory(path, gitignore)
+
+    monkeypatch.setattr(builder, "detect_directory", counting_detect_directory)
+    assert main(["explain", str(root)]) == 0
+    assert "found Cargo.toml" in capsys.readouterr().out
+    assert len(calls) == 1
+
+
+def test_cli_explain_forced_profile_skips_detection(capsys):
+    code = main(["explain", str(FIXTURE_DIR), "--profile", "python_cli", "--json"])
+    assert code == 0
+    assert "detection" not in json.loads(capsys.readouterr().out)
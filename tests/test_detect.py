@@ -0,0 +1,204 @@
+"""Tests for scored profile detection with early exit."""
+
+import random
+from fnmatch import fnmatch
+from pathlib import Path
+
+import pytest
+
+from zip_meta_map import scanner
+from zip_meta_map.builder import detect_input
+from zip_meta_map.detect import DETECT_MAX_DEPTH, detect_directory, detect_paths, marker_score
+from zip_meta_map.profiles import ALL_PROFILES, DEFAULT_PROFILE
+from zip_meta_map.scanner import iter_directory_levels, list_directory
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _reference_detect(rel_paths):
+    """The full-listing detection detect_paths() replaces."""
+    paths = set(rel_paths)
+    names = {p.rsplit("/", 1)[-1] for p in paths}
+    for detect_file in ALL_PROFILES["monorepo"].detect_files:
+        if detect_file in paths:
+            return ALL_PROFILES["monorepo"]
+    for name in ["rust_cli", "go_cli", "dotnet_cli", "java_cli", "node_ts_tool", "python_cli"]:
+        profile = ALL_PROFILES[name]
+        for detect_file in profile.detect_files:
+            if "*" in detect_file:
+                if any(fnmatch(n, detect_file) for n in names):
+                    return profile
+            elif detect_file in paths:
+                return profile
+    return DEFAULT_PROFILE
+
+
+_MARKERS = [f for p in ALL_PROFILES.values() for f in p.detect_files if "*" not in f] + ["App.csproj", "All.sln"]
+_FILLER = ["README.md", "main.py", "index.ts", "lib.rs", "notes.txt", "App.csproj.bak"]
+_DIRS = ["", "", "src/", "src/app/", "packages/web/", "tools/", "a/b/c/d/"]
+
+
+def _corpus(seed: int) -> list[str]:
+    rng = random.Random(seed)
+    names = _FILLER + rng.sample(_MARKERS, rng.randint(0, 4))
+    return sorted({rng.choice(_DIRS) + rng.choice(names) for _ in range(rng.randint(0, 30))})
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_full_listing(seed):
+    paths = _corpus(seed)
+    assert detect_paths(paths).profile is _reference_detect(paths)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_breadth_first_matches_full_listing(seed):
+    paths = sorted(_corpus(seed), key=lambda p: (p.count("/"), p))
+    assert detect_paths(paths, breadth_first=True).profile is _reference_detect(paths)
+
+
+@pytest.mark.parametrize(
+    "fixture,expected",
+    [
+        ("tiny_python_cli", "python_cli"),
+        ("tiny_node_tool", "node_ts_tool"),
+        ("tiny_rust_cli", "rust_cli"),
+        ("tiny_go_cli", "go_cli"),
+        ("tiny_dotnet_cli", "dotnet_cli"),
+        ("tiny_java_cli", "java_cli"),
+        ("tiny_monorepo", "monorepo"),
+    ],
+)
+def test_fixtures(fixture, expected):
+    root = FIXTURES / fixture
+    assert detect_directory(root).profile.name == expected
+    assert detect_input(root).profile.name == expected
+
+
+def test_scores_and_runner_ups():
+    detection = detect_paths(["Cargo.toml", "package.json", "pyproject.toml", "README.md"])
+    assert detection.profile.name == "rust_cli"
+    assert detection.markers == ["Cargo.toml"]
+    assert [(s.profile.name, s.markers) for s in detection.runner_ups] == [
+        ("node_ts_tool", ["package.json"]),
+        ("python_cli", ["pyproject.toml"]),
+    ]
+    assert detection.matches[0].rank < detection.runner_ups[0].rank < detection.runner_ups[1].rank
+    assert detection.score == 0.6
+    data = detection.to_dict()
+    assert data["profile"] == "rust_cli"
+    assert data["score"] == 0.6
+    assert data["runner_ups"][0] == {"profile": "node_ts_tool", "score": 0.6, "markers": ["package.json"]}
+    assert data["paths_seen"] == 4
+    assert not data["early_exit"]
+
+
+def test_no_markers_is_default():
+    detection = detect_paths(["README.md", "src/main.c"])
+    assert detection.profile is DEFAULT_PROFILE
+    assert detection.matches == []
+    assert detection.score == 0.0
+    assert detection.runner_ups == []
+
+
+def test_score_grows_with_markers_and_shrinks_with_depth():
+    assert marker_score([]) == 0.0
+    assert marker_score(["pyproject.toml"]) == 0.6
+    assert marker_score(["pyproject.toml", "setup.py"]) == 0.84
+    assert marker_score(["src/App.csproj"]) == 0.3
+    assert marker_score(["src/app/App.csproj"]) < marker_score(["src/App.csproj"])
+
+
+def test_rank_beats_score():
+    detection = detect_paths(["Cargo.toml", "pyproject.toml", "setup.py", "setup.cfg"])
+    assert detection.profile.name == "rust_cli"
+    assert detection.runner_ups[0].score > detection.score
+
+
+def test_nested_exact_markers_do_not_count():
+    assert detect_paths(["tools/Cargo.toml", "pyproject.toml"]).profile.name == "python_cli"
+
+
+def test_monorepo_marker_exits_early():
+    detection = detect_paths(["lerna.json", "package.json", "Cargo.toml"])
+    assert detection.profile.name == "monorepo"
+    assert detection.early_exit
+    assert detection.paths_seen == 1
+
+
+def test_breadth_first_exits_after_root_level():
+    paths = ["Cargo.toml", "README.md", "src/main.rs", "src/App.csproj", "z/more.rs"]
+    detection = detect_paths(paths, breadth_first=True)
+    assert detection.profile.name == "rust_cli"
+    assert detection.early_exit
+    assert detection.paths_seen == 3
+
+
+def test_breadth_first_keeps_looking_for_higher_glob_markers():
+    paths = ["package.json", "src/index.ts", "src/App/App.csproj"]
+    detection = detect_paths(paths, breadth_first=True)
+    assert detection.profile.name == "dotnet_cli"
+    assert [s.profile.name for s in detection.runner_ups] == ["node_ts_tool"]
+
+
+def _tree(root: Path, files: list[str]) -> Path:
+    for rel in files:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    return root
+
+
+def _opened_dirs(monkeypatch, root: Path) -> list[str]:
+    opened: list[str] = []
+    real_scandir = scanner.os.scandir
+
+    def tracking_scandir(path):
+        opened.append(Path(path).relative_to(root.resolve()).as_posix())
+        return real_scandir(path)
+
+    monkeypatch.setattr(scanner.os, "scandir", tracking_scandir)
+    return opened
+
+
+def test_directory_walk_stops_at_decisive_marker(tmp_path, monkeypatch):
+    root = _tree(tmp_path / "proj", ["Cargo.toml", "src/main.rs", "src/deep/er/mod.rs", "target/x/y.o"])
+    opened = _opened_dirs(monkeypatch, root)
+    detection = detect_directory(root)
+    assert detection.profile.name == "rust_cli"
+    assert detection.early_exit
+    assert "src/deep" not in opened
+    assert "target/x" not in opened
+
+
+def test_directory_walk_is_depth_limited(tmp_path, monkeypatch):
+    deep = "a/" * DETECT_MAX_DEPTH + "App.csproj"
+    shallow = "a/" * (DETECT_MAX_DEPTH - 1) + "App.csproj"
+    root = _tree(tmp_path / "proj", ["pyproject.toml", deep])
+    opened = _opened_dirs(monkeypatch, root)
+    assert detect_directory(root).profile.name == "python_cli"
+    assert max(p.count("/") for p in opened) == DETECT_MAX_DEPTH - 2
+    assert detect_directory(root, max_depth=None).profile.name == "dotnet_cli"
+    _tree(root, [shallow])
+    assert detect_directory(root).profile.name == "dotnet_cli"
+
+
+def test_directory_detection_honors_gitignore(tmp_path):
+    root = _tree(tmp_path / "proj", ["pyproject.toml", "vendor/App.csproj"])
+    (root / ".gitignore").write_text("vendor/\n")
+    assert detect_directory(root).profile.name == "dotnet_cli"
+    assert detect_directory(root, gitignore=True).profile.name == "python_cli"
+
+
+def test_level_walk_lists_the_same_files(tmp_path):
+    root = _tree(tmp_path / "proj", ["b.py", "a/z.py", "a/b/c.py", "c/d.py", ".git/HEAD", "skip/x.py"])
+    (root / ".gitignore").write_text("skip/\n")
+    levels = list(iter_directory_levels(root, [".git/**"], gitignore=True))
+    assert levels == [".gitignore", "b.py", "a/z.py", "c/d.py", "a/b/c.py"]
+    assert sorted(levels, key=lambda p: p.split("/")) == list_directory(root, [".git/**"], gitignore=True)
+    assert list(iter_directory_levels(root, [".git/**"], max_depth=2)) == [
+        ".gitignore",
+        "b.py",
+        "a/z.py",
+        "c/d.py",
+        "skip/x.py",
+    ]
@@ -140,6 +140,23 @@ def test_file_modified_sha256():
     assert result.has_changes
 
 
+def test_file_modified_crc32():
+    """Metadata-only indexes compare their crc32 digests."""
+    entry = {"path": "README.md", "size_bytes": 100, "crc32": "0badf00d", "role": "doc", "confidence": 0.95}
+    old = _minimal_index(files=[entry])
+    new = _minimal_index(files=[dict(entry, crc32="deadbeef")])
+    result = diff_indices(old, new)
+    assert result.files_modified[0].changes == ["content changed"]
+
+
+def test_file_mixed_digests_not_content_change():
+    """A sha256 entry and a crc32 entry share no digest to compare."""
+    old = _minimal_index()
+    entry = {"path": "README.md", "size_bytes": 100, "crc32": "0badf00d", "role": "doc", "confidence": 0.95}
+    result = diff_indices(old, _minimal_index(files=[entry]))
+    assert not result.files_modified
+
+
 def test_file_modified_role():
     old = _minimal_index()
     new_files = [
@@ -0,0 +1,176 @@
+"""Tests for .gitignore support in the directory walk."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from zip_meta_map import scanner
+from zip_meta_map.builder import build
+from zip_meta_map.globs import GitignoreRules
+from zip_meta_map.scanner import list_directory
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+@pytest.mark.parametrize(
+    "pattern,path,is_dir,expected",
+    [
+        ("*.log", "a.log", False, True),
+        ("*.log", "deep/dir/a.log", False, True),
+        ("*.log", "a.log.txt", False, None),
+        ("/dist", "dist", True, True),
+        ("/dist", "src/dist", True, None),
+        ("build/", "build", True, True),
+        ("build/", "build", False, None),
+        ("build/", "src/build", True, True),
+        ("docs/*.html", "docs/a.html", False, True),
+        ("docs/*.html", "docs/x/a.html", False, None),
+        ("docs/*.html", "src/docs/a.html", False, None),
+        ("**/tmp", "a/b/tmp", True, True),
+        ("cache/**", "cache/x/y.bin", False, True),
+        ("cache/**", "cache", True, None),
+        ("a/**/b", "a/b", False, True),
+        ("a/**/b", "a/x/y/b", False, True),
+        ("[ab]c.txt", "bc.txt", False, True),
+        ("[!ab]c.txt", "bc.txt", False, None),
+        ("?.py", "x.py", False, True),
+        ("?.py", "xy.py", False, None),
+        ("\\#hash", "#hash", False, True),
+        ("\\!bang", "!bang", False, True),
+        ("space\\ ", "space ", False, True),
+        ("trailing   ", "trailing", False, True),
+    ],
+)
+def test_pattern(pattern, path, is_dir, expected):
+    assert GitignoreRules(pattern).match(path, is_dir) is expected
+
+
+def test_comments_and_blank_lines():
+    rules = GitignoreRules("# *.py\n\n   \n")
+    assert not rules
+    assert rules.match("a.py", False) is None
+
+
+def test_last_match_wins():
+    rules = GitignoreRules("*.log\n!keep.log\n")
+    assert rules.match("a.log", False) is True
+    assert rules.match("keep.log", False) is False
+    rules = GitignoreRules("!keep.log\n*.log\n")
+    assert rules.match("keep.log", False) is True
+
+
+def _tree(root: Path, files: dict[str, str]) -> Path:
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+TREE = {
+    ".gitignore": "*.log\n!important.log\n/build\nnode_modules/\nsecret*\n",
+    "a.py": "",
+    "debug.log": "",
+    "important.log": "",
+    "build/out.js": "",
+    "src/build/keep.py": "",
+    "src/secret.txt": "",
+    "src/.gitignore": "*.tmp\n!debug.log\n/local.py\n",
+    "src/x.tmp": "",
+    "src/debug.log": "",
+    "src/local.py": "",
+    "src/pkg/local.py": "",
+    "web/node_modules/lib/index.js": "",
+    "web/app.js": "",
+    "docs/.gitignore": "*\n!*.md\n!*/\n",
+    "docs/guide.md": "",
+    "docs/guide.html": "",
+    "docs/api/ref.md": "",
+    "docs/api/ref.html": "",
+}
+
+
+def test_walk_honors_nested_gitignores(tmp_path):
+    root = _tree(tmp_path / "proj", TREE)
+    listed = list_directory(root, [".git/**"], gitignore=True)
+    assert listed == [
+        ".gitignore",
+        "a.py",
+        "docs/api/ref.md",
+        "docs/guide.md",
+        "important.log",
+        "src/.gitignore",
+        "src/build/keep.py",
+        "src/debug.log",
+        "src/pkg/local.py",
+        "web/app.js",
+    ]
+
+
+def test_walk_without_flag_is_unchanged(tmp_path):
+    root = _tree(tmp_path / "proj", TREE)
+    assert list_directory(root, [".git/**"]) == sorted(TREE, key=lambda p: p.split("/"))
+
+
+def test_info_exclude(tmp_path):
+    root = _tree(tmp_path / "proj", {"a.py": "", "scratch.py": "", ".git/info/exclude": "scratch.py\n"})
+    assert list_directory(root, [".git/**"], gitignore=True) == ["a.py"]
+
+
+def test_ignored_directories_are_pruned(tmp_path, monkeypatch):
+    root = _tree(tmp_path / "proj", TREE)
+    opened: list[str] = []
+    real_scandir = scanner.os.scandir
+
+    def tracking_scandir(path):
+        opened.append(Path(path).relative_to(root).as_posix())
+        return real_scandir(path)
+
+    monkeypatch.setattr(scanner.os, "scandir", tracking_scandir)
+    list_directory(root, [".git/**"], gitignore=True)
+    assert "build" not in opened
+    assert "web/node_modules" not in opened
+    assert "src/build" in opened
+
+
+def test_negation_cannot_reinclude_inside_ignored_directory(tmp_path):
+    root = _tree(tmp_path / "proj", {".gitignore": "out/\n!out/keep.txt\n", "out/keep.txt": "", "a.py": ""})
+    assert list_directory(root, [".git/**"], gitignore=True) == [".gitignore", "a.py"]
+
+
+def test_build_gitignore(tmp_path):
+    root = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, root)
+    (root / ".gitignore").write_text("tests/\n")
+    _, plain = build(root)
+    _, ignored = build(root, gitignore=True)
+    assert any(f["path"].startswith("tests/") for f in plain["files"])
+    assert not any(f["path"].startswith("tests/") for f in ignored["files"])
+
+
+def test_build_gitignore_rejects_zip(tmp_path):
+    shutil.make_archive(str(tmp_path / "a"), "zip", FIXTURE_DIR)
+    with pytest.raises(ValueError, match="gitignore"):
+        build(tmp_path / "a.zip", gitignore=True)
+
+
+@requires_git
+def test_walk_matches_git(tmp_path):
+    """With nothing tracked, git's untracked-and-not-ignored set is exactly what the walk should list."""
+    root = _tree(tmp_path / "proj", TREE)
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    (root / ".git" / "info").mkdir(exist_ok=True)
+    (root / ".git" / "info" / "exclude").write_text("a.py\n")
+    result = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard", "-z"],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    expected = sorted((p for p in result.stdout.split("\0") if p), key=lambda p: p.split("/"))
+    assert list_directory(root, [".git/**"], gitignore=True) == expected
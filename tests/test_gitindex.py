@@ -0,0 +1,211 @@
+"""Tests for the .git/index reader."""
+
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+from zip_meta_map import scanner
+from zip_meta_map.builder import build
+from zip_meta_map.gitindex import parse_git_index, read_git_index
+from zip_meta_map.scanner import list_directory
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def _encode_varint(value: int) -> bytes:
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        value -= 1
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _make_index(paths: list[str], version: int = 2, stage: int = 0, extensions: bytes = b"") -> bytes:
+    """Build a minimal index file with one regular-file entry per path."""
+    body = struct.pack(">4sII", b"DIRC", version, len(paths))
+    previous = b""
+    for i, path in enumerate(paths):
+        name = path.encode()
+        sha = hashlib.sha1(name).digest()
+        flags = (stage << 12) | min(len(name), 0xFFF)
+        entry = struct.pack(">10I20sH", 1, 2, 3, 4, 5, 100 + i, 0o100644, 0, 0, len(name), sha, flags)
+        if version == 4:
+            common = len(os.path.commonprefix([previous, name]))
+            entry += _encode_varint(len(previous) - common) + name[common:] + b"\0"
+        else:
+            entry += name
+            entry += b"\0" * (8 - (len(entry) % 8))
+        body += entry
+        previous = name
+    body += extensions
+    return body + hashlib.sha1(body).digest()
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_parse_versions(version):
+    paths = ["README.md", "src/pkg/__init__.py", "src/pkg/main.py", "src/pkg/util.py"]
+    entries = parse_git_index(_make_index(paths, version))
+    assert [e.path for e in entries] == paths
+    assert entries[1].blob == hashlib.sha1(b"src/pkg/__init__.py").hexdigest()
+    assert entries[1].ino == 101
+
+
+def test_parse_skips_unmerged_entries():
+    assert parse_git_index(_make_index(["a.py"], stage=2)) == []
+
+
+def test_parse_rejects_bad_checksum():
+    data = bytearray(_make_index(["a.py"]))
+    data[-1] ^= 0xFF
+    with pytest.raises(ValueError, match="checksum"):
+        parse_git_index(bytes(data))
+
+
+def test_parse_rejects_truncated():
+    data = _make_index(["a.py", "b.py"])
+    body = data[:-20][:-10]
+    with pytest.raises(ValueError):
+        parse_git_index(body + hashlib.sha1(body).digest())
+
+
+def test_parse_skips_known_extensions():
+    tree = b"TREE" + struct.pack(">I", 6) + b"\0-1 0\n"
+    assert [e.path for e in parse_git_index(_make_index(["a.py"], extensions=tree))] == ["a.py"]
+
+
+@pytest.mark.parametrize("signature", [b"link", b"sdir"])
+def test_parse_rejects_split_and_sparse_extensions(signature):
+    extension = signature + struct.pack(">I", 20) + b"\0" * 20
+    with pytest.raises(ValueError, match="not supported"):
+        parse_git_index(_make_index(["a.py"], extensions=extension))
+
+
+def test_parse_rejects_empty_path():
+    with pytest.raises(ValueError, match="empty path"):
+        parse_git_index(_make_index([""]))
+
+
+def test_read_git_index_missing_or_corrupt(tmp_path):
+    assert read_git_index(tmp_path) is None
+    (tmp_path / ".git").mkdir()
+    assert read_git_index(tmp_path) is None
+    (tmp_path / ".git" / "index").write_bytes(b"DIRC garbage")
+    assert read_git_index(tmp_path) is None
+
+
+def test_build_git_index_falls_back_to_walk(tmp_path):
+    project = tmp_path / "proj"
+    shutil.copytree(FIXTURE_DIR, project)
+    (project / ".git").mkdir()
+    (project / ".git" / "index").write_bytes(b"not an index")
+    _, walked = build(project)
+    _, fallback = build(project, git_index=True)
+    assert fallback == walked
+
+
+def test_build_git_index_rejects_zip(tmp_path):
+    zip_path = tmp_path / "a.zip"
+    shutil.make_archive(str(tmp_path / "a"), "zip", FIXTURE_DIR)
+    with pytest.raises(ValueError, match="git_index"):
+        build(zip_path, git_index=True)
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def _git_repo(path: Path) -> Path:
+    shutil.copytree(FIXTURE_DIR, path)
+    (path / "src" / "tiny_cli-extra").mkdir()
+    (path / "src" / "tiny_cli-extra" / "notes.md").write_text("# Notes\n")
+    _git(path, "init", "-q")
+    _git(path, "add", ".")
+    # Age the files so they are not "racily clean", then let git re-record their stat data
+    past = time.time() - 100
+    for fpath in path.rglob("*"):
+        if fpath.is_file() and ".git" not in fpath.parts:
+            os.utime(fpath, (past, past))
+    _git(path, "update-index", "--refresh", "-q")
+    return path
+
+
+@requires_git
+def test_git_index_lists_tracked_files_in_walk_order(tmp_path):
+    repo = _git_repo(tmp_path / "repo")
+    (repo / "untracked.txt").write_text("not in the index\n")
+    index = read_git_index(repo)
+    assert index is not None
+    walked = [p for p in list_directory(repo, [".git/**"]) if p != "untracked.txt"]
+    assert index.paths() == walked
+
+
+@requires_git
+def test_git_index_clean_blob(tmp_path):
+    repo = _git_repo(tmp_path / "repo")
+    index = read_git_index(repo)
+    data = (repo / "README.md").read_bytes()
+    expected = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+    assert index.clean_blob("README.md", (repo / "README.md").stat()) == expected
+
+    (repo / "README.md").write_text("edited\n")
+    assert index.clean_blob("README.md", (repo / "README.md").stat()) is None
+
+
+@requires_git
+def test_build_git_index_matches_walk(tmp_path):
+    repo = _git_repo(tmp_path / "repo")
+    _, walked = build(repo)
+    _, indexed = build(repo, git_index=True)
+    assert indexed == walked
+
+
+@requires_git
+def test_build_git_index_split_index_falls_back_to_walk(tmp_path):
+    repo = _git_repo(tmp_path / "repo")
+    _git(repo, "update-index", "--split-index")
+    (repo / "new.txt").write_text("added after the split\n")
+    _git(repo, "add", "new.txt")
+    assert read_git_index(repo) is None
+    _, walked = build(repo)
+    _, indexed = build(repo, git_index=True)
+    assert indexed == walked
+    assert "new.txt" in [f["path"] for f in indexed["files"]]
+
+
+@requires_git
+def test_build_git_index_cache_reuses_hashes_by_blob(tmp_path, monkeypatch):
+    """A fresh checkout elsewhere has new inodes/ctimes but the same blobs."""
+    cache_path = tmp_path / "cache.sqlite"
+    first = _git_repo(tmp_path / "first")
+    build(first, cache_path=cache_path, git_index=True)
+
+    second = _git_repo(tmp_path / "second")
+    hashed: list[Path] = []
+    real_read_file = scanner._read_file
+
+    def tracking_read_file(fpath, size, keep):
+        hashed.append(fpath)
+        return real_read_file(fpath, size, keep)
+
+    monkeypatch.setattr(scanner, "_read_file", tracking_read_file)
+    _, cached = build(second, cache_path=cache_path, git_index=True)
+    monkeypatch.undo()
+
+    assert hashed == []
+    _, plain = build(second)
+    assert cached == plain
@@ -0,0 +1,112 @@
+"""Tests for compiled glob matching (differential against the fnmatch loops)."""
+
+import itertools
+from fnmatch import fnmatch
+from pathlib import PurePosixPath
+
+from zip_meta_map.globs import GlobTiers, IgnoreMatcher, compile_globs, is_literal
+from zip_meta_map.profiles import ALL_PROFILES
+
+
+def _reference_should_ignore(path: str, ignore_globs: list[str]) -> bool:
+    """The original per-glob fnmatch implementation of scanner._should_ignore."""
+    posix = PurePosixPath(path)
+    path_str = str(posix)
+    for glob in ignore_globs:
+        if fnmatch(path_str, glob):
+            return True
+        if glob.endswith("/**") and not glob.startswith("**/"):
+            dir_name = glob.split("/")[0]
+            for part in posix.parts:
+                if fnmatch(part, dir_name):
+                    return True
+        if glob.startswith("**/") and glob.endswith("/**"):
+            dir_name = glob.split("/")[1]
+            for part in posix.parts[:-1]:
+                if fnmatch(part, dir_name):
+                    return True
+    return False
+
+
+_GLOB_SETS: list[list[str]] = [profile.ignore_globs for profile in ALL_PROFILES.values()] + [
+    [],
+    ["tests/**", "*.md"],
+    ["src/gen/**", "docs/*.txt", "[ab]*/**", "?.py"],
+    ["**/**", "**"],
+    ["/**", "*"],
+    ["/abs/**", "**/a/b/**", "**//x/**", "./src/**"],
+]
+
+_DIRS = ["", "src/", "node_modules/", "pkg/node_modules/x/", "build/lib/", "a/b/", "foo.egg-info/", "tests/data/"]
+_NAMES = ["main.py", "x.pyc", "README.md", "build", "node_modules", "__pycache__", "a.txt", "lib.rlib", "b.d"]
+_ODD = ["", ".", "./src/main.py", "src//main.py", "src/./x.py", "/abs/node_modules/x.js", "src/", "../escape.py"]
+
+_PATHS = [d + n for d, n in itertools.product(_DIRS, _NAMES)] + _ODD
+
+
+def test_matcher_matches_reference():
+    for globs in _GLOB_SETS:
+        matcher = IgnoreMatcher(globs)
+        for path in _PATHS:
+            assert matcher.matches(path) == _reference_should_ignore(path, globs), (path, globs)
+
+
+def test_prunes_only_fully_ignored_dirs():
+    """A pruned directory must have every file below it ignored."""
+    for globs in _GLOB_SETS:
+        matcher = IgnoreMatcher(globs)
+        for d in _DIRS[1:]:
+            rel_dir = d.rstrip("/")
+            if matcher.prunes(rel_dir):
+                for name in _NAMES + ["deep/er/file.txt"]:
+                    assert _reference_should_ignore(f"{rel_dir}/{name}", globs), (rel_dir, name, globs)
+
+
+def test_prunes_directory_globs():
+    matcher = IgnoreMatcher(["node_modules/**", "**/dist/**", "src/gen/**", "*.pyc"])
+    assert matcher.prunes("node_modules")
+    assert matcher.prunes("pkg/node_modules")
+    assert matcher.prunes("pkg/dist")
+    assert matcher.prunes("src")  # "src/gen/**" ignores any path with a "src" component
+    assert not matcher.prunes("lib")
+
+
+def test_compile_globs_empty():
+    assert compile_globs([]) is None
+
+
+def test_is_literal():
+    assert is_literal("node_modules")
+    assert not is_literal("*.egg-info")
+    assert not is_literal("[ab]")
+
+
+# ── GlobTiers ──
+
+_TIER_SETS: list[list[list[str]]] = [
+    [],
+    [[]],
+    [["src/*/cli.py", "main.py"], ["tests/**", "**/test_*.py"], ["**/fixtures/**"], ["*.md", "**/*.pyc"]],
+    [["**/*.d"], ["**/README.md"], ["build/**", "**/build"], ["a/b/**"], ["**/x.py", "*"]],
+    [["[ab]*/**", "?.py"], ["**/*[0-9].txt", "lib.*"], ["**/node_modules/**"], ["**"]],
+    [["/**", "./src/**"], ["**//x/**", "src//**"], ["**/.", "**/*.", "*."]],
+    [["**/*.py"], ["**/*.py"], ["*.py", "tests/**"]],
+]
+
+_TIER_PATHS = _PATHS + ["a.md", "x/fixtures/y.md", "docs/lib.a/b.d", "a1.txt", "q/w9.txt", "src/", "x.", "a/."]
+
+
+def _reference_first(path: str, tiers: list[list[str]]) -> int | None:
+    for i, patterns in enumerate(tiers):
+        if any(fnmatch(path, p) for p in patterns):
+            return i
+    return None
+
+
+def test_glob_tiers_match_reference():
+    for tiers in _TIER_SETS:
+        compiled = GlobTiers(tiers)
+        for path in _TIER_PATHS:
+            assert compiled.first(path) == _reference_first(path, tiers), (path, tiers)
+            head = path[: path.rfind("/") + 1]
+            assert compiled.first(path, path.split("/"), compiled.dir_rank(head)) == compiled.first(path)
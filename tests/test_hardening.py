@@ -1,5 +1,6 @@
 """Hardening tests: adversarial inputs, edge cases, and robustness checks."""
 
+import struct
 import zipfile
 
 from zip_meta_map.builder import build, validate_index
@@ -167,6 +168,33 @@ def test_zip_large_text_gets_chunked(tmp_path):
     assert "chunks" in index["capabilities"]
 
 
+def test_zip_stored_member_chunks_read_by_offset(tmp_path):
+    """Chunk offsets let a consumer seek to one chunk of a stored member."""
+    zip_path = tmp_path / "stored.zip"
+    large_content = "".join(f"## Part {i}\n" + "caf\u00e9 line\n" * 40 for i in range(120)).encode()
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("big.md", large_content)
+
+    _, index = build(zip_path)
+    validate_index(index)
+    assert "chunk_offsets" in index["capabilities"]
+    chunks = index["files"][0]["chunks"]
+    assert chunks[0]["start_byte"] == 0
+    assert chunks[-1]["end_byte"] == len(large_content)
+
+    with zipfile.ZipFile(zip_path) as zf:
+        info = zf.getinfo("big.md")
+    with open(zip_path, "rb") as fh:
+        fh.seek(info.header_offset + 26)
+        name_len, extra_len = struct.unpack("<HH", fh.read(4))
+        data_offset = info.header_offset + 30 + name_len + extra_len
+        chunk = chunks[37]
+        fh.seek(data_offset + chunk["start_byte"])
+        piece = fh.read(chunk["byte_len"])
+    assert piece.decode().startswith(chunk["heading"])
+    assert piece.count(b"\n") == chunk["end_line"] - chunk["start_line"] + 1
+
+
 # ── Empty directory in ZIP ──
 
 
@@ -1,9 +1,20 @@
 """Tests for incremental scanning with hash cache."""
 
 import json
+import os
+import zipfile
 from pathlib import Path
 
-from zip_meta_map.scanner import load_hash_cache, save_hash_cache, scan_directory_incremental
+import pytest
+
+from zip_meta_map import scanner
+from zip_meta_map.scanner import (
+    load_hash_cache,
+    save_hash_cache,
+    scan_directory_incremental,
+    scan_zip,
+    scan_zip_incremental,
+)
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
 
@@ -43,6 +54,112 @@ def test_incremental_retain_content(tmp_path):
     assert len(readme.content) > 0
 
 
+def test_incremental_stamp_fields(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    scan_directory_incremental(FIXTURE_DIR, [".git/**"], cache_path)
+    record = load_hash_cache(cache_path)["README.md"]
+    st = (FIXTURE_DIR / "README.md").stat()
+    assert record["mtime_ns"] == st.st_mtime_ns
+    assert record["ctime_ns"] == st.st_ctime_ns
+    assert (record["ino"], record["dev"], record["size"]) == (st.st_ino, st.st_dev, st.st_size)
+
+
+def test_incremental_detects_same_size_same_mtime_edit(tmp_path):
+    """An edit that keeps size and mtime (same granularity tick) still changes ctime."""
+    root = tmp_path / "proj"
+    root.mkdir()
+    target = root / "a.txt"
+    target.write_bytes(b"aaaa")
+    cache_path = tmp_path / "cache.json"
+    scan_directory_incremental(root, [], cache_path)
+
+    st = target.stat()
+    target.write_bytes(b"bbbb")
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+    if target.stat().st_ctime_ns == st.st_ctime_ns:
+        pytest.skip("filesystem ctime did not advance")
+
+    files = scan_directory_incremental(root, [], cache_path)
+    assert files[0].sha256 == scanner._sha256(b"bbbb")
+
+
+def test_incremental_rename_reuses_hash(tmp_path, monkeypatch):
+    root = tmp_path / "proj"
+    (root / "old").mkdir(parents=True)
+    (root / "old" / "a.txt").write_bytes(b"payload")
+    cache_path = tmp_path / "cache.json"
+    first = scan_directory_incremental(root, [], cache_path)
+
+    (root / "old").rename(root / "new")
+    hashed: list[Path] = []
+    real_read_file = scanner._read_file
+
+    def tracking_read_file(fpath, size, keep):
+        hashed.append(fpath)
+        return real_read_file(fpath, size, keep)
+
+    monkeypatch.setattr(scanner, "_read_file", tracking_read_file)
+    files = scan_directory_incremental(root, [], cache_path)
+
+    assert hashed == []
+    assert [f.path for f in files] == ["new/a.txt"]
+    assert files[0].sha256 == first[0].sha256
+    assert set(load_hash_cache(cache_path)) == {"new/a.txt"}
+
+
+def _stale_inode_record(fpath: Path, **overrides) -> dict:
+    """A record under another path whose stamp matches fpath's inode, size and mtime but not its bytes."""
+    st = fpath.stat()
+    record = {
+        "sha256": "0" * 64,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "ctime_ns": st.st_ctime_ns - 1,
+        "ino": st.st_ino,
+        "dev": st.st_dev,
+    }
+    return {**record, **overrides}
+
+
+def test_incremental_reused_inode_is_rehashed(tmp_path):
+    """A new file that got a deleted file's inode (same size and mtime) does not inherit its hash."""
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "new.txt").write_bytes(b"fresh")
+    cache_path = tmp_path / "cache.json"
+    save_hash_cache(cache_path, {"gone.txt": _stale_inode_record(root / "new.txt")})
+
+    files = scan_directory_incremental(root, [], cache_path)
+    assert files[0].sha256 == scanner._sha256(b"fresh")
+
+
+def test_incremental_inode_match_needs_old_path_gone(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "new.txt").write_bytes(b"fresh")
+    (root / "old.txt").write_bytes(b"other")
+    cache_path = tmp_path / "cache.json"
+    # Even an unchanged ctime is not trusted while the old path holds another file
+    stale = _stale_inode_record(root / "new.txt", ctime_ns=(root / "new.txt").stat().st_ctime_ns)
+    save_hash_cache(cache_path, {"old.txt": stale})
+
+    files = {f.path: f for f in scan_directory_incremental(root, [], cache_path)}
+    assert files["new.txt"].sha256 == scanner._sha256(b"fresh")
+
+
+def test_incremental_file_rename_rehashes_and_keeps_hash(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "a.txt").write_bytes(b"payload")
+    cache_path = tmp_path / "cache.json"
+    first = scan_directory_incremental(root, [], cache_path)
+    (root / "a.txt").rename(root / "b.txt")
+
+    files = scan_directory_incremental(root, [], cache_path)
+    assert files[0].path == "b.txt"
+    assert files[0].sha256 == first[0].sha256
+
+
 def test_hash_cache_round_trip(tmp_path):
     cache_path = tmp_path / "cache.json"
     entries = {
@@ -69,3 +186,63 @@ def test_hash_cache_corrupt_json(tmp_path):
 def test_hash_cache_missing_file(tmp_path):
     cache_path = tmp_path / "nonexistent" / "cache.json"
     assert load_hash_cache(cache_path) == {}
+
+
+def _write_zip(path: Path, members: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+def test_zip_incremental_matches_scan_zip(tmp_path):
+    archive = tmp_path / "a.zip"
+    _write_zip(archive, {"a.txt": b"alpha", "b/c.py": b"print(1)\n"})
+    cache_path = tmp_path / "cache.json"
+
+    files = scan_zip_incremental(archive, [], cache_path, retain_content=True)
+    expected = scan_zip(archive, [], retain_content=True)
+    assert [(f.path, f.sha256, f.content) for f in files] == [(f.path, f.sha256, f.content) for f in expected]
+
+    cache = load_hash_cache(cache_path)
+    assert set(cache) == {"a.txt", "b/c.py"}
+    assert {"sha256", "size", "crc", "compress_size"} <= set(cache["a.txt"])
+
+
+def test_zip_incremental_skips_unchanged_members(tmp_path, monkeypatch):
+    """Unchanged members are not decompressed; changed ones are re-hashed."""
+    cache_path = tmp_path / "cache.json"
+    first = tmp_path / "v1.zip"
+    _write_zip(first, {"same.txt": b"unchanged", "edit.txt": b"old"})
+    scan_zip_incremental(first, [], cache_path)
+
+    second = tmp_path / "v2.zip"
+    _write_zip(second, {"same.txt": b"unchanged", "edit.txt": b"new!"})
+
+    opened: list[str] = []
+    real_open = zipfile.ZipFile.open
+
+    def tracking_open(self, name, *args, **kwargs):
+        opened.append(name.filename if isinstance(name, zipfile.ZipInfo) else name)
+        return real_open(self, name, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", tracking_open)
+    files = scan_zip_incremental(second, [], cache_path)
+
+    assert opened == ["edit.txt"]
+    by_path = {f.path: f for f in files}
+    assert by_path["edit.txt"].sha256 == scan_zip(second, [])[0].sha256
+
+
+def test_zip_incremental_stale_crc_rehashes(tmp_path):
+    archive = tmp_path / "a.zip"
+    _write_zip(archive, {"a.txt": b"alpha"})
+    cache_path = tmp_path / "cache.json"
+    scan_zip_incremental(archive, [], cache_path)
+
+    entries = load_hash_cache(cache_path)
+    entries["a.txt"]["sha256"] = "0" * 64
+    entries["a.txt"]["crc"] += 1
+    save_hash_cache(cache_path, entries)
+
+    files = scan_zip_incremental(archive, [], cache_path)
+    assert files[0].sha256 == scan_zip(archive, [])[0].sha256
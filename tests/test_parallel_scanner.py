@@ -1,8 +1,18 @@
 """Tests for parallel directory scanning."""
 
+import zipfile
 from pathlib import Path
 
-from zip_meta_map.scanner import scan_directory, scan_directory_parallel
+from zip_meta_map.scanner import (
+    PARALLEL_MIN_FILES,
+    default_workers,
+    list_directory,
+    scan_directory,
+    scan_directory_parallel,
+    scan_paths,
+    scan_zip,
+    scan_zip_parallel,
+)
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
 
@@ -52,3 +62,53 @@ def test_parallel_deterministic_order():
     run1 = scan_directory_parallel(FIXTURE_DIR, ignore)
     run2 = scan_directory_parallel(FIXTURE_DIR, ignore)
     assert [f.path for f in run1] == [f.path for f in run2]
+
+
+def test_scan_paths_workers_preserve_order():
+    """Threaded scan_paths should return files in listing order."""
+    listing = list_directory(FIXTURE_DIR, [".git/**"])
+    seq = scan_paths(FIXTURE_DIR, listing)
+    par = scan_paths(FIXTURE_DIR, listing, max_workers=4)
+    assert [(f.path, f.sha256) for f in par] == [(f.path, f.sha256) for f in seq]
+
+
+def test_default_workers():
+    assert default_workers(0) == 1
+    assert default_workers(PARALLEL_MIN_FILES - 1) == 1
+    assert default_workers(PARALLEL_MIN_FILES) >= 1
+
+
+def _make_zip(tmp_path: Path, count: int) -> Path:
+    zip_path = tmp_path / "many.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        # Write in reverse so archive order differs from sorted order
+        for i in reversed(range(count)):
+            zf.writestr(f"pkg{i % 7}/mod_{i}.py", f"value = {i}\n" * (i % 50 + 1))
+        zf.writestr("node_modules/dep/index.js", "ignored")
+    return zip_path
+
+
+def test_zip_parallel_matches_sequential(tmp_path):
+    zip_path = _make_zip(tmp_path, 250)
+    ignore = ["node_modules/**"]
+    seq = scan_zip(zip_path, ignore, retain_content=True)
+    par = scan_zip_parallel(zip_path, ignore, retain_content=True, max_workers=4)
+    assert len(par) == 250
+    assert [(f.path, f.sha256, f.size_bytes, f.content) for f in par] == [
+        (f.path, f.sha256, f.size_bytes, f.content) for f in seq
+    ]
+
+
+def test_zip_parallel_small_archive_sequential(tmp_path):
+    zip_path = _make_zip(tmp_path, 5)
+    par = scan_zip_parallel(zip_path, [], max_workers=4)
+    assert [f.path for f in par] == [f.path for f in scan_zip(zip_path, [])]
+
+
+def test_zip_parallel_analyze_releases_bytes(tmp_path):
+    zip_path = _make_zip(tmp_path, 250)
+    par = scan_zip_parallel(zip_path, [], max_workers=4, analyze=lambda f: {"size": len(f.load_content())})
+    assert [f.analysis for f in par] == [{"size": f.size_bytes} for f in par]
+    assert not any(f.content is not None or f.source.loaded for f in par)
+    # Released members are inflated again on demand
+    assert par[0].load_content() == scan_zip(zip_path, [], retain_content=True)[0].content
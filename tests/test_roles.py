@@ -1,7 +1,45 @@
 """Tests for role assignment with confidence scoring."""
 
-from zip_meta_map.profiles import NODE_TS_TOOL, PYTHON_CLI
-from zip_meta_map.roles import assign_role
+import dataclasses
+import gc
+import random
+import shutil
+import weakref
+from fnmatch import fnmatch
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from zip_meta_map import builder, roles
+from zip_meta_map.builder import build
+from zip_meta_map.profiles import ALL_PROFILES, NODE_TS_TOOL, PYTHON_CLI, CustomRole, Profile
+from zip_meta_map.roles import (
+    _ASSET_EXTS,
+    _CI_PATTERNS,
+    _DATA_EXTS,
+    _DOC_API_PATTERNS,
+    _DOC_ARCH_NAMES,
+    _DOC_ARCH_PATTERNS,
+    _EXT_ROLES,
+    _FIXTURE_PATTERNS,
+    _GENERATED_DIR_PATTERNS,
+    _INTERNAL_INDICATORS,
+    _LOCKFILES,
+    _NAME_ROLES,
+    _PUBLIC_API_NAMES,
+    _SCHEMA_PATTERNS,
+    _SCRIPT_PATTERNS,
+    _SOURCE_EXTS,
+    _TEST_PATTERNS,
+    _VENDOR_DIR_PATTERNS,
+    CompiledProfile,
+    RoleAssignment,
+    RoleStats,
+    assign_role,
+    assign_roles,
+    compile_profile,
+    format_role_stats,
+)
 
 # ── Entrypoints ──
 
@@ -268,3 +306,294 @@ def test_reason_always_present():
     for path in paths:
         r = assign_role(path, PYTHON_CLI)
         assert r.reason, f"No reason for {path}"
+
+
+# ── CompiledProfile vs the fnmatch cascade ──
+
+
+def _matches_any(path: str, patterns: list[str]) -> bool:
+    for pattern in patterns:
+        if fnmatch(path, pattern):
+            return True
+    return False
+
+
+def _reference_assign_role(path: str, profile: Profile) -> RoleAssignment:
+    """The fnmatch cascade CompiledProfile replaces."""
+    posix = PurePosixPath(path)
+    name = posix.name
+    ext = posix.suffix.lower()
+
+    for pattern in profile.entrypoint_patterns:
+        if fnmatch(path, pattern):
+            return RoleAssignment("entrypoint", 0.95, f"matches profile entrypoint pattern '{pattern}'")
+
+    if name in _LOCKFILES:
+        return RoleAssignment("lockfile", 0.95, f"'{name}' is a known lock file")
+
+    if _matches_any(path, _CI_PATTERNS):
+        return RoleAssignment("ci", 0.90, "CI/CD pipeline definition")
+
+    if name in _NAME_ROLES:
+        role, conf, reason = _NAME_ROLES[name]
+        return RoleAssignment(role, conf, reason)
+
+    if _matches_any(path, _GENERATED_DIR_PATTERNS):
+        return RoleAssignment("generated", 0.85, "file in generated/build output directory")
+
+    if _matches_any(path, _VENDOR_DIR_PATTERNS):
+        return RoleAssignment("vendor", 0.85, "file in vendored third-party directory")
+
+    if _matches_any(path, _FIXTURE_PATTERNS):
+        return RoleAssignment("fixture", 0.85, "test fixture or sample data")
+
+    if _matches_any(path, _TEST_PATTERNS):
+        return RoleAssignment("test", 0.85, "test file")
+
+    if _matches_any(path, _SCHEMA_PATTERNS):
+        return RoleAssignment("schema", 0.85, "schema definition")
+
+    if name in _DOC_ARCH_NAMES:
+        return RoleAssignment("doc_architecture", 0.90, f"'{name}' is an architecture document")
+
+    if _matches_any(path, _DOC_ARCH_PATTERNS):
+        return RoleAssignment("doc_architecture", 0.80, "file in architecture docs directory")
+
+    if _matches_any(path, _DOC_API_PATTERNS):
+        return RoleAssignment("doc_api", 0.80, "file in API documentation directory")
+
+    if _matches_any(path, _SCRIPT_PATTERNS):
+        return RoleAssignment("script", 0.75, "file in scripts/tools directory")
+
+    if name in _PUBLIC_API_NAMES and ext in _SOURCE_EXTS:
+        if len(posix.parts) >= 2:
+            return RoleAssignment("public_api", 0.70, f"'{name}' is typically a public API surface")
+
+    if _matches_any(path, _INTERNAL_INDICATORS):
+        return RoleAssignment("internal", 0.70, "internal/private module")
+
+    for custom in profile.custom_roles:
+        if _matches_any(path, custom.patterns):
+            return RoleAssignment(custom.name, custom.confidence, f"custom role '{custom.name}' via pattern match")
+
+    if ext in _EXT_ROLES:
+        role, conf, reason = _EXT_ROLES[ext]
+        return RoleAssignment(role, conf, reason)
+
+    if ext in _ASSET_EXTS:
+        return RoleAssignment("asset", 0.80, f"'{ext}' is a static asset extension")
+
+    if ext in _DATA_EXTS:
+        return RoleAssignment("data", 0.75, f"'{ext}' is a data file extension")
+
+    if ext in _SOURCE_EXTS:
+        return RoleAssignment("source", 0.60, f"source code ('{ext}' extension)")
+
+    if ext in {".json", ".yaml", ".yml"}:
+        return RoleAssignment("data", 0.50, f"'{ext}' file without stronger classification signal")
+
+    return RoleAssignment("unknown", 0.30, f"no heuristic matched for '{name}'")
+
+
+_DIRS = [
+    "",
+    "src/",
+    "src/pkg/",
+    "src/pkg/_internal/",
+    "lib/internal/",
+    "pkg/private/deep/",
+    "tests/",
+    "test/",
+    "tests/fixtures/",
+    "tests/data/",
+    "a/fixtures/b/",
+    "a/__fixtures__/",
+    "dist/",
+    "build/",
+    "target/release/",
+    "vendor/",
+    "third_party/x/",
+    "docs/",
+    "docs/api/",
+    "docs/adr/",
+    "docs/design/",
+    "reference/",
+    "scripts/",
+    "tools/",
+    "bin/",
+    ".github/workflows/",
+    ".github/actions/setup/",
+    ".circleci/",
+    "schema/",
+    "api/schema/",
+    "cmd/app/",
+    "internal/",
+    "Src/Pkg/",
+    "x/test_dir/",
+]
+
+_NAMES = sorted(
+    set(_LOCKFILES)
+    | set(_NAME_ROLES)
+    | set(_DOC_ARCH_NAMES)
+    | set(_PUBLIC_API_NAMES)
+    | {"main.py", "cli.py", "__main__.py", "main.go", "main.rs", "Program.cs", "Main.java", "index.ts", "cli.ts"}
+    | {"test_x.py", "x_test.py", "a.test.ts", "b.spec.jsx", "conftest.py", "x_test.go", "_private.py", "mod.py"}
+    | {"a.schema.json", "api.proto", "q.graphql", "openapi.yaml", "swagger.json", "data.csv", "x.JSON", "y.yml"}
+    | {".gitlab-ci.yml", "Jenkinsfile", ".travis.yml", "app.csproj", "gen.pb.go", "x.generated.cs", "noext"}
+    | {".env", ".env.example", "foo.", ".hidden", "a..b", "Makefile.PY", "photo.PNG", "style.css", "x.d.ts"}
+    | {"a" + ext for ext in set(_EXT_ROLES) | _ASSET_EXTS | _DATA_EXTS | _SOURCE_EXTS}
+)
+
+_ODD_PATHS = ["a//b.py", "./src/pkg/__init__.py", "/abs/main.py", "src/pkg/", "src/./cli.py", ".", ""]
+
+_CUSTOM_PROFILE = Profile(
+    name="custom",
+    entrypoint_patterns=["app/*.py", "**/entry_*.rs"],
+    start_here_extras=[],
+    ignore_globs=[],
+    plans={},
+    custom_roles=[
+        CustomRole(name="empty", description="no patterns", patterns=[]),
+        CustomRole(
+            name="proto_gen", description="generated protobuf", patterns=["**/*.pb.go", "gen/**"], confidence=0.7
+        ),
+        CustomRole(name="bracket", description="char classes", patterns=["[ab]*/[!x]?.md"]),
+    ],
+)
+
+
+def _corpus(seed: int, count: int) -> list[str]:
+    rng = random.Random(seed)
+    paths = [d + n for d in _DIRS for n in _NAMES] + _ODD_PATHS
+    for _ in range(count):
+        depth = rng.randint(1, 4)
+        paths.append("".join(rng.choice(_DIRS) for _ in range(depth)) + rng.choice(_NAMES))
+    return paths
+
+
+@pytest.mark.parametrize("profile", [*ALL_PROFILES.values(), _CUSTOM_PROFILE], ids=lambda p: p.name)
+def test_compiled_profile_matches_fnmatch_cascade(profile):
+    compiled = CompiledProfile(profile)
+    for path in _corpus(seed=len(profile.name), count=3000):
+        assert compiled.assign(path) == _reference_assign_role(path, profile), path
+
+
+def test_compile_profile_is_cached_per_profile():
+    assert compile_profile(PYTHON_CLI) is compile_profile(PYTHON_CLI)
+    assert compile_profile(NODE_TS_TOOL) is not compile_profile(PYTHON_CLI)
+    assert roles.compile_profile(PYTHON_CLI).profile is PYTHON_CLI
+
+
+def test_compiled_profile_lives_with_its_profile():
+    """Profiles built per call (e.g. per MCP request) are compiled once each and freed with them."""
+    profile = dataclasses.replace(PYTHON_CLI, name="per_call")
+    compiled = compile_profile(profile)
+    assert compile_profile(profile) is compiled
+    assert dataclasses.replace(profile) == profile
+    assert compile_profile(dataclasses.replace(profile)) is not compiled
+    ref = weakref.ref(profile)
+    del profile, compiled
+    gc.collect()
+    assert ref() is None
+
+
+def test_profile_without_globs():
+    bare = Profile(name="bare", entrypoint_patterns=[], start_here_extras=[], ignore_globs=[], plans={})
+    assert CompiledProfile(bare).assign("src/mod.py") == RoleAssignment("source", 0.60, "source code ('.py' extension)")
+
+
+# ── Batch assignment ──
+
+
+@pytest.mark.parametrize("profile", [*ALL_PROFILES.values(), _CUSTOM_PROFILE], ids=lambda p: p.name)
+def test_assign_roles_matches_assign_role(profile):
+    paths = _corpus(seed=7, count=2000)
+    expected = [assign_role(p, profile) for p in paths]
+    assert assign_roles(paths, profile) == expected
+    assert assign_roles(sorted(paths), profile) == [assign_role(p, profile) for p in sorted(paths)]
+
+
+def test_assign_roles_shares_equal_results():
+    result = assign_roles(["tests/a.py", "tests/b.py", "vendor/x.js", "tests/c.py"], PYTHON_CLI)
+    assert result[0] is result[1] is result[3]
+    assert result[2].role == "vendor"
+    assert assign_roles([], PYTHON_CLI) == []
+
+
+# ── Tier statistics ──
+
+
+@pytest.mark.parametrize("profile", [*ALL_PROFILES.values(), _CUSTOM_PROFILE], ids=lambda p: p.name)
+def test_traced_assignment_matches(profile):
+    paths = _corpus(seed=11, count=1000)
+    stats = RoleStats()
+    assert assign_roles(paths, profile, stats) == assign_roles(paths, profile)
+    assert stats.paths == len(paths)
+    assert sum(t.hits for t in stats.tiers.values()) == len(paths)
+
+
+def test_role_stats_counts_tiers_in_order():
+    stats = RoleStats()
+    assign_roles(["src/app/cli.py", "poetry.lock", "gen/x.pb.go", "notes.xyz"], _CUSTOM_PROFILE, stats)
+    tiers = stats.to_dict()["tiers"]
+    names = [t["tier"] for t in tiers]
+    assert names[:3] == ["entrypoint", "lockfile", "ci"]
+    assert names.index("internal") < names.index("custom:empty") < names.index("custom:proto_gen")
+    by_name = {t["tier"]: t for t in tiers}
+    assert by_name["entrypoint"]["checks"] == 4
+    assert by_name["lockfile"]["hits"] == 1
+    assert by_name["custom:proto_gen"]["hits"] == 1
+    assert by_name["custom:bracket"]["hits"] == 0  # never matched, still reported
+    assert by_name["unknown"]["hits"] == 1
+    assert all(t["time_us"] >= 0 for t in tiers)
+
+
+def test_build_role_stats_counts_every_file_once(tmp_path):
+    fixture = Path(__file__).parent / "fixtures" / "tiny_python_cli"
+    cache = tmp_path / "cache.json"
+    first = RoleStats()
+    _, index = build(fixture, cache_path=cache, role_stats=first)
+    assert first.paths == len(index["files"])
+    # Cached entries are still classified once: the role picks the scan's content work
+    second = RoleStats()
+    build(fixture, cache_path=cache, role_stats=second)
+    assert second.paths == len(index["files"])
+
+
+@pytest.mark.parametrize("as_zip", [False, True])
+def test_build_classifies_each_file_once(tmp_path, monkeypatch, as_zip):
+    fixture = Path(__file__).parent / "fixtures" / "tiny_python_cli"
+    if as_zip:
+        shutil.make_archive(str(tmp_path / "tiny"), "zip", fixture)
+        fixture = tmp_path / "tiny.zip"
+    classified: list[str] = []
+    real_assign_roles = builder.assign_roles
+
+    def counting_assign_roles(paths, profile, stats=None):
+        classified.extend(paths)
+        return real_assign_roles(paths, profile, stats)
+
+    def no_single_assign(path, profile):
+        raise AssertionError(f"{path} classified outside the batch")
+
+    monkeypatch.setattr(builder, "assign_roles", counting_assign_roles)
+    monkeypatch.setattr(builder, "assign_role", no_single_assign)
+    _, index = build(fixture)
+    assert sorted(classified) == sorted(f["path"] for f in index["files"])
+
+
+def test_format_role_stats():
+    stats = {
+        "paths": 3,
+        "tiers": [
+            {"tier": "entrypoint", "checks": 3, "hits": 1, "time_us": 12.4},
+            {"tier": "source", "checks": 2, "hits": 2, "time_us": 2500.0},
+            {"tier": "unknown", "checks": 0, "hits": 0, "time_us": 3_200_000.0},
+        ],
+    }
+    lines = format_role_stats(stats)
+    assert lines[0] == "Role tiers (3 paths, instrumented)"
+    assert lines[3].split() == ["entrypoint", "3", "1", "12", "us"]
+    assert lines[4].endswith("2.5 ms")
+    assert lines[5].endswith("3.20 s")
@@ -1,8 +1,25 @@
 """Tests for the file scanner."""
 
+import hashlib
+import os
+import zipfile
 from pathlib import Path
 
-from zip_meta_map.scanner import scan_directory
+import pytest
+
+from zip_meta_map.scanner import (
+    PARALLEL_MIN_FILES,
+    ContentSource,
+    FileSource,
+    _should_ignore,
+    filter_paths,
+    list_directory,
+    list_zip,
+    scan_directory,
+    scan_paths,
+    scan_zip,
+    scan_zip_parallel,
+)
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures" / "tiny_python_cli"
 
@@ -34,3 +51,234 @@ def test_scan_computes_size():
     files = scan_directory(FIXTURE_DIR, [])
     readme = next(f for f in files if f.path == "README.md")
     assert readme.size_bytes > 0
+
+
+def test_list_directory_matches_scan_order():
+    listing = list_directory(FIXTURE_DIR, [".git/**"])
+    files = scan_directory(FIXTURE_DIR, [".git/**"])
+    assert listing == [f.path for f in files]
+
+
+def test_list_directory_does_not_read(monkeypatch):
+    def _fail(self):
+        raise AssertionError(f"unexpected read of {self}")
+
+    monkeypatch.setattr(Path, "read_bytes", _fail)
+    assert "README.md" in list_directory(FIXTURE_DIR, [])
+
+
+def test_list_directory_keeps_walk_stats():
+    stats: dict[str, os.stat_result] = {}
+    listing = list_directory(FIXTURE_DIR, [], stats=stats)
+    assert sorted(stats) == sorted(listing)
+    readme = stats["README.md"]
+    assert (readme.st_size, readme.st_ino) == (
+        (FIXTURE_DIR / "README.md").stat().st_size,
+        os.stat(FIXTURE_DIR / "README.md").st_ino,
+    )
+
+
+def test_scan_directory_reuses_walk_stats(monkeypatch):
+    expected = scan_directory(FIXTURE_DIR, [])
+    stated: list[Path] = []
+    real_stat = Path.stat
+
+    def _tracking_stat(self, **kwargs):
+        stated.append(self)
+        return real_stat(self, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "stat", _tracking_stat)
+        files = scan_directory(FIXTURE_DIR, [])
+    assert files == expected
+    assert not [p for p in stated if p.name in {"README.md", "main.py", "pyproject.toml"}]
+
+
+def test_scan_paths_reuses_listing():
+    listing = filter_paths(list_directory(FIXTURE_DIR, []), ["tests/**"])
+    files = scan_paths(FIXTURE_DIR, listing)
+    assert [f.path for f in files] == listing
+    assert "tests/test_main.py" not in listing
+
+
+def test_list_zip_skips_dirs_and_ignores(tmp_path):
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("src/", "")
+        zf.writestr("src/main.py", "print('hi')")
+        zf.writestr("node_modules/x/index.js", "x")
+    assert list_zip(zip_path, ["node_modules/**"]) == ["src/main.py"]
+
+
+def _rglob_listing(root: Path, ignore_globs: list[str]) -> list[str]:
+    """The pre-walker listing: sorted rglob filtered per file."""
+    rels = (p.relative_to(root).as_posix() for p in sorted(root.rglob("*")) if p.is_file())
+    return [rel for rel in rels if not _should_ignore(rel, ignore_globs)]
+
+
+def _make_tree(root: Path) -> None:
+    for rel in [
+        "a.txt",
+        "a/x.py",
+        "a-b/y.py",
+        "A/z.py",
+        "node_modules/dep/index.js",
+        "pkg/node_modules/dep/index.js",
+        "pkg/src/main.py",
+        "pkg/dist/bundle.js",
+        "src/__pycache__/m.cpython-311.pyc",
+        "src/m.py",
+        "src/gen/out.py",
+    ]:
+        fpath = root / rel
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(rel)
+
+
+def test_walker_matches_rglob_order(tmp_path):
+    _make_tree(tmp_path)
+    for globs in (
+        [],
+        ["node_modules/**"],
+        ["**/node_modules/**", "**/dist/**"],
+        ["__pycache__/**", "*.pyc", "src/gen/**"],
+        ["a*/**"],
+    ):
+        assert list_directory(tmp_path, globs) == _rglob_listing(tmp_path, globs), globs
+
+
+def test_walker_prunes_ignored_dirs(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    opened: list[str] = []
+    original = os.scandir
+
+    def _tracking_scandir(path):
+        opened.append(Path(path).relative_to(tmp_path).as_posix())
+        return original(path)
+
+    monkeypatch.setattr(os, "scandir", _tracking_scandir)
+    list_directory(tmp_path, ["**/node_modules/**", "gen/**"])
+    assert "node_modules" not in opened
+    assert "pkg/node_modules" not in opened
+    assert "src/gen" not in opened
+    assert "pkg/src" in opened
+    assert "pkg/dist" in opened
+
+
+def test_content_cap_streams_large_files(tmp_path):
+    big = b"x" * 5000
+    (tmp_path / "big.txt").write_bytes(big)
+    (tmp_path / "small.txt").write_bytes(b"hello")
+    files = {f.path: f for f in scan_directory(tmp_path, [], retain_content=True, max_content_bytes=1024)}
+    assert files["big.txt"].content is None
+    assert files["big.txt"].sha256 == hashlib.sha256(big).hexdigest()
+    assert files["big.txt"].size_bytes == 5000
+    assert files["small.txt"].content == b"hello"
+
+
+def test_content_cap_streams_large_zip_members(tmp_path):
+    big = b"y" * 5000
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("big.txt", big)
+        zf.writestr("small.txt", "hello")
+    files = {f.path: f for f in scan_zip(zip_path, [], retain_content=True, max_content_bytes=1024)}
+    assert files["big.txt"].content is None
+    assert files["big.txt"].sha256 == hashlib.sha256(big).hexdigest()
+    assert files["small.txt"].content == b"hello"
+
+
+def test_content_cap_none_keeps_everything(tmp_path):
+    (tmp_path / "big.txt").write_bytes(b"z" * 5000)
+    files = scan_directory(tmp_path, [], retain_content=True, max_content_bytes=None)
+    assert files[0].content == b"z" * 5000
+
+
+def test_scan_attaches_lazy_sources(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"hello")
+    (tmp_path / "big.txt").write_bytes(b"x" * 5000)
+    files = {f.path: f for f in scan_directory(tmp_path, [], max_content_bytes=1024)}
+    small = files["a.txt"]
+    assert small.content is None
+    assert not small.source.loaded
+    assert small.load_content() == b"hello"
+    assert small.source.loaded
+    small.release_content()
+    assert not small.source.loaded
+    # Over the cap: no bytes at all, as with retain_content=True
+    assert files["big.txt"].source is None
+    assert files["big.txt"].load_content() is None
+
+
+def test_zip_member_sources_load_after_scan(tmp_path):
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("a.txt", "alpha")
+        zf.writestr("b/c.txt", "gamma")
+    files = scan_zip(zip_path, [])
+    assert [f.load_content() for f in files] == [b"alpha", b"gamma"]
+    assert files[0].source.reader._handles == []
+
+
+def test_zip_scan_closes_reader_handles(tmp_path):
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for i in range(PARALLEL_MIN_FILES + 20):
+            zf.writestr(f"f{i:03d}.txt", f"file {i}")
+    loaded: list[bytes] = []
+
+    def analyze(f):
+        f.source.release()  # force a load through the shared reader
+        loaded.append(f.load_content())
+        return {}
+
+    files = scan_zip_parallel(zip_path, [], max_workers=4, analyze=analyze)
+    assert len(loaded) == len(files)
+    assert files[0].source.reader._handles == []
+    assert files[-1].load_content() == f"file {len(files) - 1}".encode()
+    assert files[-1].source.reader._handles == []
+
+
+def test_content_source_is_abstract():
+    with pytest.raises(TypeError):
+        ContentSource()
+
+
+def test_analyze_sees_bytes_read_for_hashing(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_bytes(b"alpha")
+    (tmp_path / "b.txt").write_bytes(b"beta")
+    loads: list[Path] = []
+    monkeypatch.setattr(FileSource, "_load", lambda self: loads.append(self.path) or self.path.read_bytes())
+
+    def analyze(f):
+        assert f.source.loaded
+        return {"first": f.load_content()[:1].decode()}
+
+    files = scan_paths(tmp_path, ["a.txt", "b.txt"], analyze=analyze)
+    assert [f.analysis for f in files] == [{"first": "a"}, {"first": "b"}]
+    assert all(f.content is None and not f.source.loaded for f in files)
+    assert loads == []
+
+
+def test_scan_plan_levels(tmp_path):
+    (tmp_path / "full.txt").write_bytes(b"full")
+    (tmp_path / "hash.txt").write_bytes(b"hash")
+    (tmp_path / "skip.txt").write_bytes(b"skip")
+    zip_path = tmp_path / "a.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for name in ("full.txt", "hash.txt", "skip.txt"):
+            zf.write(tmp_path / name, name)
+
+    def plan(path):
+        return path.split(".")[0]
+
+    dir_files = scan_paths(tmp_path, ["full.txt", "hash.txt", "skip.txt"], retain_content=True, plan=plan)
+    zip_files = scan_zip_parallel(zip_path, [], retain_content=True, plan=plan)
+    for files in (dir_files, zip_files):
+        full, hashed, skipped = files
+        assert [f.content_work for f in files] == ["full", "hash", "skip"]
+        assert full.content == b"full" and full.source is not None
+        assert hashed.sha256 == hashlib.sha256(b"hash").hexdigest()
+        assert hashed.content is None and hashed.source is None
+        assert skipped.sha256 is None and skipped.source is None
+        assert skipped.size_bytes == 4
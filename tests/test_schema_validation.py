@@ -204,6 +204,34 @@ def test_index_accepts_policy_applied():
     jsonschema.validate(good, schema)
 
 
+def _index_with_entry(entry: dict) -> dict:
+    return {
+        "format": "zip-meta-map",
+        "version": "0.2",
+        "generated_by": "test",
+        "profile": "test",
+        "start_here": [],
+        "ignore": [],
+        "files": [entry],
+        "plans": {},
+    }
+
+
+def test_index_accepts_metadata_only_entry():
+    schema = load_index_schema()
+    entry = {"path": "a.py", "size_bytes": 1, "crc32": "0badf00d", "compression": "deflated"}
+    good = _index_with_entry({**entry, "role": "source", "confidence": 0.5})
+    good["metadata_only"] = True
+    jsonschema.validate(good, schema)
+
+
+def test_index_rejects_entry_without_digest():
+    schema = load_index_schema()
+    bad = _index_with_entry({"path": "a.py", "size_bytes": 1, "role": "source", "confidence": 0.5})
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate(bad, schema)
+
+
 def test_index_accepts_modules():
     schema = load_index_schema()
     good = {
@@ -3,6 +3,8 @@
 import json
 from pathlib import Path
 
+import pytest
+
 # Test the handler functions directly since MCP SDK may not be installed
 from zip_meta_map.builder import build, validate_index
 
@@ -73,3 +75,36 @@ def test_server_compare_produces_json():
     d = result.to_dict()
     text = json.dumps(d)
     assert json.loads(text)["archetype_match"] == "near_identical"
+
+
+def test_server_scan_options():
+    """Optional workers/cache_path tool arguments map onto build() keywords."""
+    from zip_meta_map.scanner import DEFAULT_MAX_CONTENT_BYTES
+    from zip_meta_map.server import _scan_options
+
+    assert _scan_options({"path": "."}) == {
+        "max_workers": None,
+        "cache_path": None,
+        "max_content_bytes": DEFAULT_MAX_CONTENT_BYTES,
+        "metadata_only": False,
+        "git_index": False,
+        "gitignore": False,
+    }
+    opts = _scan_options(
+        {"path": ".", "workers": 4, "cache_path": "/tmp/cache.json", "max_content_bytes": 1024, "metadata_only": True}
+    )
+    assert opts == {
+        "max_workers": 4,
+        "cache_path": Path("/tmp/cache.json"),
+        "max_content_bytes": 1024,
+        "metadata_only": True,
+        "git_index": False,
+        "gitignore": False,
+    }
+
+
+def test_server_scan_options_reject_negative_content_cap():
+    from zip_meta_map.server import _scan_options
+
+    with pytest.raises(ValueError, match="max_content_bytes"):
+        _scan_options({"path": ".", "max_content_bytes": -1})